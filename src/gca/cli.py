@@ -13,10 +13,22 @@ from rich.console import Console
 from rich.logging import RichHandler
 from rich.table import Table
 
-from gca import __version__, coauthored, commits, config, discussions, prs, quickdraw
+from gca import (
+    __version__,
+    coauthored,
+    commits,
+    config,
+    discussions,
+    git_ops,
+    mirrors,
+    prs,
+    prune,
+    quickdraw,
+    telemetry,
+)
 from gca.github_api import GitHubAuthError, GitHubClient, GitHubError
 from gca.repo_spec import RepoSpec, parse_repo
-from gca.utils import parse_date
+from gca.utils import format_size, parse_date, parse_size
 
 app = typer.Typer(
     add_completion=False,
@@ -25,6 +37,8 @@ app = typer.Typer(
     help="gca - GitHub activity automation. See `gca <command> --help`.",
 )
 console = Console()
+cache_app = typer.Typer(help="Inspect and prune the persistent mirror cache.", no_args_is_help=True)
+app.add_typer(cache_app, name="cache")
 
 
 def _setup_logging(verbose: bool) -> None:
@@ -57,13 +71,16 @@ def root(
         raise typer.Exit()
 
 
-def _client(token_opt: str | None) -> GitHubClient:
+def _client(token_opt: str | None, *, warm: bool = False) -> GitHubClient:
     try:
         token = config.resolve_token(token_opt)
     except RuntimeError as e:
         console.print(f"[red]{e}[/]")
         raise typer.Exit(2) from e
-    return GitHubClient(token)
+    client = GitHubClient(token)
+    if warm:
+        client.warm_up()  # best effort: a cold start is only slower
+    return client
 
 
 def _parse_repos(values: list[str]) -> list[RepoSpec]:
@@ -78,11 +95,59 @@ def _parse_repos(values: list[str]) -> list[RepoSpec]:
     return specs
 
 
-def _emit(summary: object, json_out: bool) -> None:
-    if json_out:
+def _emit_run(
+    summary: object,
+    json_out: bool,
+    client: GitHubClient,
+    flow: str | None = None,
+    *,
+    stats: bool = False,
+) -> None:
+    """Print a flow's results, its HTTP retry stats and (for `flow`) git time per repo.
+
+    `--json` prints just the results list; with `stats` it is wrapped as
+    `{"results", "http_retries", "git_telemetry"}` (the last only for `flow`).
+    """
+    git_stats = telemetry.breakdown(telemetry.calls(flow=flow)) if flow else []
+    retries = client.retry.stats
+    if json_out and not stats:
         console.print_json(data=_to_dict(summary))
-    else:
-        _render_table(summary)
+        return
+    if json_out:
+        data = {"results": _to_dict(summary), "http_retries": _to_dict(retries)}
+        if flow:
+            data["git_telemetry"] = _to_dict(git_stats)
+        console.print_json(data=data)
+        return
+    _render_table(summary)
+    if git_stats:
+        _render_git_stats(git_stats)
+    if retries.retries or retries.rate_limited or retries.circuit_rejections:
+        console.print(
+            f"[dim]http: {retries.requests} responses, {retries.retries} retried "
+            f"({retries.server_errors} 5xx, {retries.transport_errors} transport errors), "
+            f"{retries.rate_limited} rate limited, {retries.slept_s:.1f}s backing off"
+            + (f", {retries.circuit_rejections} failed fast" if retries.circuit_rejections else "")
+            + "[/]"
+        )
+
+
+def _render_git_stats(stats: list[telemetry.GitStat]) -> None:
+    table = Table(show_header=True, header_style="bold", title="git time by repo")
+    for col in ("repo", "subcommand", "calls", "failed", "wall", "cpu", "stdout", "stderr"):
+        table.add_column(col, justify="left" if col in ("repo", "subcommand") else "right")
+    for st in stats:
+        table.add_row(
+            st.repo or "-",
+            st.subcommand,
+            str(st.calls),
+            str(st.failures),
+            f"{st.wall_s:.2f}s",
+            f"{st.cpu_s:.2f}s",
+            format_size(st.stdout_bytes),
+            format_size(st.stderr_bytes),
+        )
+    console.print(table)
 
 
 def _to_dict(o):
@@ -128,6 +193,7 @@ def doctor(token: str | None = typer.Option(None, "--token", "-t", help="GitHub
         console.print("[red]X[/] git not on PATH")
         raise typer.Exit(1)
     console.print("[green]ok[/] git on PATH")
+    _doctor_git_profile()
     try:
         client = _client(token)
         login = client.whoami()
@@ -145,6 +211,24 @@ def doctor(token: str | None = typer.Option(None, "--token", "-t", help="GitHub
         console.print("[yellow]![/] missing write:discussion - `gca discussions` will fail")
     if "delete_repo" not in scopes:
         console.print("[yellow]![/] missing delete_repo - the live smoke test cannot clean up")
+    for b in client.governor.state().buckets.values():
+        if b.remaining is not None and b.limit:
+            console.print(f"     rate limit [{b.resource}]: {b.remaining}/{b.limit} left")
+
+
+def _doctor_git_profile() -> None:
+    profile = git_ops.default_profile()
+    overrides = git_ops.profile_overrides(profile)
+    changed = [o for o in overrides if o[2] != "ignored"]
+    ignored = [o[0] for o in overrides if o[2] == "ignored"]
+    mode = "isolated from" if profile.isolate_global else "layered over"
+    console.print(f"     throwaway clones are {mode} your global git config ({config.GIT_ISOLATE_ENV}=0 to layer)")
+    for key, user_value, gca_value in changed:
+        console.print(f"[yellow]![/] overriding {key}={user_value} -> {gca_value}")
+    if ignored:
+        console.print(f"[yellow]![/] ignoring {len(ignored)} global setting(s): {', '.join(sorted(set(ignored)))}")
+    if not overrides:
+        console.print("[green]ok[/] no user git settings overridden")
 
 
 # ----- init -----
@@ -185,11 +269,36 @@ def commits_cmd(
     strategy: str = typer.Option("every-day", "--strategy", help="every-day|random|weekdays|weekends"),
     per_day_min: int = typer.Option(1, "--min", help="Min commits per active day"),
     per_day_max: int = typer.Option(1, "--max", help="Max commits per active day"),
+    engine: str = typer.Option(
+        "fast-import", "--engine", help="fast-import (one git process) | pack (in-process packfile) | porcelain (add+commit per commit)"
+    ),
+    clone_mode: str = typer.Option(
+        "auto", "--clone-mode", help="auto|full|partial|shallow|no-checkout|sparse (auto: from repo size)"
+    ),
+    use_cache: bool = typer.Option(
+        False, "--cache/--no-cache", help="Borrow objects from the persistent mirror cache (see `gca cache`)"
+    ),
+    chunk_commits: int = typer.Option(
+        commits.DEFAULT_CHUNK_COMMITS, "--chunk-commits", help="Push at most this many commits at a time (0 = no limit)"
+    ),
+    chunk_size: str = typer.Option(
+        "256M", "--chunk-size", help="Push at most this much object data at a time, e.g. 100M (0 = no limit)"
+    ),
+    resume: bool = typer.Option(
+        True, "--resume/--no-resume", help="Continue an interrupted run from its push journal"
+    ),
     token: str | None = typer.Option(None, "--token", "-t"),
     dry_run: bool = typer.Option(False, "--dry-run"),
     json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
 ) -> None:
     """Generate backdated commits across a date range."""
+    try:
+        chunk_bytes = parse_size(chunk_size)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--chunk-size") from e
     opts = commits.CommitOptions(
         repos=_parse_repos(repo),
         start=parse_date(start),
@@ -197,11 +306,17 @@ def commits_cmd(
         strategy=strategy,
         per_day_min=per_day_min,
         per_day_max=per_day_max,
+        engine=engine,
+        clone_mode=clone_mode,
+        use_cache=use_cache,
+        push_chunk_commits=chunk_commits,
+        push_chunk_bytes=chunk_bytes,
+        resume=resume,
         dry_run=dry_run,
     )
-    client = _client(token)
+    client = _client(token, warm=not dry_run)
     summaries = commits.run(client, opts)
-    _emit(summaries, json_out)
+    _emit_run(summaries, json_out, client, "commits", stats=stats)
     _exit_with_errors(summaries)
 
 
@@ -215,9 +330,34 @@ def prs_cmd(
     start: str = typer.Option(..., "--start"),
     end: str = typer.Option(..., "--end"),
     merge_method: str = typer.Option("squash", "--merge-method", help="squash|merge|rebase"),
+    engine: str = typer.Option("fast-import", "--engine", help="fast-import | pack (both without checkout) | porcelain"),
+    clone_mode: str = typer.Option(
+        "auto", "--clone-mode", help="auto|full|partial|shallow|no-checkout|sparse (auto: from repo size)"
+    ),
+    use_cache: bool = typer.Option(
+        False, "--cache/--no-cache", help="Borrow objects from the persistent mirror cache (see `gca cache`)"
+    ),
+    push_mode: str = typer.Option(
+        "atomic", "--push-mode", help="atomic (all PR branches in one push) | per-pr"
+    ),
+    lifecycle: str = typer.Option(
+        "rest", "--lifecycle", help="rest (open+merge each PR) | graphql (batched mutations)"
+    ),
+    merge_strategy: str = typer.Option(
+        "api", "--merge-strategy", help="api (merge each PR) | fast-forward (one push to the default branch)"
+    ),
+    prune_merged: bool = typer.Option(
+        False, "--prune-merged", help="Afterwards, delete gca/pr-* branches whose PRs are merged"
+    ),
+    resume: bool = typer.Option(
+        True, "--resume/--no-resume", help="Finish an interrupted run of the same command instead of starting over"
+    ),
     token: str | None = typer.Option(None, "--token", "-t"),
     dry_run: bool = typer.Option(False, "--dry-run"),
     json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
 ) -> None:
     """Open + merge `count` real backdated PRs per repo (Pull Shark / YOLO)."""
     opts = prs.PROptions(
@@ -226,11 +366,19 @@ def prs_cmd(
         start=parse_date(start),
         end=parse_date(end),
         merge_method=merge_method,
+        engine=engine,
+        clone_mode=clone_mode,
+        use_cache=use_cache,
+        push_mode=push_mode,
+        lifecycle=lifecycle,
+        merge_strategy=merge_strategy,
+        prune_merged=prune_merged,
+        resume=resume,
         dry_run=dry_run,
     )
-    client = _client(token)
+    client = _client(token, warm=not dry_run)
     summaries = prs.run(client, opts)
-    _emit(summaries, json_out)
+    _emit_run(summaries, json_out, client, "prs", stats=stats)
     _exit_with_errors(summaries)
 
 
@@ -244,12 +392,15 @@ def discussions_cmd(
     token: str | None = typer.Option(None, "--token", "-t"),
     dry_run: bool = typer.Option(False, "--dry-run"),
     json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
 ) -> None:
     """Create Q&A discussions and self-mark accepted answer (Galaxy Brain best-effort)."""
     opts = discussions.DiscussionOptions(repos=_parse_repos(repo), count=count, dry_run=dry_run)
-    client = _client(token)
+    client = _client(token, warm=not dry_run)
     summaries = discussions.run(client, opts)
-    _emit(summaries, json_out)
+    _emit_run(summaries, json_out, client, stats=stats)
     _exit_with_errors(summaries)
 
 
@@ -266,9 +417,34 @@ def coauthored_cmd(
         ..., "--coauthor", "-c", help="'Name <email>' (repeatable)"
     ),
     merge_method: str = typer.Option("squash", "--merge-method"),
+    engine: str = typer.Option("fast-import", "--engine", help="fast-import | pack (both without checkout) | porcelain"),
+    clone_mode: str = typer.Option(
+        "auto", "--clone-mode", help="auto|full|partial|shallow|no-checkout|sparse (auto: from repo size)"
+    ),
+    use_cache: bool = typer.Option(
+        False, "--cache/--no-cache", help="Borrow objects from the persistent mirror cache (see `gca cache`)"
+    ),
+    push_mode: str = typer.Option(
+        "atomic", "--push-mode", help="atomic (all PR branches in one push) | per-pr"
+    ),
+    lifecycle: str = typer.Option(
+        "rest", "--lifecycle", help="rest (open+merge each PR) | graphql (batched mutations)"
+    ),
+    merge_strategy: str = typer.Option(
+        "api", "--merge-strategy", help="api (merge each PR) | fast-forward (one push to the default branch)"
+    ),
+    prune_merged: bool = typer.Option(
+        False, "--prune-merged", help="Afterwards, delete gca/pr-* branches whose PRs are merged"
+    ),
+    resume: bool = typer.Option(
+        True, "--resume/--no-resume", help="Finish an interrupted run of the same command instead of starting over"
+    ),
     token: str | None = typer.Option(None, "--token", "-t"),
     dry_run: bool = typer.Option(False, "--dry-run"),
     json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
 ) -> None:
     """Coauthored PRs (mechanics correct; the Pair Extraordinaire badge was frozen Mar 2024)."""
     opts = prs.PROptions(
@@ -278,11 +454,19 @@ def coauthored_cmd(
         end=parse_date(end),
         merge_method=merge_method,
         coauthors=coauthor,
+        engine=engine,
+        clone_mode=clone_mode,
+        use_cache=use_cache,
+        push_mode=push_mode,
+        lifecycle=lifecycle,
+        merge_strategy=merge_strategy,
+        prune_merged=prune_merged,
+        resume=resume,
         dry_run=dry_run,
     )
-    client = _client(token)
+    client = _client(token, warm=not dry_run)
     summaries = coauthored.run(client, opts)
-    _emit(summaries, json_out)
+    _emit_run(summaries, json_out, client, "prs", stats=stats)
     _exit_with_errors(summaries)
 
 
@@ -297,14 +481,38 @@ def quickdraw_cmd(
     token: str | None = typer.Option(None, "--token", "-t"),
     dry_run: bool = typer.Option(False, "--dry-run"),
     json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
 ) -> None:
     """Open then close issues fast for the Quickdraw badge."""
     opts = quickdraw.QuickdrawOptions(
         repos=_parse_repos(repo), count=count, pause_seconds=pause, dry_run=dry_run
     )
-    client = _client(token)
+    client = _client(token, warm=not dry_run)
     summaries = quickdraw.run(client, opts)
-    _emit(summaries, json_out)
+    _emit_run(summaries, json_out, client, stats=stats)
+    _exit_with_errors(summaries)
+
+
+# ----- prune-branches -----
+
+
+@app.command(name="prune-branches")
+def prune_branches_cmd(
+    repo: list[str] = typer.Option(..., "--repo", "-r"),
+    token: str | None = typer.Option(None, "--token", "-t"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Count merged branches, delete nothing"),
+    json_out: bool = typer.Option(False, "--json"),
+    stats: bool = typer.Option(
+        False, "--stats", help="With --json, wrap the results with HTTP retry and git time stats"
+    ),
+) -> None:
+    """Delete gca/pr-* branches whose PRs are merged, in one push per repo."""
+    opts = prune.PruneOptions(repos=_parse_repos(repo), dry_run=dry_run)
+    client = _client(token, warm=True)
+    summaries = prune.run(client, opts)
+    _emit_run(summaries, json_out, client, "prune", stats=stats)
     _exit_with_errors(summaries)
 
 
@@ -340,6 +548,58 @@ def create_repos_cmd(
         raise typer.Exit(1)
 
 
+# ----- cache -----
+
+
+def _render_mirrors(infos: list[mirrors.MirrorInfo], json_out: bool) -> None:
+    if json_out:
+        console.print_json(data=_to_dict(infos))
+        return
+    table = Table(show_header=True, header_style="bold")
+    for col in ("repo", "size", "last used", "path"):
+        table.add_column(col)
+    for m in infos:
+        last = dt.datetime.fromtimestamp(m.last_used).strftime("%Y-%m-%d %H:%M")
+        table.add_row(m.repo, format_size(m.size_bytes), last, m.path)
+    console.print(table)
+
+
+@cache_app.command(name="list")
+def cache_list(json_out: bool = typer.Option(False, "--json")) -> None:
+    """Show cached mirrors, their size and when they were last used."""
+    store = mirrors.MirrorStore()
+    infos = store.list()
+    _render_mirrors(infos, json_out)
+    if not json_out:
+        total = sum(m.size_bytes for m in infos)
+        console.print(f"{len(infos)} mirror(s), {format_size(total)} in {store.root}")
+
+
+@cache_app.command(name="prune")
+def cache_prune(
+    max_size: str | None = typer.Option(
+        None, "--max-size", help="Evict least-recently-used mirrors until the cache fits (e.g. 5G)"
+    ),
+    repo: list[str] = typer.Option([], "--repo", "-r", help="Remove this repo's mirror; repeatable"),
+    all_: bool = typer.Option(False, "--all", help="Remove every mirror not currently in use"),
+    json_out: bool = typer.Option(False, "--json"),
+) -> None:
+    """Evict mirrors by size, by repo, or all of them. Mirrors in use are skipped."""
+    store = mirrors.MirrorStore()
+    if all_ or repo:
+        wanted = {s.full for s in _parse_repos(repo)} if repo else None
+        removed = [m for m in store.list() if (wanted is None or m.repo in wanted) and store.remove(m)]
+    else:
+        try:
+            limit = parse_size(max_size) if max_size else None
+        except ValueError as e:
+            raise typer.BadParameter(str(e)) from e
+        removed = store.evict(max_bytes=limit)
+    _render_mirrors(removed, json_out)
+    if not json_out:
+        console.print(f"removed {len(removed)} mirror(s), freed {format_size(sum(m.size_bytes for m in removed))}")
+
+
 def _exit_with_errors(summaries) -> None:
     """Exit non-zero if any summary has errors."""
     for s in summaries:
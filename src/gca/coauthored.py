@@ -7,6 +7,7 @@ for attribution, regardless of badge status.
 
 from __future__ import annotations
 
+import dataclasses
 import logging
 
 from gca import prs
@@ -41,15 +42,7 @@ def run(client: GitHubClient, opts: prs.PROptions) -> list[prs.PRSummary]:
     if not opts.coauthors:
         raise ValueError("coauthored requires --coauthor 'Name <email>' (repeatable)")
     if not opts.dry_run:
-        opts = prs.PROptions(
-            repos=opts.repos,
-            count=opts.count,
-            start=opts.start,
-            end=opts.end,
-            merge_method=opts.merge_method,
-            coauthors=validate_coauthors(client, opts.coauthors),
-            dry_run=opts.dry_run,
-        )
+        opts = dataclasses.replace(opts, coauthors=validate_coauthors(client, opts.coauthors))
     log.warning(
         "GitHub froze the Pair Extraordinaire badge in March 2024. "
         "These commits still get correct Co-authored-by trailers, "
@@ -1,19 +1,33 @@
-"""Commit-generation flow. Walks a date range, drops backdated commits, pushes."""
+"""Commit-generation flow. Walks a date range, drops backdated commits, pushes.
+
+The whole schedule is planned up front and handed to `git_ops.write_commits`, so the
+`fast-import` engine can write it in a single git process.
+
+Pushing happens in bounded chunks (every N commits and/or M bytes of objects), each
+recorded in a `journal.PushJournal`. If a run dies part-way, rerunning the same command
+rebuilds the same commits and pushes only the chunks the remote has not seen yet.
+"""
 
 from __future__ import annotations
 
 import datetime as dt
 import logging
 import random
+import time
 from dataclasses import dataclass
 
-from gca import git_ops
-from gca.github_api import GitHubClient
+from gca import git_ops, mirrors, telemetry
+from gca.github_api import GitHubClient, GitHubError
+from gca.journal import PushJournal, journal_key
 from gca.repo_spec import RepoSpec
-from gca.utils import load_commit_messages
+from gca.utils import format_size, load_commit_messages
 
 log = logging.getLogger("gca.commits")
 
+DEFAULT_CHUNK_COMMITS = 1000
+DEFAULT_CHUNK_BYTES = 256 * 1024**2
+PUSH_ATTEMPTS = 3
+
 
 @dataclass
 class CommitOptions:
@@ -24,6 +38,12 @@ class CommitOptions:
     per_day_min: int = 1
     per_day_max: int = 1
     messages: list[str] | None = None
+    engine: str = "fast-import"  # fast-import | pack | porcelain
+    clone_mode: str = "auto"  # see git_ops.CLONE_MODES
+    use_cache: bool = False  # borrow objects from the persistent mirror cache
+    push_chunk_commits: int = DEFAULT_CHUNK_COMMITS  # 0 = no commit limit per push
+    push_chunk_bytes: int = DEFAULT_CHUNK_BYTES  # 0 = no size limit per push
+    resume: bool = True  # pick up an interrupted run from its push journal
     dry_run: bool = False
 
 
@@ -32,6 +52,9 @@ class CommitSummary:
     repo: str
     commits_made: int
     pushed: bool
+    resumed: int = 0  # commits already pushed by an earlier, interrupted run
+    push_chunks: int = 0
+    bytes_pushed: int = 0
     error: str | None = None
 
 
@@ -53,6 +76,130 @@ def _per_day(opts: CommitOptions) -> int:
     return random.randint(opts.per_day_min, opts.per_day_max)
 
 
+def _schedule(opts: CommitOptions, messages: list[str]) -> list[git_ops.CommitSpec]:
+    """Walk start..end and plan every commit (file, message, backdated time)."""
+    specs: list[git_ops.CommitSpec] = []
+    cursor = opts.start
+    idx = 0
+    while cursor <= opts.end:
+        if _should_commit_on(cursor, opts.strategy):
+            for _ in range(_per_day(opts)):
+                idx += 1
+                msg = random.choice(messages)
+                when = dt.datetime.combine(
+                    cursor,
+                    dt.time(
+                        hour=random.randint(9, 17),
+                        minute=random.randint(0, 59),
+                        second=random.randint(0, 59),
+                    ),
+                    tzinfo=dt.timezone.utc,
+                )
+                specs.append(
+                    git_ops.CommitSpec(
+                        file_name=f".gca/log/{cursor.isoformat()}-{idx}.md",
+                        file_content=f"# {msg}\n\nDate: {cursor.isoformat()}\nCommit #{idx}\n",
+                        message=msg,
+                        when=when,
+                    )
+                )
+        cursor += dt.timedelta(days=1)
+    return specs
+
+
+def _journal_key(opts: CommitOptions, spec: RepoSpec) -> str:
+    return journal_key(
+        spec.full, opts.start, opts.end, opts.strategy, opts.per_day_min, opts.per_day_max
+    )
+
+
+def _next_chunk(
+    repo_dir, shas: list[str], start: int, prev: str, opts: CommitOptions
+) -> tuple[int, int]:
+    """Return (end, bytes) for the push chunk beginning at shas[start].
+
+    The chunk holds at most `push_chunk_commits` commits, shrunk (by bisection on the
+    object size of the range) until it fits `push_chunk_bytes`. A single commit that is
+    larger than the limit still goes out on its own.
+    """
+    limit = opts.push_chunk_commits
+    end = len(shas) if limit <= 0 else min(len(shas), start + limit)
+    size = git_ops.objects_size(repo_dir, shas[end - 1], exclude=prev)
+    if opts.push_chunk_bytes <= 0 or size <= opts.push_chunk_bytes or end == start + 1:
+        return end, size
+    best, best_size = start + 1, None
+    lo, hi = start + 1, end - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        mid_size = git_ops.objects_size(repo_dir, shas[mid - 1], exclude=prev)
+        if mid_size <= opts.push_chunk_bytes:
+            best, best_size = mid, mid_size
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    if best_size is None:
+        best_size = git_ops.objects_size(repo_dir, shas[start], exclude=prev)
+    return best, best_size
+
+
+def _push_with_retry(repo_dir, sha: str, branch: str) -> None:
+    for attempt in range(PUSH_ATTEMPTS):
+        try:
+            git_ops.push_commit(repo_dir, sha, branch)
+            return
+        except git_ops.GitError as e:
+            if attempt == PUSH_ATTEMPTS - 1:
+                raise
+            delay = 2**attempt
+            log.warning("push of %s failed (%s); retrying in %ds", sha[:12], e, delay)
+            time.sleep(delay)
+
+
+def _push_chunks(
+    repo_dir,
+    branch: str,
+    shas: list[str],
+    *,
+    prev: str,
+    journal: PushJournal,
+    opts: CommitOptions,
+    summary: CommitSummary,
+) -> None:
+    """Push `shas` (oldest first, on top of `prev`) chunk by chunk, journaling each one."""
+    total = journal.pushed + len(shas)
+    start = 0
+    while start < len(shas):
+        end, size = _next_chunk(repo_dir, shas, start, prev, opts)
+        tip = shas[end - 1]
+        _push_with_retry(repo_dir, tip, branch)
+        journal.record(journal.pushed + end - start, tip)
+        summary.push_chunks += 1
+        summary.bytes_pushed += size
+        log.info(
+            "%s: pushed chunk %d (%d commits, %s) - %d/%d on remote",
+            summary.repo,
+            summary.push_chunks,
+            end - start,
+            format_size(size),
+            journal.pushed,
+            total,
+        )
+        prev, start = tip, end
+
+
+def _resume_point(saved: PushJournal | None, repo_dir, branch: str, remote_tip: str) -> int:
+    """How many commits of the saved schedule are already on the remote (0 = start over)."""
+    if saved is None or saved.branch != branch or not saved.pushed or not saved.tip:
+        return 0
+    # a shallow clone may not reach back to the journaled tip: deepen until it does
+    if saved.tip == remote_tip or git_ops.is_ancestor(repo_dir, saved.tip, remote_tip, deepen=True):
+        return saved.pushed
+    log.warning(
+        "%s: remote %s no longer contains the journaled push; starting over", saved.repo, branch
+    )
+    return 0
+
+
 def run(client: GitHubClient, opts: CommitOptions) -> list[CommitSummary]:
     if opts.start > opts.end:
         raise ValueError("start date must be <= end date")
@@ -60,62 +207,88 @@ def run(client: GitHubClient, opts: CommitOptions) -> list[CommitSummary]:
         raise ValueError("invalid per-day commit range")
     if opts.strategy not in {"every-day", "random", "weekdays", "weekends"}:
         raise ValueError(f"unknown strategy: {opts.strategy!r}")
+    if opts.engine not in git_ops.ENGINES:
+        raise ValueError(f"unknown commit engine: {opts.engine!r}")
+    if opts.clone_mode not in git_ops.CLONE_MODES:
+        raise ValueError(f"unknown clone mode: {opts.clone_mode!r}")
+    if opts.push_chunk_commits < 0 or opts.push_chunk_bytes < 0:
+        raise ValueError("push chunk limits must be >= 0")
 
     messages = opts.messages or load_commit_messages()
     summaries: list[CommitSummary] = []
 
     username = client.whoami() if not opts.dry_run else "dry-run-user"
+    try:
+        checks = client.preflight(opts.repos, need_push=True) if not opts.dry_run else {}
+    except GitHubError as e:
+        log.error("preflight failed: %s", e)
+        return [
+            CommitSummary(repo=s.full, commits_made=0, pushed=False, error=f"preflight: {e}")
+            for s in opts.repos
+        ]
 
     for spec in opts.repos:
         summary = CommitSummary(repo=spec.full, commits_made=0, pushed=False)
+        check = checks.get(spec.full)
+        if check is not None and check.problem:
+            summary.error = f"preflight: {check.problem}"
+            summaries.append(summary)
+            continue
+        url = spec.auth_clone_url(client.token) if not opts.dry_run else ""
         try:
-            with git_ops.temp_workdir(prefix=f"gca-commits-{spec.name}-") as base:
+            with (
+                telemetry.scope(flow="commits", repo=spec.full),
+                git_ops.temp_workdir(prefix=f"gca-commits-{spec.name}-") as base,
+                mirrors.borrow(spec, url, enabled=opts.use_cache and not opts.dry_run) as reference,
+            ):
+                key = _journal_key(opts, spec)
+                saved = PushJournal.load(key) if opts.resume and not opts.dry_run else None
+                schedule = saved.schedule if saved else _schedule(opts, messages)
                 if opts.dry_run:
                     log.info("[dry-run] would clone %s", spec.full)
+                    summary.commits_made = len(schedule)
                     summary.pushed = False
                 else:
-                    repo_dir = git_ops.clone(spec.auth_clone_url(client.token), base / spec.name)
+                    mode = git_ops.resolve_clone_mode(
+                        opts.clone_mode, size_kb=check.repo.size_kb, engine=opts.engine
+                    )
+                    repo_dir = git_ops.clone(
+                        url,
+                        base / spec.name,
+                        mode=mode,
+                        checkout=opts.engine == "porcelain",
+                        reference=reference,
+                    )
                     default_branch = git_ops.detect_default_branch(repo_dir)
-                    git_ops.checkout(repo_dir, default_branch)
-
-                cursor = opts.start
-                idx = 0
-                while cursor <= opts.end:
-                    if _should_commit_on(cursor, opts.strategy):
-                        for _ in range(_per_day(opts)):
-                            idx += 1
-                            msg = random.choice(messages)
-                            file_name = f".gca/log/{cursor.isoformat()}-{idx}.md"
-                            when = dt.datetime.combine(
-                                cursor,
-                                dt.time(
-                                    hour=random.randint(9, 17),
-                                    minute=random.randint(0, 59),
-                                    second=random.randint(0, 59),
-                                ),
-                                tzinfo=dt.timezone.utc,
-                            )
-                            content = (
-                                f"# {msg}\n\nDate: {cursor.isoformat()}\nCommit #{idx}\n"
-                            )
-                            if opts.dry_run:
-                                summary.commits_made += 1
-                            else:
-                                # ensure parent dir exists
-                                (repo_dir / ".gca" / "log").mkdir(parents=True, exist_ok=True)
-                                git_ops.backdated_commit(
-                                    repo_dir,
-                                    file_name=file_name,
-                                    file_content=content,
-                                    message=msg,
-                                    when=when,
-                                )
-                                summary.commits_made += 1
-                    cursor += dt.timedelta(days=1)
-
-                if not opts.dry_run and summary.commits_made > 0:
-                    git_ops.push(repo_dir, default_branch)
-                    summary.pushed = True
+                    remote_tip = git_ops.rev_parse(repo_dir, f"refs/heads/{default_branch}")
+                    done = _resume_point(saved, repo_dir, default_branch, remote_tip)
+                    if done:
+                        log.info("%s: resuming after %d pushed commits", spec.full, done)
+                        journal = saved
+                    else:
+                        journal = PushJournal(key, spec.full, default_branch, remote_tip, schedule)
+                        journal.save()
+                    summary.resumed = done
+                    remaining = schedule[done:]
+                    shas = (
+                        git_ops.write_commits(
+                            repo_dir, default_branch, remaining, engine=opts.engine
+                        )
+                        if remaining
+                        else []
+                    )
+                    summary.commits_made = len(shas)
+                    _push_chunks(
+                        repo_dir,
+                        default_branch,
+                        shas,
+                        prev=remote_tip,
+                        journal=journal,
+                        opts=opts,
+                        summary=summary,
+                    )
+                    summary.pushed = bool(shas or done)
+                    journal.discard()
         except Exception as e:
             summary.error = f"{type(e).__name__}: {e}"
             log.error("commits failed for %s: %s", spec.full, e)
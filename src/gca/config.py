@@ -20,6 +20,19 @@ KEYRING_USER = "github"
 TOKEN_ENV = "GCA_GITHUB_TOKEN"
 API_ENV = "GCA_GITHUB_API"
 DEFAULT_API = "https://api.github.com"
+CACHE_ENV = "GCA_CACHE_DIR"
+MIRROR_MAX_ENV = "GCA_MIRROR_MAX_SIZE"
+DEFAULT_MIRROR_MAX = "20G"
+GIT_ISOLATE_ENV = "GCA_GIT_ISOLATE"
+RATE_LEDGER_ENV = "GCA_RATE_LEDGER"
+HTTP_CACHE_ENV = "GCA_HTTP_CACHE"
+HTTP_CACHE_MAX_ENV = "GCA_HTTP_CACHE_MAX_SIZE"
+DEFAULT_HTTP_CACHE_MAX = "50M"
+METADATA_TTL_ENV = "GCA_METADATA_TTL"
+DEFAULT_METADATA_TTL = 86_400
+HTTP_CONCURRENCY_ENV = "GCA_HTTP_CONCURRENCY"
+DEFAULT_HTTP_CONCURRENCY = 8
+HTTP2_ENV = "GCA_HTTP2"
 
 CLASSIC_PAT_RE = re.compile(r"^ghp_[A-Za-z0-9]{36,}$")
 FINE_PAT_RE = re.compile(r"^github_pat_[A-Za-z0-9_]{40,}$")
@@ -102,3 +115,69 @@ def delete_token_from_keyring() -> None:
 
 def api_base() -> str:
     return os.environ.get(API_ENV, DEFAULT_API).rstrip("/")
+
+
+def cache_dir() -> Path:
+    """Root for persistent caches: GCA_CACHE_DIR > $XDG_CACHE_HOME/gca > ~/.cache/gca."""
+    if v := os.environ.get(CACHE_ENV):
+        return Path(v).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "gca"
+
+
+def mirror_max_bytes() -> int:
+    from gca.utils import parse_size
+
+    return parse_size(os.environ.get(MIRROR_MAX_ENV, DEFAULT_MIRROR_MAX))
+
+
+def isolate_git_config() -> bool:
+    """Whether throwaway clones ignore the user's global git config (GCA_GIT_ISOLATE=0 opts out)."""
+    return os.environ.get(GIT_ISOLATE_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def rate_ledger_enabled() -> bool:
+    """Whether gca processes share rate-limit state on disk (GCA_RATE_LEDGER=0 opts out)."""
+    return os.environ.get(RATE_LEDGER_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def http_cache_enabled() -> bool:
+    """Whether GitHub GETs go through the on-disk conditional cache (GCA_HTTP_CACHE=0 opts out)."""
+    return os.environ.get(HTTP_CACHE_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def http_cache_max_bytes() -> int:
+    from gca.utils import parse_size
+
+    return parse_size(os.environ.get(HTTP_CACHE_MAX_ENV, DEFAULT_HTTP_CACHE_MAX))
+
+
+def metadata_ttl() -> float:
+    """Seconds repo metadata stays cached (GCA_METADATA_TTL; 0 disables the cache)."""
+    raw = os.environ.get(METADATA_TTL_ENV)
+    if raw is None or not raw.strip():
+        return DEFAULT_METADATA_TTL
+    try:
+        return float(raw)
+    except ValueError as e:
+        raise RuntimeError(f"{METADATA_TTL_ENV} must be a number of seconds, got {raw!r}") from e
+
+
+def http_concurrency() -> int:
+    """Pooled connections per GitHub client (GCA_HTTP_CONCURRENCY, default 8)."""
+    raw = os.environ.get(HTTP_CONCURRENCY_ENV)
+    if raw is None or not raw.strip():
+        return DEFAULT_HTTP_CONCURRENCY
+    try:
+        value = int(raw)
+    except ValueError as e:
+        raise RuntimeError(f"{HTTP_CONCURRENCY_ENV} must be a positive integer, got {raw!r}") from e
+    if value < 1:
+        raise RuntimeError(f"{HTTP_CONCURRENCY_ENV} must be a positive integer, got {raw!r}")
+    return value
+
+
+def http2_enabled() -> bool:
+    """Whether to talk HTTP/2 when the `http2` extra is installed (opt-in via GCA_HTTP2=1)."""
+    return os.environ.get(HTTP2_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
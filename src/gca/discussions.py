@@ -12,7 +12,7 @@ import logging
 import random
 from dataclasses import dataclass, field
 
-from gca.github_api import DiscussionCategoryError, GitHubClient
+from gca.github_api import GitHubClient, GitHubError, GitHubNotFound
 from gca.repo_spec import RepoSpec
 
 log = logging.getLogger("gca.discussions")
@@ -49,10 +49,25 @@ class DiscussionSummary:
     errors: list[str] = field(default_factory=list)
 
 
+def _failed(
+    client: GitHubClient, spec: RepoSpec, summary: DiscussionSummary, i: int, e: Exception
+) -> None:
+    if isinstance(e, GitHubNotFound):
+        # cached repository/category IDs may be stale; refetch next run
+        client.forget_repo(spec.full)
+    summary.errors.append(f"discussion {i+1}: {type(e).__name__}: {e}")
+
+
 def run(client: GitHubClient, opts: DiscussionOptions) -> list[DiscussionSummary]:
     if opts.count < 1:
         raise ValueError("count must be >= 1")
 
+    try:
+        checks = client.preflight(opts.repos, discussions=True) if not opts.dry_run else {}
+    except GitHubError as e:
+        log.error("preflight failed: %s", e)
+        return [DiscussionSummary(repo=s.full, errors=[f"preflight: {e}"]) for s in opts.repos]
+
     summaries: list[DiscussionSummary] = []
     for spec in opts.repos:
         summary = DiscussionSummary(repo=spec.full)
@@ -62,26 +77,41 @@ def run(client: GitHubClient, opts: DiscussionOptions) -> list[DiscussionSummary
                 summary.answered = opts.count
                 summaries.append(summary)
                 continue
-            repo = client.get_repo(spec.owner, spec.name)
-            try:
-                repo_id, cat_id, cat_name = client.find_repo_and_qa_category(repo)
-            except DiscussionCategoryError as e:
-                summary.errors.append(str(e))
+            check = checks[spec.full]
+            if check.problem or check.discussion is None:
+                summary.errors.append(check.problem or f"{spec.full}: no discussion category")
                 summaries.append(summary)
                 continue
+            repo_id, cat_id, cat_name = check.discussion
             log.info("using discussion category %r (id=%s) on %s", cat_name, cat_id, spec.full)
 
+            posts = []
             for i in range(opts.count):
                 title, body = random.choice(QUESTION_BANK)
-                title = f"{title} (#{i+1})"
-                try:
-                    discussion = client.create_discussion(repo_id, cat_id, title, body)
+                posts.append((f"{title} (#{i+1})", body))
+
+            # three batched phases (create, comment, accept); each carries the items that
+            # survived the previous one, so errors land on the right discussion number
+            live: list[tuple[int, str]] = []
+            for i, res in enumerate(client.create_discussions(repo_id, cat_id, posts)):
+                if isinstance(res, Exception):
+                    _failed(client, spec, summary, i, res)
+                else:
                     summary.created += 1
-                    comment_id = client.add_discussion_comment(discussion["id"], random.choice(ANSWER_BANK))
-                    client.mark_comment_as_answer(comment_id)
+                    live.append((i, res["id"]))
+            replies = client.add_discussion_comments([(d, random.choice(ANSWER_BANK)) for _, d in live])
+            commented: list[tuple[int, str]] = []
+            for (i, _), res in zip(live, replies, strict=True):
+                if isinstance(res, Exception):
+                    _failed(client, spec, summary, i, res)
+                else:
+                    commented.append((i, res))
+            marks = client.mark_comments_as_answers([c for _, c in commented])
+            for (i, _), err in zip(commented, marks, strict=True):
+                if err is not None:
+                    _failed(client, spec, summary, i, err)
+                else:
                     summary.answered += 1
-                except Exception as e:
-                    summary.errors.append(f"discussion {i+1}: {type(e).__name__}: {e}")
         except Exception as e:
             summary.errors.append(f"setup: {type(e).__name__}: {e}")
         summaries.append(summary)
@@ -2,68 +2,518 @@
 
 All commands use list form (no `shell=True`). Author and committer dates use the
 git-internal '<unix-ts> +HHMM' format which is the only fully unambiguous one.
+
+Three commit engines are available for bulk history generation:
+- `fast-import` streams the whole schedule into a single `git fast-import` process.
+- `pack` hashes and packs every object in-process (see `gca.packfile`).
+- `porcelain` runs `git add` + `git commit` per commit in the working tree (fallback).
 """
 
 from __future__ import annotations
 
+import atexit
 import datetime as dt
 import logging
 import os
+import re
 import shutil
 import subprocess
 import tempfile
-from collections.abc import Iterable
-from contextlib import contextmanager
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
 from pathlib import Path
 
+from gca import config, packfile, telemetry
 from gca.utils import git_date_string, parse_coauthor
 
 log = logging.getLogger("gca.git_ops")
 
+ENGINES = ("fast-import", "pack", "porcelain")
+
+# Everything gca writes lives under .gca/, so nothing else has to be on disk.
+CLONE_MODES = ("auto", "full", "partial", "shallow", "no-checkout", "sparse")
+_CLONE_ARGS: dict[str, list[str]] = {
+    "full": [],
+    "partial": ["--filter=blob:none"],
+    "shallow": ["--depth", "1"],
+    "no-checkout": ["--no-checkout"],
+    "sparse": ["--filter=blob:none", "--sparse"],
+}
+SPARSE_PATHS = (".gca",)
+DEEPEN_START = 64  # commits fetched by the first `is_ancestor(deepen=True)` round
+LARGE_REPO_KB = 200_000  # GitHub reports `size` in KB; above this `auto` goes minimal
+
+
+# Applied to every clone made inside `temp_workdir`, as local config so it beats the
+# user's ~/.gitconfig. These are throwaway repos: no signing, no hooks, no background
+# maintenance, no fsync, and an index/compression setup tuned for many tiny files.
+# Packing (push, fetch --deepen) uses every core with bounded delta-window memory, and
+# blobs past bigFileThreshold are stored whole instead of being delta-searched.
+PROFILE_SETTINGS: dict[str, str] = {
+    "commit.gpgSign": "false",
+    "tag.gpgSign": "false",
+    "push.gpgSign": "false",
+    "core.hooksPath": os.devnull,
+    "core.fsmonitor": "false",
+    "core.untrackedCache": "false",
+    "core.autocrlf": "false",
+    "core.fsync": "none",
+    "core.looseCompression": "1",
+    "core.bigFileThreshold": "16m",
+    "pack.threads": "0",
+    "pack.windowMemory": "256m",
+    "gc.auto": "0",
+    "maintenance.auto": "false",
+    "fetch.writeCommitGraph": "false",
+    "index.version": "4",
+    "index.threads": "true",
+    "advice.detachedHead": "false",
+}
+
+# User settings carried into isolated clones: identity, and whatever is needed to
+# reach the remote (proxies, CA bundles, credential helpers, URL rewrites).
+PROFILE_KEEP = (
+    re.compile(r"^user\.(name|email)$"),
+    re.compile(r"^https?\..*"),
+    re.compile(r"^credential\..*"),
+    re.compile(r"^url\..*\.(insteadof|pushinsteadof)$"),
+    re.compile(r"^core\.(sshcommand|askpass)$"),
+)
+
+_URL_CREDENTIALS_RE = re.compile(r"(https?://)[^/@\s]+@")
+
 
 class GitError(RuntimeError):
     pass
 
 
-def run_git(args: list[str], *, cwd: str | os.PathLike, env: dict | None = None, capture: bool = False) -> str:
-    """Run `git <args>` in cwd. Raises GitError on non-zero exit."""
-    cmd = ["git", *args]
+@dataclass(frozen=True)
+class GitProfile:
+    """How gca configures the throwaway clones it creates.
+
+    `isolate_global=True` runs git with the global and system config files ignored and
+    only the PROFILE_KEEP keys copied over; otherwise user config still applies except
+    where `settings` override it.
+    """
+
+    settings: tuple[tuple[str, str], ...] = tuple(PROFILE_SETTINGS.items())
+    isolate_global: bool = True
+
+    def env(self) -> dict[str, str]:
+        if not self.isolate_global:
+            return {}
+        return {"GIT_CONFIG_GLOBAL": os.devnull, "GIT_CONFIG_NOSYSTEM": "1"}
+
+    def clone_config(self) -> list[tuple[str, str]]:
+        """Key/value pairs written into each new clone's local config."""
+        pairs = list(self.settings)
+        if self.isolate_global:
+            overridden = {k.lower() for k, _ in self.settings}
+            for key, value in user_config():
+                if key not in overridden and any(p.match(key) for p in PROFILE_KEEP):
+                    pairs.append((key, value))
+        return pairs
+
+
+def default_profile() -> GitProfile:
+    return GitProfile(isolate_global=config.isolate_git_config())
+
+
+def user_config() -> list[tuple[str, str]]:
+    """The user's global + system git config as (lowercased key, value) pairs."""
+    pairs: list[tuple[str, str]] = []
+    for scope in ("--system", "--global"):
+        try:
+            raw = _run(["config", scope, "--includes", "--list", "-z"], cwd=Path.home(), capture=True)
+        except GitError:
+            continue  # scope file missing
+        for rec in raw.decode("utf-8", "replace").split("\0"):
+            if rec:
+                key, _, value = rec.partition("\n")
+                pairs.append((key.lower(), value))
+    return pairs
+
+
+def profile_overrides(profile: GitProfile | None = None) -> list[tuple[str, str, str]]:
+    """User config that gca's clones do not honor, as (key, user value, gca value).
+
+    gca value is the profile setting, or 'ignored' for global keys dropped by isolation.
+    """
+    profile = profile or default_profile()
+    settings = {k.lower(): v for k, v in profile.settings}
+    out: list[tuple[str, str, str]] = []
+    for key, value in user_config():
+        if key in settings:
+            if settings[key].lower() != value.lower():
+                out.append((key, value, settings[key]))
+        elif profile.isolate_global and not any(p.match(key) for p in PROFILE_KEEP):
+            out.append((key, value, "ignored"))
+    return out
+
+
+# temp_workdir base -> profile applied to every git call under it
+_PROFILED: dict[str, GitProfile] = {}
+
+
+def _profile_for(path: str | os.PathLike) -> GitProfile | None:
+    p = os.path.abspath(path)
+    for base, profile in _PROFILED.items():
+        if p == base or p.startswith(base + os.sep):
+            return profile
+    return None
+
+
+def _config_args(path: str | os.PathLike) -> list[str]:
+    """`-c key=value` pairs for the profile in force at `path` (none outside temp_workdir).
+
+    `clone` stores them in the new repo; git calls that have no repo of their own to
+    hold them (`ls-remote`, pushes to a bare URL) pass them on the command line, so the
+    kept proxy, CA and credential settings still apply under isolation.
+    """
+    profile = _profile_for(path)
+    if profile is None:
+        return []
+    return [arg for key, value in profile.clone_config() for arg in ("-c", f"{key}={value}")]
+
+
+def _redact(text: str) -> str:
+    return _URL_CREDENTIALS_RE.sub(r"\1***@", text)
+
+
+@dataclass(frozen=True)
+class CommitSpec:
+    """One generated commit: a single new file, its message, and the backdated timestamp."""
+
+    file_name: str
+    file_content: str
+    message: str
+    when: dt.datetime
+    coauthors: tuple[str, ...] = ()
+    body: str = ""
+
+
+def _git_env(cwd: str | os.PathLike, env: dict | None = None) -> dict[str, str]:
     full_env = os.environ.copy()
+    profile = _profile_for(cwd)
+    if profile is not None:
+        full_env.update(profile.env())
     if env:
         full_env.update(env)
-    try:
-        out = subprocess.run(
-            cmd,
-            cwd=str(cwd),
-            env=full_env,
-            check=True,
-            stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
-            stderr=subprocess.PIPE,
-            text=True,
+    return full_env
+
+
+def _run(
+    args: list[str],
+    *,
+    cwd: str | os.PathLike,
+    env: dict | None = None,
+    capture: bool = False,
+    input: bytes | None = None,
+) -> bytes:
+    cmd = ["git", *args]
+    started, cpu0 = time.perf_counter(), telemetry.child_cpu()
+    out = subprocess.run(
+        cmd,
+        cwd=str(cwd),
+        env=_git_env(cwd, env),
+        input=input,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    telemetry.record(
+        args,
+        wall_s=time.perf_counter() - started,
+        cpu_s=telemetry.child_cpu() - cpu0,
+        status=out.returncode,
+        stdout_bytes=len(out.stdout or b""),
+        stderr_bytes=len(out.stderr or b""),
+    )
+    if out.returncode != 0:
+        stderr = (out.stderr or b"").decode("utf-8", "replace").strip()
+        raise GitError(_redact(f"git {' '.join(args)} failed: {stderr}"))
+    return out.stdout if capture else b""
+
+
+def run_git(
+    args: list[str],
+    *,
+    cwd: str | os.PathLike,
+    env: dict | None = None,
+    capture: bool = False,
+    input: bytes | None = None,
+) -> str:
+    """Run `git <args>` in cwd. Raises GitError on non-zero exit.
+
+    `input` is fed to stdin as raw bytes (used for streaming commands like fast-import).
+    """
+    return _run(args, cwd=cwd, env=env, capture=capture, input=input).decode("utf-8", "replace")
+
+
+class _Coproc:
+    """A git process we talk to over stdin/stdout; stderr is spooled for error messages."""
+
+    def __init__(self, repo_dir: Path, args: list[str]):
+        self.err = tempfile.TemporaryFile()  # noqa: SIM115 - lives as long as the process
+        self.proc = subprocess.Popen(
+            ["git", *args],
+            cwd=str(repo_dir),
+            env=_git_env(repo_dir),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self.err,
         )
-    except subprocess.CalledProcessError as e:
-        stderr = (e.stderr or "").strip()
-        raise GitError(f"git {' '.join(args)} failed: {stderr}") from e
-    return out.stdout if capture else ""
+        self.args = args
+        self.started = time.perf_counter()
+        self.scope = telemetry.current()
+        self.stdout_bytes = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def ask(self, payload: bytes, replies: int) -> list[str]:
+        """Write `payload`, then read `replies` lines (fewer if the process dies)."""
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        out: list[str] = []
+        try:
+            self.proc.stdin.write(payload)
+            self.proc.stdin.flush()
+            for _ in range(replies):
+                line = self.proc.stdout.readline()
+                if not line:
+                    break
+                self.stdout_bytes += len(line)
+                out.append(line.decode("utf-8", "replace").rstrip("\n"))
+        except OSError:
+            pass
+        return out
+
+    def error(self) -> GitError:
+        self.stop()
+        self.err.seek(0)
+        stderr = self.err.read().decode("utf-8", "replace").strip()
+        self.err.close()
+        return GitError(_redact(f"git {' '.join(self.args)} failed: {stderr}"))
+
+    def stop(self) -> None:
+        if self.proc.stdout is None or self.proc.stdout.closed:
+            return  # already stopped
+        if self.proc.stdin is not None:
+            with suppress(OSError):
+                self.proc.stdin.close()
+        cpu0 = telemetry.child_cpu()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc.stdout.close()
+        stderr_bytes = 0
+        with suppress(OSError, ValueError):
+            stderr_bytes = self.err.seek(0, os.SEEK_END)
+        flow, repo = self.scope
+        with telemetry.scope(flow=flow, repo=repo):
+            telemetry.record(
+                self.args,
+                wall_s=time.perf_counter() - self.started,
+                cpu_s=telemetry.child_cpu() - cpu0,
+                status=self.proc.returncode,
+                stdout_bytes=self.stdout_bytes,
+                stderr_bytes=stderr_bytes,
+            )
+
+
+class GitRunner:
+    """Long-lived git coprocesses for one repository.
+
+    Single-value lookups go down a `git cat-file --batch-check` pipe and ref updates
+    through `git update-ref --stdin` transactions, instead of a new process per call.
+    Both are started lazily and restarted if they die. Use `runner_for()` to get the
+    shared instance for a repo; `temp_workdir` closes the runners made under it.
+    """
+
+    def __init__(self, repo_dir: str | os.PathLike):
+        self.repo_dir = Path(repo_dir)
+        self._lock = threading.Lock()
+        self._batch: _Coproc | None = None
+        self._refs: _Coproc | None = None
+        self._git_dir: Path | None = None
+
+    def resolve(self, rev: str) -> str | None:
+        """SHA that `rev` names, or None if it does not resolve (cat-file --batch-check)."""
+        if "\n" in rev:
+            raise ValueError(f"invalid revision: {rev!r}")
+        with self._lock:
+            if self._batch is None or not self._batch.alive:
+                self._batch = _Coproc(self.repo_dir, ["cat-file", "--batch-check=%(objectname)"])
+            replies = self._batch.ask(rev.encode("utf-8") + b"\n", 1)
+            if not replies:
+                raise self._batch.error()
+            line = replies[0]
+            if line.endswith((" missing", " ambiguous")):
+                return None
+            return line
+
+    def update_refs(self, updates: Sequence[tuple[str, str, str | None]]) -> None:
+        """Apply (ref, new sha, expected old sha or None) updates as one transaction."""
+        if not updates:
+            return
+        lines = ["start"]
+        lines += [f"update {ref} {new} {old or ''}".rstrip() for ref, new, old in updates]
+        lines += ["prepare", "commit"]
+        with self._lock:
+            if self._refs is None or not self._refs.alive:
+                self._refs = _Coproc(self.repo_dir, ["update-ref", "-m", "gca", "--stdin"])
+            replies = self._refs.ask(("\n".join(lines) + "\n").encode("utf-8"), 3)
+            if replies != ["start: ok", "prepare: ok", "commit: ok"]:
+                raise self._refs.error()
+
+    def git_dir(self) -> Path:
+        if self._git_dir is None:
+            dot_git = self.repo_dir / ".git"
+            if dot_git.is_dir():
+                self._git_dir = dot_git.resolve()
+            else:
+                out = run_git(["rev-parse", "--absolute-git-dir"], cwd=self.repo_dir, capture=True)
+                self._git_dir = Path(out.strip())
+        return self._git_dir
+
+    def symbolic_ref(self, name: str) -> str | None:
+        """Target of symbolic ref `name`, read straight from its file (no process)."""
+        try:
+            content = (self.git_dir() / name).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return content[5:].strip() if content.startswith("ref: ") else None
+
+    def close(self) -> None:
+        with self._lock:
+            for coproc in (self._batch, self._refs):
+                if coproc is not None:
+                    coproc.stop()
+                    coproc.err.close()
+            self._batch = self._refs = None
+
+
+# absolute repo path -> its runner
+_RUNNERS: dict[str, GitRunner] = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def runner_for(repo_dir: str | os.PathLike) -> GitRunner:
+    key = os.path.abspath(repo_dir)
+    with _RUNNERS_LOCK:
+        runner = _RUNNERS.get(key)
+        if runner is None:
+            runner = _RUNNERS[key] = GitRunner(key)
+        return runner
+
+
+def close_runners(under: str | os.PathLike | None = None) -> None:
+    """Shut down the runners for repos below `under` (all of them if None)."""
+    prefix = os.path.abspath(under) if under is not None else None
+    with _RUNNERS_LOCK:
+        keys = [
+            k
+            for k in _RUNNERS
+            if prefix is None or k == prefix or k.startswith(prefix + os.sep)
+        ]
+        runners = [_RUNNERS.pop(k) for k in keys]
+    for runner in runners:
+        runner.close()
+
+
+atexit.register(close_runners)
+
+
+def resolve_clone_mode(mode: str, *, size_kb: int | None, engine: str) -> str:
+    """Turn `auto` into a concrete clone mode from the repo size and commit engine.
+
+    The porcelain engine needs a working tree, so it gets `full` or `sparse`. The
+    worktree-free engines get `no-checkout`, or a depth-1 `shallow` clone for big repos.
+    """
+    if mode not in CLONE_MODES:
+        raise ValueError(f"unknown clone mode: {mode!r}")
+    if mode == "no-checkout" and engine == "porcelain":
+        # an empty index would commit a tree without every existing file
+        raise ValueError("the porcelain engine needs a working tree; pick another clone mode")
+    if mode != "auto":
+        return mode
+    large = size_kb is not None and size_kb >= LARGE_REPO_KB
+    if engine == "porcelain":
+        return "sparse" if large else "full"
+    return "shallow" if large else "no-checkout"
+
 
+def clone(
+    url: str,
+    dest: str | os.PathLike,
+    *,
+    mode: str = "full",
+    checkout: bool = True,
+    reference: str | os.PathLike | None = None,
+) -> Path:
+    """Clone url into dest. If dest exists, wipe and re-clone.
 
-def clone(url: str, dest: str | os.PathLike) -> Path:
-    """Clone url into dest. If dest exists, wipe and re-clone."""
+    `mode` picks how much is downloaded and checked out (see CLONE_MODES; `auto` must be
+    resolved first). `sparse` limits the working tree to SPARSE_PATHS. `checkout=False`
+    skips the working tree entirely, for flows that only write objects and refs.
+    `reference` borrows objects from a local mirror through alternates.
+    """
+    if mode not in _CLONE_ARGS:
+        raise ValueError(f"unknown clone mode: {mode!r}")
     dest_p = Path(dest)
     if dest_p.exists():
         shutil.rmtree(dest_p)
     dest_p.parent.mkdir(parents=True, exist_ok=True)
-    subprocess.run(
-        ["git", "clone", "--quiet", url, str(dest_p)],
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
-    )
+    args = ["clone", "--quiet", *_CLONE_ARGS[mode]]
+    if not checkout and mode != "no-checkout":
+        args.append("--no-checkout")
+    if reference is not None:
+        args.extend(["--reference", str(reference)])
+    args.extend(_config_args(dest_p))
+    _run([*args, url, str(dest_p)], cwd=dest_p.parent)
+    if mode == "sparse" and checkout:
+        run_git(["sparse-checkout", "set", *SPARSE_PATHS], cwd=dest_p)
     return dest_p
 
 
+MIRROR_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+def init_mirror(path: str | os.PathLike, public_url: str) -> None:
+    """Create an empty bare mirror whose recorded origin carries no credentials."""
+    path_p = Path(path)
+    path_p.mkdir(parents=True, exist_ok=True)
+    run_git(["init", "--quiet", "--bare"], cwd=path_p)
+    run_git(["config", "remote.origin.url", public_url], cwd=path_p)
+    run_git(["config", "gc.auto", "0"], cwd=path_p)
+
+
+def update_mirror(path: str | os.PathLike, url: str) -> None:
+    """Incrementally fetch branches and tags into a bare mirror.
+
+    The (possibly token-bearing) url is passed on the command line only; it never
+    lands in the mirror's config or FETCH_HEAD.
+    """
+    run_git(
+        ["fetch", "--quiet", "--prune", "--no-write-fetch-head", url, *MIRROR_REFSPECS],
+        cwd=path,
+    )
+
+
 def detect_default_branch(repo_dir: str | os.PathLike) -> str:
-    """Return the remote default branch name. Tries symbolic-ref, then a remote-show fallback."""
+    """Return the remote default branch name.
+
+    Reads origin/HEAD straight from the ref file, then tries symbolic-ref and a
+    remote-show fallback.
+    """
+    target = runner_for(repo_dir).symbolic_ref("refs/remotes/origin/HEAD")
+    if target and target.startswith("refs/remotes/origin/"):
+        return target.removeprefix("refs/remotes/origin/")
     try:
         out = run_git(
             ["symbolic-ref", "--short", "refs/remotes/origin/HEAD"],
@@ -93,13 +543,12 @@ def detect_default_branch(repo_dir: str | os.PathLike) -> str:
 
 def ensure_branch(repo_dir: str | os.PathLike, branch: str, *, base: str | None = None) -> None:
     """Create+checkout `branch` from `base` if it doesn't exist; otherwise checkout."""
-    try:
-        run_git(["rev-parse", "--verify", f"refs/heads/{branch}"], cwd=repo_dir, capture=True)
+    if runner_for(repo_dir).resolve(f"refs/heads/{branch}"):
         run_git(["checkout", branch], cwd=repo_dir)
-    except GitError:
-        if base:
-            run_git(["checkout", base], cwd=repo_dir)
-        run_git(["checkout", "-b", branch], cwd=repo_dir)
+        return
+    if base:
+        run_git(["checkout", base], cwd=repo_dir)
+    run_git(["checkout", "-b", branch], cwd=repo_dir)
 
 
 def checkout(repo_dir: str | os.PathLike, ref: str) -> None:
@@ -151,10 +600,165 @@ def backdated_commit(
     date_str = git_date_string(when)
     env = {"GIT_AUTHOR_DATE": date_str, "GIT_COMMITTER_DATE": date_str}
     run_git(["commit", "-m", full_msg], cwd=repo_dir, env=env)
-    sha = run_git(["rev-parse", "HEAD"], cwd=repo_dir, capture=True).strip()
+    sha = runner_for(repo_dir).resolve("HEAD")
+    if sha is None:
+        raise GitError("HEAD does not resolve after commit")
+    return sha
+
+
+def rev_parse(repo_dir: str | os.PathLike, rev: str) -> str:
+    """Resolve `rev` to a full commit SHA."""
+    sha = runner_for(repo_dir).resolve(f"{rev}^{{commit}}")
+    if sha is None:
+        raise GitError(f"{rev!r} does not name a commit")
     return sha
 
 
+def _ident(repo_dir: str | os.PathLike, var: str) -> str:
+    """Return 'Name <email>' from `git var GIT_AUTHOR_IDENT` / `GIT_COMMITTER_IDENT`."""
+    raw = run_git(["var", var], cwd=repo_dir, capture=True).strip()
+    # '<name> <email> <unix-ts> <+HHMM>': drop the trailing timestamp
+    return raw.rsplit(" ", 2)[0]
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def fast_import_commits(
+    repo_dir: str | os.PathLike,
+    ref: str,
+    specs: Sequence[CommitSpec],
+    *,
+    parent: str,
+) -> list[str]:
+    """Stream `specs` into one `git fast-import` process, chained on top of `parent`.
+
+    `ref` (e.g. 'refs/heads/main') is moved to the last commit. The working tree and
+    index are not touched. Returns the commit SHAs in schedule order.
+    """
+    if not specs:
+        return []
+    author = _ident(repo_dir, "GIT_AUTHOR_IDENT").encode("utf-8")
+    committer = _ident(repo_dir, "GIT_COMMITTER_IDENT").encode("utf-8")
+    ref_b = ref.encode("utf-8")
+
+    chunks: list[bytes] = [b"feature done\n"]
+    for mark, spec in enumerate(specs, start=1):
+        date = git_date_string(spec.when).encode("ascii")
+        msg = build_commit_message(spec.message, body=spec.body, coauthors=spec.coauthors)
+        chunks.append(b"commit %s\nmark :%d\n" % (ref_b, mark))
+        chunks.append(b"author %s %s\ncommitter %s %s\n" % (author, date, committer, date))
+        chunks.append(_data(msg.encode("utf-8")))
+        if mark == 1:
+            chunks.append(b"from %s\n" % parent.encode("ascii"))
+        chunks.append(b"M 100644 inline %s\n" % spec.file_name.encode("utf-8"))
+        chunks.append(_data(spec.file_content.encode("utf-8")))
+    chunks.append(b"done\n")
+
+    fd, marks_path = tempfile.mkstemp(prefix="gca-marks-")
+    os.close(fd)
+    try:
+        run_git(
+            ["fast-import", "--quiet", f"--export-marks={marks_path}"],
+            cwd=repo_dir,
+            input=b"".join(chunks),
+        )
+        marks: dict[int, str] = {}
+        for line in Path(marks_path).read_text(encoding="ascii").splitlines():
+            mark, _, sha = line.partition(" ")
+            marks[int(mark.lstrip(":"))] = sha
+    finally:
+        os.unlink(marks_path)
+    return [marks[i] for i in range(1, len(specs) + 1)]
+
+
+def pack_commits(
+    repo_dir: str | os.PathLike,
+    ref: str,
+    specs: Sequence[CommitSpec],
+    *,
+    parent: str,
+) -> list[str]:
+    """Build every blob, tree and commit in-process and write them as one packfile.
+
+    Only the parent's tree listing, the identities and the final ref update go through
+    git. Returns the commit SHAs in schedule order.
+    """
+    if not specs:
+        return []
+    author = _ident(repo_dir, "GIT_AUTHOR_IDENT").encode("utf-8")
+    committer = _ident(repo_dir, "GIT_COMMITTER_IDENT").encode("utf-8")
+    git_dir = Path(run_git(["rev-parse", "--absolute-git-dir"], cwd=repo_dir, capture=True).strip())
+    top_dirs = sorted({s.file_name.split("/", 1)[0] for s in specs if "/" in s.file_name})
+    root = packfile.parse_ls_tree(_run(["ls-tree", "-z", parent], cwd=repo_dir, capture=True))
+    nested: list[tuple] = []
+    if top_dirs:
+        raw = _run(["ls-tree", "-z", "-r", "-t", parent, "--", *top_dirs], cwd=repo_dir, capture=True)
+        nested = packfile.parse_ls_tree(raw)
+
+    shas: list[str] = []
+    with packfile.PackBuilder() as pack:
+        # blobs never depend on each other: hash + compress them all concurrently
+        blobs = pack.add_blobs([s.file_content.encode("utf-8") for s in specs])
+        tree = packfile.TreeBuilder(pack, root, nested)
+        prev = bytes.fromhex(parent)
+        for spec, blob in zip(specs, blobs, strict=True):
+            tree.add_file(spec.file_name, blob)
+            date = git_date_string(spec.when).encode("ascii")
+            msg = build_commit_message(spec.message, body=spec.body, coauthors=spec.coauthors)
+            prev = pack.add_commit(
+                packfile.commit_payload(
+                    tree.flush(), [prev], author + b" " + date, committer + b" " + date, msg.encode("utf-8")
+                )
+            )
+            shas.append(prev.hex())
+        pack.write(git_dir / "objects" / "pack")
+    runner_for(repo_dir).update_refs([(ref, shas[-1], None)])
+    return shas
+
+
+def write_commits(
+    repo_dir: str | os.PathLike,
+    branch: str,
+    specs: Sequence[CommitSpec],
+    *,
+    base: str | None = None,
+    engine: str = "fast-import",
+) -> list[str]:
+    """Append `specs` to `branch` with the chosen engine. Returns the new commit SHAs.
+
+    If `base` is given the branch is (re)started from that revision; otherwise commits go
+    on top of the existing branch tip.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown commit engine: {engine!r}")
+    if engine in ("fast-import", "pack"):
+        parent = rev_parse(repo_dir, base or f"refs/heads/{branch}")
+        writer = fast_import_commits if engine == "fast-import" else pack_commits
+        return writer(repo_dir, f"refs/heads/{branch}", specs, parent=parent)
+
+    if base:
+        ensure_branch(repo_dir, branch, base=base)
+    else:
+        checkout(repo_dir, branch)
+    repo_p = Path(repo_dir)
+    for parent_dir in {Path(s.file_name).parent for s in specs}:
+        (repo_p / parent_dir).mkdir(parents=True, exist_ok=True)
+    return [
+        backdated_commit(
+            repo_dir,
+            file_name=s.file_name,
+            file_content=s.file_content,
+            message=s.message,
+            when=s.when,
+            coauthors=s.coauthors,
+            body=s.body,
+        )
+        for s in specs
+    ]
+
+
 def push(repo_dir: str | os.PathLike, ref: str, *, set_upstream: bool = False) -> None:
     args = ["push"]
     if set_upstream:
@@ -164,11 +768,112 @@ def push(repo_dir: str | os.PathLike, ref: str, *, set_upstream: bool = False) -
     run_git(args, cwd=repo_dir)
 
 
+def push_refs(repo_dir: str | os.PathLike, refs: Sequence[str], *, atomic: bool = True) -> None:
+    """Send several local branches to origin in one push (one connection, one negotiation).
+
+    With `atomic` the server either accepts every ref update or none of them.
+    """
+    if not refs:
+        return
+    args = ["push", "--quiet"]
+    if atomic:
+        args.append("--atomic")
+    args.append("origin")
+    args.extend(f"refs/heads/{r}:refs/heads/{r}" for r in refs)
+    run_git(args, cwd=repo_dir)
+
+
+def ls_remote(
+    url: str, patterns: Sequence[str], *, cwd: str | os.PathLike = "."
+) -> dict[str, str]:
+    """Remote refs matching `patterns` (e.g. `refs/heads/gca/*`) as {ref: sha}, without cloning."""
+    out = run_git([*_config_args(cwd), "ls-remote", "--refs", url, *patterns], cwd=cwd, capture=True)
+    refs: dict[str, str] = {}
+    for line in out.splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref:
+            refs[ref] = sha
+    return refs
+
+
+def delete_remote_branches(
+    url: str, branches: Sequence[str], *, cwd: str | os.PathLike = "."
+) -> None:
+    """Delete `branches` on `url` with one push of `:refs/heads/<b>` refspecs.
+
+    The push is sent from an empty scratch repo under `cwd` (made on first use), so
+    nothing has to be cloned. It is not atomic: a rejected ref doesn't keep the others.
+    """
+    if not branches:
+        return
+    scratch = Path(cwd) / ".gca-scratch.git"
+    if not scratch.exists():
+        run_git(["init", "--quiet", "--bare", str(scratch)], cwd=cwd)
+    refspecs = [f":refs/heads/{b}" for b in branches]
+    run_git([*_config_args(scratch), "push", "--quiet", url, *refspecs], cwd=scratch)
+
+
+def push_commit(repo_dir: str | os.PathLike, sha: str, branch: str) -> None:
+    """Advance `origin/<branch>` to `sha`, sending only what the remote is missing."""
+    run_git(["push", "--quiet", "origin", f"{sha}:refs/heads/{branch}"], cwd=repo_dir)
+
+
+def objects_size(repo_dir: str | os.PathLike, tip: str, *, exclude: str | None = None) -> int:
+    """On-disk bytes of the objects reachable from `tip` but not from `exclude`.
+
+    A close upper bound on the pack `git push` would send for that range.
+    """
+    args = ["rev-list", "--objects", "--disk-usage", tip]
+    if exclude:
+        args.append(f"^{exclude}")
+    return int(run_git(args, cwd=repo_dir, capture=True).strip() or 0)
+
+
+def is_ancestor(
+    repo_dir: str | os.PathLike, ancestor: str, descendant: str, *, deepen: bool = False
+) -> bool:
+    """Whether `ancestor` is in `descendant`'s history.
+
+    In a shallow clone that history may be cut off above `ancestor`. With `deepen`,
+    more of origin's history is fetched (doubling the depth each time) until the
+    answer is certain: `ancestor` is found, or the clone is no longer shallow.
+    """
+    depth = DEEPEN_START
+    while True:
+        try:
+            run_git(["merge-base", "--is-ancestor", ancestor, descendant], cwd=repo_dir)
+        except GitError:
+            pass
+        else:
+            return True
+        if not deepen or not is_shallow(repo_dir):
+            return False
+        run_git(
+            ["fetch", "--quiet", "--no-write-fetch-head", f"--deepen={depth}", "origin"],
+            cwd=repo_dir,
+        )
+        depth *= 2
+
+
+def is_shallow(repo_dir: str | os.PathLike) -> bool:
+    out = run_git(["rev-parse", "--is-shallow-repository"], cwd=repo_dir, capture=True)
+    return out.strip() == "true"
+
+
 @contextmanager
-def temp_workdir(prefix: str = "gca-"):
-    """Create+cd into a tempdir that is always torn down on exit."""
+def temp_workdir(prefix: str = "gca-", *, profile: GitProfile | None = None):
+    """Create+cd into a tempdir that is always torn down on exit.
+
+    Clones made inside it, and every git call run under it, get `profile`
+    (default: `default_profile()`). Any `GitRunner` coprocesses for repos inside it
+    are shut down before the directory is removed.
+    """
     base = Path(tempfile.mkdtemp(prefix=prefix))
+    key = os.path.abspath(base)
+    _PROFILED[key] = profile or default_profile()
     try:
         yield base
     finally:
+        close_runners(key)
+        _PROFILED.pop(key, None)
         shutil.rmtree(base, ignore_errors=True)
@@ -1,32 +1,66 @@
 """Thin GitHub REST + GraphQL client.
 
 Design rules:
-- One `requests.Session` per client, consistent headers.
+- One pooled transport per client, sized to its concurrency (keep-alive, one pool
+  slot per worker), with a `requests.Session` per thread on top of it. HTTP/2 is used
+  instead when the `http2` extra (httpx) is installed and GCA_HTTP2=1.
+- Every call is written once, as a generator of I/O steps (send, sleep, wait for a
+  cache load). `GitHubClient` carries the steps out with `requests` on the calling
+  thread; `AsyncGitHubClient` with `httpx.AsyncClient` on the event loop (the `async`
+  extra). Retries, pacing, caching and errors are the same code in both.
 - `Authorization: Bearer ...` everywhere (PATs and OAuth tokens both accept Bearer).
 - `X-GitHub-Api-Version: 2022-11-28` on REST.
-- Honors `X-RateLimit-Reset` / `Retry-After` on 429.
-- Exponential backoff (3 tries: 1s, 2s, 4s) on 5xx.
+- Rate limits are paced ahead of time by a `ratelimit.RateGovernor` shared per token;
+  a 403/429 that still gets through is retried once the governor says so.
+- GETs are revalidated against `httpcache.HTTPCache` (ETag / Last-Modified); a 304
+  is answered from the cache and does not count against the primary limit.
+- Repo metadata and discussion IDs come from `metacache.MetadataCache` while fresh;
+  a 404/410 for a repo drops its entry.
+- 5xx on idempotent requests, and transport errors, are retried per `retry.RetryPolicy`
+  (decorrelated jitter, a per-run budget, a per-host circuit breaker).
 - Permanent 4xx never retried.
 - Errors raise typed exceptions; callers decide policy.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import re
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any
+from collections.abc import Callable, Generator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, TypeVar
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
+from gca import config, httpcache, metacache, ratelimit, retry
 from gca.config import api_base
+from gca.repo_spec import RepoSpec
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - optional extra
+    httpx = None  # type: ignore
 
 log = logging.getLogger("gca.github_api")
 
 USER_AGENT = "gca/2.0 (+https://github.com/sam-siavoshian/GitCommitAssistant)"
 GRAPHQL_URL = "https://api.github.com/graphql"
+PREFLIGHT_BATCH = 50  # repos per aliased preflight query
+MUTATION_BATCH = 20  # aliased mutations per request (each still counts as content creation)
+_VAR_RE = re.compile(r"\$(\w+)")
+_PUSH_PERMISSIONS = frozenset({"ADMIN", "MAINTAIN", "WRITE"})
 DEFAULT_TIMEOUT = 30
-RATE_SLEEP_CAP = 300  # never sleep more than 5 min waiting for rate-limit reset
+RATE_SLEEP_CAP = ratelimit.RATE_SLEEP_CAP
+_REPO_PATH_RE = re.compile(r"/repos/([^/?]+)/([^/?]+)")
+
+T = TypeVar("T")
 
 
 class GitHubError(RuntimeError):
@@ -56,72 +90,361 @@ class DiscussionCategoryError(GitHubError):
     pass
 
 
+class GitHubUnavailable(GitHubError):
+    """GitHub kept failing; the circuit breaker is failing requests fast."""
+
+
 @dataclass
 class RepoRef:
     owner: str
     name: str
     default_branch: str
+    size_kb: int | None = None  # GitHub's `size` field (KB); None when unknown
+    # merge buttons; None when unknown (GitHub only shows them to tokens that can push)
+    allow_merge_commit: bool | None = None
+    allow_squash_merge: bool | None = None
+    allow_rebase_merge: bool | None = None
+    # default-branch protection hints from preflight; None when unknown
+    branch_protected: bool | None = None
+    requires_linear_history: bool | None = None
+    required_reviews: int | None = None
 
     @property
     def full(self) -> str:
         return f"{self.owner}/{self.name}"
 
+    def allows(self, method: str) -> bool | None:
+        """Whether PRs can be merged with `method` (merge | squash | rebase); None: unknown."""
+        if method == "merge" and self.requires_linear_history:
+            return False
+        return {
+            "merge": self.allow_merge_commit,
+            "squash": self.allow_squash_merge,
+            "rebase": self.allow_rebase_merge,
+        }[method]
+
+
+@dataclass
+class RepoCheck:
+    """What the batched preflight learned about one repo; `problem` set means skip it."""
+
+    repo: RepoRef
+    node_id: str = ""
+    archived: bool = False
+    disabled: bool = False
+    permission: str = ""  # viewerPermission: ADMIN, MAINTAIN, WRITE, TRIAGE, READ
+    can_push: bool = False
+    discussion: tuple[str, str, str] | None = None  # (repository_id, category_id, name)
+    problem: str | None = None
+
+
+@dataclass
+class PullRef:
+    """One PR as listed by `list_pull_requests`."""
+
+    number: int
+    head: str  # branch name in the repo itself
+    node_id: str
+    state: str  # open | closed
+    merged: bool
+    head_sha: str = ""
+
+
+# ---- I/O steps ----
+# A client call is a generator that yields these and gets the outcome sent back in;
+# `_run` on each client carries them out.
+
+
+@dataclass(frozen=True)
+class _Send:
+    """Send a request; the driver sends back the `requests.Response`, or throws the
+    `requests.RequestException` it failed with."""
+
+    method: str
+    url: str
+    kwargs: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Sleep:
+    seconds: float
+
+
+@dataclass(frozen=True)
+class _Await:
+    """Wait for another caller's metadata load (`metacache.Flight.done`) to finish."""
+
+    event: threading.Event
+
+
+_Steps = Generator["_Send | _Sleep | _Await", Any, T]
+
+
+def _requests_error(e: Exception, request: Any = None) -> requests.RequestException:
+    """The `requests` exception an httpx transport error stands for, as the retry policy reads them."""
+    if isinstance(e, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(str(e), request=request)
+    if isinstance(e, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(e), request=request)
+    return requests.exceptions.ConnectionError(str(e), request=request)
+
+
+def _from_httpx(r: httpx.Response, request: Any = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = r.status_code
+    resp.reason = r.reason_phrase
+    resp.headers = CaseInsensitiveDict(r.headers)
+    resp._content = r.content
+    resp.encoding = r.encoding
+    resp.url = str(r.url)
+    resp.request = request
+    return resp
+
+
+class _HTTP2Adapter(BaseAdapter):
+    """Transport adapter that sends `requests` traffic through one multiplexed `httpx.Client`."""
+
+    def __init__(self, max_connections: int):
+        super().__init__()
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            r = self._client.request(
+                request.method,
+                request.url,
+                headers=dict(request.headers),
+                content=request.body,
+                timeout=timeout,
+            )
+        except httpx.TransportError as e:
+            raise _requests_error(e, request) from e
+        resp = _from_httpx(r, request)
+        resp.connection = self
+        return resp
+
+    def close(self) -> None:
+        self._client.close()
+
 
-class GitHubClient:
-    def __init__(self, token: str, *, base_url: str | None = None, timeout: int = DEFAULT_TIMEOUT):
+def _make_adapter(concurrency: int, http2: bool) -> BaseAdapter:
+    if http2:
+        if httpx is not None:
+            try:
+                return _HTTP2Adapter(concurrency)
+            except ImportError as e:  # httpx without the h2 package
+                log.warning("HTTP/2 unavailable (%s); using HTTP/1.1", e)
+        else:
+            log.warning("HTTP/2 needs the `http2` extra (pip install 'gca[http2]'); using HTTP/1.1")
+    # keep-alive pool with one slot per worker; retries are ours, not urllib3's
+    return HTTPAdapter(pool_connections=4, pool_maxsize=concurrency, max_retries=0)
+
+
+class _GitHubCore:
+    """What both clients share: settings, caches, and every call as a generator of steps.
+
+    `_<name>` implements public call `<name>`; the clients only differ in how they
+    carry the steps out.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        base_url: str | None = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        governor: ratelimit.RateGovernor | None = None,
+        http_cache: httpcache.HTTPCache | bool = True,
+        metadata_cache: metacache.MetadataCache | bool = True,
+        concurrency: int | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
+    ):
         if not token:
             raise GitHubAuthError("missing GitHub token")
         self.token = token
+        self.governor = governor or ratelimit.shared_governor(token)
+        self.retry = retry_policy or retry.RetryPolicy()
+        # True: the shared on-disk cache (unless disabled by env); False: no caching
+        self.http_cache: httpcache.HTTPCache | None = (
+            (httpcache.default_cache() if http_cache else None)
+            if isinstance(http_cache, bool)
+            else http_cache
+        )
+        self.metadata: metacache.MetadataCache | None = (
+            (metacache.default_cache(ratelimit.token_key(token)) if metadata_cache else None)
+            if isinstance(metadata_cache, bool)
+            else metadata_cache
+        )
         self.base = (base_url or api_base()).rstrip("/")
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json",
-                "X-GitHub-Api-Version": "2022-11-28",
-                "User-Agent": USER_AGENT,
-            }
-        )
+        self.concurrency = concurrency or config.http_concurrency()
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": USER_AGENT,
+        }
         self._username: str | None = None
         self._primary_email: str | None = None
-        self._scopes: set[str] | None = None
+        self._oauth_scopes: set[str] | None = None
 
     # ---- low-level ----
 
-    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+    def _ping(self) -> _Steps[dict | None]:
+        """One warm-up GET /rate_limit; its reply, or None when it failed."""
+        try:
+            resp = yield from self._request("GET", "/rate_limit")
+            return resp.json() if resp.status_code == 200 else None
+        except (requests.RequestException, GitHubError, ValueError) as e:
+            log.debug("connection warm-up failed: %s", e)
+            return None
+
+    def _seed(self, replies: Sequence[dict | None]) -> bool:
+        replies = [r for r in replies if r]
+        for reply in replies:
+            resources = reply.get("resources")
+            if isinstance(resources, dict):
+                self.governor.seed(resources)
+        return bool(replies)
+
+    def _request(self, method: str, url: str, **kwargs) -> _Steps[requests.Response]:
         """Send with retries. URL may be relative ('/user') or absolute."""
         if url.startswith("/"):
             url = f"{self.base}{url}"
         kwargs.setdefault("timeout", self.timeout)
+        cache_key = cached = None
+        if method == "GET" and self.http_cache is not None:
+            cache_key = httpcache.cache_key(ratelimit.token_key(self.token), url)
+            cached = self.http_cache.get(cache_key)
+            if cached is not None:
+                kwargs["headers"] = {**cached.validators(), **(kwargs.get("headers") or {})}
+        host = urlsplit(url).netloc
+        payload = kwargs.get("json")
+        policy = self.retry
         last: requests.Response | None = None
-        for attempt in range(4):
-            resp = self.session.request(method, url, **kwargs)
+        pause = 0.0
+        for attempt in range(policy.max_attempts):
+            wait = policy.blocked_for(host)
+            if wait:
+                raise GitHubUnavailable(
+                    f"{host} is failing repeatedly; not retrying for another {wait:.0f}s"
+                )
+            wait = self.governor.reserve(method, url, payload)
+            if wait > 0:
+                yield _Sleep(wait)
+            try:
+                resp = yield _Send(method, url, kwargs)
+            except requests.RequestException as e:
+                policy.count(transport_error=True)
+                policy.record(host, ok=False)
+                if not (policy.retriable_error(e, method, url, payload) and policy.spend(attempt)):
+                    raise
+                pause = policy.delay(attempt, pause)
+                log.debug("%s %s failed (%s); retrying in %.1fs", method, url, e, pause)
+                policy.slept(pause)
+                yield _Sleep(pause)
+                continue
+            self.governor.after(resp.status_code, resp.headers, url)
+            if cache_key is not None:
+                resp = self._through_cache(cache_key, cached, resp)
+            if resp.status_code in (404, 410):
+                self._forget_repo_of(url)
             last = resp
-            # Rate limit primary: x-ratelimit-remaining = 0
+            server_error = resp.status_code >= 500
+            policy.record(host, ok=not server_error)
+            # Primary limit exhausted (remaining = 0), or a secondary limit (429, or
+            # 403 + Retry-After): the governor now holds the next attempt back.
             remaining = resp.headers.get("x-ratelimit-remaining")
-            if resp.status_code in (403, 429) and remaining == "0":
-                self._sleep_for_reset(resp)
+            if resp.status_code in (403, 429) and (
+                remaining == "0" or resp.status_code == 429 or "retry-after" in resp.headers
+            ):
+                policy.count(rate_limited=True)
                 continue
-            if resp.status_code == 429:
-                retry_after = float(resp.headers.get("retry-after", "2"))
-                time.sleep(min(retry_after, RATE_SLEEP_CAP))
-                continue
-            if 500 <= resp.status_code < 600 and attempt < 3:
-                time.sleep(2**attempt)
+            policy.count(server_error=server_error)
+            # a 5xx may come after GitHub acted on the request: only re-send what is
+            # safe to repeat (a mutation batch would otherwise be created twice)
+            if (
+                server_error
+                and retry.is_idempotent(method, url, payload)
+                and policy.spend(attempt)
+            ):
+                pause = policy.delay(attempt, pause, retry.retry_after(resp.headers))
+                log.debug("%s %s: HTTP %s; retrying in %.1fs", method, url, resp.status_code, pause)
+                policy.slept(pause)
+                yield _Sleep(pause)
                 continue
             return resp
         assert last is not None
         return last
 
-    @staticmethod
-    def _sleep_for_reset(resp: requests.Response) -> None:
-        reset = resp.headers.get("x-ratelimit-reset")
-        if reset and reset.isdigit():
-            wait = max(0, int(reset) - int(time.time())) + 1
-            time.sleep(min(wait, RATE_SLEEP_CAP))
-        else:
-            time.sleep(2)
+    def _cached(self, kind: str, repo: str, load: Callable[[], _Steps[Any]]) -> _Steps[Any]:
+        """`load()`'s value through the metadata cache, with one load per entry at a time."""
+        if self.metadata is None:
+            return (yield from load())
+        value, flight, leader = self.metadata.claim(kind, repo)
+        if flight is None:
+            return value
+        if not leader:
+            yield _Await(flight.done)
+            return flight.result()
+        try:
+            value = yield from load()
+        except BaseException as e:
+            if isinstance(e, GeneratorExit):  # the call was abandoned; waiters look again
+                e = GitHubError(f"{kind} lookup for {repo} was cancelled")
+            self.metadata.settle(kind, repo, flight, error=e)
+            raise
+        self.metadata.settle(kind, repo, flight, value=value)
+        return value
+
+    def _forget_repo_of(self, url: str) -> None:
+        m = _REPO_PATH_RE.search(url)
+        if m and self.metadata is not None:
+            self.forget_repo(f"{m.group(1)}/{m.group(2)}")
+
+    def forget_repo(self, full_name: str) -> None:
+        """Drop cached metadata for `owner/name` (it moved, vanished, or went stale)."""
+        if self.metadata is not None:
+            log.debug("dropping cached metadata for %s", full_name)
+            self.metadata.invalidate(full_name)
+
+    def _through_cache(
+        self, key: str, cached: httpcache.CachedResponse | None, resp: requests.Response
+    ) -> requests.Response:
+        """Answer a 304 from the cache; remember cacheable 200s."""
+        assert self.http_cache is not None
+        if resp.status_code == 304 and cached is not None:
+            self.http_cache.record(True, resp.url)
+            self.http_cache.touch(key)
+            hit = requests.Response()
+            hit.status_code = cached.status
+            hit._content = cached.body
+            hit.headers.update(cached.headers)
+            # fresh rate-limit state from the 304 beats what was stored
+            hit.headers.update({k: v for k, v in resp.headers.items() if k.lower().startswith("x-ratelimit")})
+            hit.url, hit.request, hit.encoding = resp.url, resp.request, "utf-8"
+            return hit
+        if resp.status_code >= 500 or resp.status_code in (403, 429):
+            return resp  # retried; don't count the attempt
+        self.http_cache.record(False, resp.url)
+        etag, modified = resp.headers.get("etag"), resp.headers.get("last-modified")
+        if resp.status_code == 200 and (etag or modified):
+            self.http_cache.put(
+                key,
+                etag=etag,
+                last_modified=modified,
+                status=resp.status_code,
+                headers=dict(resp.headers),
+                body=resp.content,
+            )
+        return resp
 
     def _check(self, resp: requests.Response, *, allow_404: bool = False) -> Any:
         if resp.status_code == 404 and allow_404:
@@ -160,26 +483,26 @@ class GitHubClient:
 
     # ---- identity / scopes ----
 
-    def whoami(self) -> str:
+    def _whoami(self) -> _Steps[str]:
         if self._username:
             return self._username
-        resp = self._request("GET", "/user")
+        resp = yield from self._request("GET", "/user")
         data = self._check(resp)
         self._username = data["login"]
         # cache scopes from headers
         scopes = resp.headers.get("x-oauth-scopes", "")
-        self._scopes = {s.strip() for s in scopes.split(",") if s.strip()}
+        self._oauth_scopes = {s.strip() for s in scopes.split(",") if s.strip()}
         return self._username
 
-    def scopes(self) -> set[str]:
-        if self._scopes is None:
-            self.whoami()
-        return self._scopes or set()
+    def _scopes(self) -> _Steps[set[str]]:
+        if self._oauth_scopes is None:
+            yield from self._whoami()
+        return self._oauth_scopes or set()
 
-    def primary_verified_email(self) -> str | None:
+    def _primary_verified_email(self) -> _Steps[str | None]:
         if self._primary_email:
             return self._primary_email
-        resp = self._request("GET", "/user/emails")
+        resp = yield from self._request("GET", "/user/emails")
         if resp.status_code == 404:
             return None
         try:
@@ -194,31 +517,206 @@ class GitHubClient:
 
     # ---- repos ----
 
-    def get_repo(self, owner: str, repo: str) -> RepoRef:
-        data = self._check(self._request("GET", f"/repos/{owner}/{repo}"))
-        return RepoRef(owner=data["owner"]["login"], name=data["name"], default_branch=data["default_branch"])
+    def _get_repo(self, owner: str, repo: str) -> _Steps[RepoRef]:
+        def load() -> _Steps[dict]:
+            data = self._check((yield from self._request("GET", f"/repos/{owner}/{repo}")))
+            return asdict(self._repo_ref(data))
 
-    def create_repo(self, name: str, *, private: bool = True, description: str = "") -> RepoRef:
+        return RepoRef(**(yield from self._cached("repo", f"{owner}/{repo}", load)))
+
+    @staticmethod
+    def _repo_ref(data: dict) -> RepoRef:
+        return RepoRef(
+            owner=data["owner"]["login"],
+            name=data["name"],
+            default_branch=data["default_branch"],
+            size_kb=data.get("size"),
+            allow_merge_commit=data.get("allow_merge_commit"),
+            allow_squash_merge=data.get("allow_squash_merge"),
+            allow_rebase_merge=data.get("allow_rebase_merge"),
+        )
+
+    def _create_repo(self, name: str, *, private: bool, description: str) -> _Steps[RepoRef]:
         payload = {"name": name, "auto_init": True, "private": private, "description": description}
-        resp = self._request("POST", "/user/repos", json=payload)
+        resp = yield from self._request("POST", "/user/repos", json=payload)
         if resp.status_code == 422:
             # already exists
-            owner = self.whoami()
-            return self.get_repo(owner, name)
+            owner = yield from self._whoami()
+            return (yield from self._get_repo(owner, name))
         data = self._check(resp)
-        return RepoRef(owner=data["owner"]["login"], name=data["name"], default_branch=data["default_branch"])
+        return self._repo_ref(data)
 
-    def delete_repo(self, owner: str, repo: str) -> None:
-        resp = self._request("DELETE", f"/repos/{owner}/{repo}")
+    def _delete_repo(self, owner: str, repo: str) -> _Steps[None]:
+        resp = yield from self._request("DELETE", f"/repos/{owner}/{repo}")
         self._check(resp, allow_404=True)
 
+    # ---- preflight ----
+
+    _F_PREFLIGHT = """
+    fragment Preflight on Repository {
+      id name owner { login } diskUsage
+      defaultBranchRef { name refUpdateRule { requiresLinearHistory requiredApprovingReviewCount } }
+      isArchived isDisabled viewerPermission
+      mergeCommitAllowed squashMergeAllowed rebaseMergeAllowed
+    }
+    """
+
+    _F_PREFLIGHT_DISCUSSIONS = """
+    fragment Discussions on Repository {
+      hasDiscussionsEnabled
+      discussionCategories(first: 25) { nodes { id name slug isAnswerable } }
+    }
+    """
+
+    def _preflight(
+        self,
+        repos: Sequence[RepoSpec | RepoRef],
+        *,
+        need_push: bool,
+        discussions: bool,
+        batch: int,
+    ) -> _Steps[dict[str, RepoCheck]]:
+        out: dict[str, RepoCheck] = {}
+        todo = []
+        for r in {r.full: r for r in repos}.values():
+            cached = self._cached_check(r, need_push=need_push, discussions=discussions)
+            if cached is not None:
+                out[r.full] = cached
+            else:
+                todo.append(r)
+        queries = 0
+        for start in range(0, len(todo), batch):
+            chunk = todo[start : start + batch]
+            decls, fields, variables = [], [], {}
+            for i, r in enumerate(chunk):
+                decls.append(f"$o{i}: String!, $n{i}: String!")
+                spread = "...Preflight ...Discussions" if discussions else "...Preflight"
+                fields.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {spread} }}")
+                variables[f"o{i}"], variables[f"n{i}"] = r.owner, r.name
+            query = (
+                f"query({', '.join(decls)}) {{\n  " + "\n  ".join(fields) + "\n}\n"
+                + self._F_PREFLIGHT
+                + (self._F_PREFLIGHT_DISCUSSIONS if discussions else "")
+            )
+            data, errors = yield from self._graphql_partial(query, variables)
+            queries += 1
+            failed = {
+                str(e["path"][0]): e.get("message", "inaccessible") for e in errors if e.get("path")
+            }
+            for i, r in enumerate(chunk):
+                out[r.full] = self._check_repo(
+                    r, data.get(f"r{i}"), failed.get(f"r{i}"), need_push=need_push, discussions=discussions
+                )
+        bad = sum(1 for c in out.values() if c.problem)
+        log.info(
+            "preflight: %d repos checked (%d cached) in %d queries, %d unusable",
+            len(out),
+            len(out) - len(todo),
+            queries,
+            bad,
+        )
+        return out
+
+    def _cached_check(
+        self, r: RepoSpec | RepoRef, *, need_push: bool, discussions: bool
+    ) -> RepoCheck | None:
+        """A fresh cached check that passes as-is, else None (query it).
+
+        Cached entries never fail a repo: one that would have a problem now (say, push
+        access was missing last time) is checked again.
+        """
+        if self.metadata is None:
+            return None
+        entry = self.metadata.get("preflight", r.full)
+        if entry is None or (discussions and not entry.get("discussion")):
+            return None
+        try:
+            check = RepoCheck(
+                repo=RepoRef(**entry["repo"]),
+                node_id=entry["node_id"],
+                archived=entry["archived"],
+                disabled=entry["disabled"],
+                permission=entry["permission"],
+                can_push=entry["permission"] in _PUSH_PERMISSIONS,
+                discussion=tuple(entry["discussion"]) if entry.get("discussion") else None,
+            )
+        except (KeyError, TypeError):
+            return None  # written by an older version
+        self._judge(check, r.full, need_push=need_push)
+        return None if check.problem else check
+
+    @staticmethod
+    def _judge(check: RepoCheck, full: str, *, need_push: bool) -> None:
+        if check.archived:
+            check.problem = f"{full} is archived (read-only)"
+        elif check.disabled:
+            check.problem = f"{full} is disabled"
+        elif need_push and not check.can_push:
+            check.problem = f"{full}: token can't push (permission {check.permission})"
+        elif need_push and not check.repo.default_branch:
+            check.problem = f"{full} is empty (no default branch)"
+
+    def _check_repo(
+        self, r: RepoSpec | RepoRef, node: dict | None, error: str | None, *, need_push: bool, discussions: bool
+    ) -> RepoCheck:
+        if not node:
+            return RepoCheck(
+                repo=RepoRef(r.owner, r.name, ""),
+                problem=f"{r.full}: {error or 'not found, or not visible to this token'}",
+            )
+        branch = node.get("defaultBranchRef") or {}
+        rule = branch.get("refUpdateRule")  # null when the branch is unprotected
+        known = bool(branch)  # an empty repo has no branch to protect
+        ref = RepoRef(
+            owner=node["owner"]["login"],
+            name=node["name"],
+            default_branch=branch.get("name") or "",
+            size_kb=node.get("diskUsage"),
+            allow_merge_commit=node.get("mergeCommitAllowed"),
+            allow_squash_merge=node.get("squashMergeAllowed"),
+            allow_rebase_merge=node.get("rebaseMergeAllowed"),
+            branch_protected=rule is not None if known else None,
+            requires_linear_history=bool(rule and rule.get("requiresLinearHistory")) if known else None,
+            required_reviews=((rule or {}).get("requiredApprovingReviewCount") or 0) if known else None,
+        )
+        check = RepoCheck(
+            repo=ref,
+            node_id=node["id"],
+            archived=bool(node.get("isArchived")),
+            disabled=bool(node.get("isDisabled")),
+            permission=node.get("viewerPermission") or "",
+            can_push=node.get("viewerPermission") in _PUSH_PERMISSIONS,
+        )
+        self._judge(check, r.full, need_push=need_push)
+        if discussions:
+            try:
+                check.discussion = self._pick_qa_category(r.full, node)
+            except DiscussionCategoryError as e:
+                check.problem = check.problem or str(e)
+        if self.metadata is not None and ref.default_branch:
+            self.metadata.put("repo", ref.full, asdict(ref))
+            if check.discussion:
+                self.metadata.put("discussion", ref.full, list(check.discussion))
+            entry = {
+                "repo": asdict(ref),
+                "node_id": check.node_id,
+                "archived": check.archived,
+                "disabled": check.disabled,
+                "permission": check.permission,
+                "discussion": list(check.discussion) if check.discussion else None,
+            }
+            if r.full.lower() != ref.full.lower():
+                self.metadata.put("preflight", r.full, entry)  # renamed: keep the name asked for
+            self.metadata.put("preflight", ref.full, entry)
+        return check
+
     # ---- pull requests ----
 
-    def create_pull_request(
-        self, repo: RepoRef, *, head: str, title: str, body: str = "", base: str | None = None
-    ) -> int:
+    def _create_pull_request(
+        self, repo: RepoRef, *, head: str, title: str, body: str, base: str | None
+    ) -> _Steps[int]:
         payload = {"title": title, "body": body, "head": head, "base": base or repo.default_branch}
-        resp = self._request("POST", f"/repos/{repo.full}/pulls", json=payload)
+        resp = yield from self._request("POST", f"/repos/{repo.full}/pulls", json=payload)
         if resp.status_code == 422:
             data = resp.json() if resp.content else {}
             msg = self._msg(data)
@@ -228,13 +726,11 @@ class GitHubClient:
         data = self._check(resp)
         return int(data["number"])
 
-    def merge_pull_request(
-        self, repo: RepoRef, number: int, *, method: str = "squash"
-    ) -> bool:
+    def _merge_pull_request(self, repo: RepoRef, number: int, *, method: str) -> _Steps[bool]:
         if method not in ("merge", "squash", "rebase"):
             raise ValueError(f"invalid merge method: {method!r}")
         payload = {"merge_method": method}
-        resp = self._request("PUT", f"/repos/{repo.full}/pulls/{number}/merge", json=payload)
+        resp = yield from self._request("PUT", f"/repos/{repo.full}/pulls/{number}/merge", json=payload)
         if resp.status_code == 405:
             data = resp.json() if resp.content else {}
             raise MergeBlockedError(self._msg(data), status=405, body=data)
@@ -244,35 +740,178 @@ class GitHubClient:
         self._check(resp)
         return True
 
-    def close_pull_request(self, repo: RepoRef, number: int) -> None:
-        resp = self._request("PATCH", f"/repos/{repo.full}/pulls/{number}", json={"state": "closed"})
+    def _create_pull_requests(
+        self,
+        repository_id: str,
+        base: str,
+        pulls: Sequence[tuple[str, str, str]],
+    ) -> _Steps[list[tuple[int, str] | GitHubError]]:
+        out = yield from self._graphql_batch(
+            "createPullRequest(input: {repositoryId: $repositoryId, baseRefName: $base, "
+            "headRefName: $head, title: $title, body: $body}) { pullRequest { id number } }",
+            {"repositoryId": "ID!", "base": "String!", "head": "String!", "title": "String!", "body": "String!"},
+            [
+                {"repositoryId": repository_id, "base": base, "head": h, "title": t, "body": b}
+                for h, t, b in pulls
+            ],
+        )
+        results: list[tuple[int, str] | GitHubError] = []
+        for r in out:
+            if isinstance(r, GitHubError):
+                if "already exists" in str(r).lower():
+                    r = PRExistsError(str(r), status=r.status, body=r.body)
+                results.append(r)
+            else:
+                results.append((int(r["pullRequest"]["number"]), r["pullRequest"]["id"]))
+        return results
+
+    def _merge_pull_requests(
+        self, pull_request_ids: Sequence[str], *, method: str
+    ) -> _Steps[list[GitHubError | None]]:
+        if method not in ("merge", "squash", "rebase"):
+            raise ValueError(f"invalid merge method: {method!r}")
+        out = yield from self._graphql_batch(
+            "mergePullRequest(input: {pullRequestId: $id, mergeMethod: $method}) { pullRequest { merged } }",
+            {"id": "ID!", "method": "PullRequestMergeMethod!"},
+            [{"id": i, "method": method.upper()} for i in pull_request_ids],
+        )
+        results: list[GitHubError | None] = []
+        for r in out:
+            if isinstance(r, GitHubError):
+                errors = r.body.get("errors", []) if isinstance(r.body, dict) else []
+                if any(e.get("type") == "UNPROCESSABLE" for e in errors):
+                    r = MergeBlockedError(str(r), status=r.status, body=r.body)
+                results.append(r)
+            else:
+                results.append(None)
+        return results
+
+    def _pull_requests_merged(self, repo: RepoRef, numbers: Sequence[int]) -> _Steps[dict[int, bool]]:
+        out = yield from self._graphql_batch(
+            "repository(owner: $owner, name: $name) { pullRequest(number: $number) { merged } }",
+            {"owner": "String!", "name": "String!", "number": "Int!"},
+            [{"owner": repo.owner, "name": repo.name, "number": n} for n in numbers],
+            mutation=False,
+            batch=PREFLIGHT_BATCH,
+        )
+        return {
+            n: not isinstance(r, GitHubError) and bool((r.get("pullRequest") or {}).get("merged"))
+            for n, r in zip(numbers, out, strict=True)
+        }
+
+    def _list_pull_requests(
+        self, repo: RepoRef, *, state: str, head_prefix: str
+    ) -> _Steps[list[PullRef]]:
+        url: str | None = f"/repos/{repo.full}/pulls?state={state}&per_page=100"
+        pulls: list[PullRef] = []
+        while url:
+            resp = yield from self._request("GET", url)
+            for p in self._check(resp) or []:
+                head = p.get("head") or {}
+                same_repo = ((head.get("repo") or {}).get("full_name") or "").lower() == repo.full.lower()
+                if same_repo and head.get("ref", "").startswith(head_prefix):
+                    pulls.append(
+                        PullRef(
+                            number=int(p["number"]),
+                            head=head["ref"],
+                            node_id=p.get("node_id", ""),
+                            state=p.get("state", ""),
+                            merged=bool(p.get("merged_at")),
+                            head_sha=head.get("sha", ""),
+                        )
+                    )
+            url = resp.links.get("next", {}).get("url")
+        return pulls
+
+    def _pull_requests_mergeable(self, repo: RepoRef, numbers: Sequence[int]) -> _Steps[dict[int, str]]:
+        out = yield from self._graphql_batch(
+            "repository(owner: $owner, name: $name) { pullRequest(number: $number) { mergeable } }",
+            {"owner": "String!", "name": "String!", "number": "Int!"},
+            [{"owner": repo.owner, "name": repo.name, "number": n} for n in numbers],
+            mutation=False,
+            batch=PREFLIGHT_BATCH,
+        )
+        return {
+            n: "UNKNOWN" if isinstance(r, GitHubError) else (r.get("pullRequest") or {}).get("mergeable") or "UNKNOWN"
+            for n, r in zip(numbers, out, strict=True)
+        }
+
+    def _close_pull_request(self, repo: RepoRef, number: int) -> _Steps[None]:
+        resp = yield from self._request("PATCH", f"/repos/{repo.full}/pulls/{number}", json={"state": "closed"})
         self._check(resp)
 
     # ---- issues (for Quickdraw) ----
 
-    def create_issue(self, repo: RepoRef, *, title: str, body: str = "") -> int:
-        resp = self._request("POST", f"/repos/{repo.full}/issues", json={"title": title, "body": body})
+    def _create_issue(self, repo: RepoRef, *, title: str, body: str) -> _Steps[int]:
+        resp = yield from self._request("POST", f"/repos/{repo.full}/issues", json={"title": title, "body": body})
         data = self._check(resp)
         return int(data["number"])
 
-    def close_issue(self, repo: RepoRef, number: int) -> None:
-        resp = self._request("PATCH", f"/repos/{repo.full}/issues/{number}", json={"state": "closed"})
+    def _close_issue(self, repo: RepoRef, number: int) -> _Steps[None]:
+        resp = yield from self._request("PATCH", f"/repos/{repo.full}/issues/{number}", json={"state": "closed"})
         self._check(resp)
 
     # ---- GraphQL ----
 
-    def graphql(self, query: str, variables: dict | None = None) -> dict:
-        resp = self._request(
+    def _graphql(self, query: str, variables: dict | None) -> _Steps[dict]:
+        data, errors = yield from self._graphql_partial(query, variables)
+        if errors:
+            kind = GitHubNotFound if any(e.get("type") == "NOT_FOUND" for e in errors) else GitHubError
+            raise kind(f"graphql errors: {errors}", status=200, body={"data": data, "errors": errors})
+        return data
+
+    def _graphql_partial(self, query: str, variables: dict | None) -> _Steps[tuple[dict, list[dict]]]:
+        resp = yield from self._request(
             "POST",
             GRAPHQL_URL,
             json={"query": query, "variables": variables or {}},
         )
         if resp.status_code >= 400:
             raise GitHubError(f"graphql HTTP {resp.status_code}: {resp.text[:300]}", status=resp.status_code)
-        data = resp.json()
-        if data.get("errors"):
-            raise GitHubError(f"graphql errors: {data['errors']}", status=resp.status_code, body=data)
-        return data["data"]
+        body = resp.json()
+        errors = body.get("errors") or []
+        if body.get("data") is None:
+            raise GitHubError(f"graphql errors: {errors}", status=resp.status_code, body=body)
+        return body["data"], errors
+
+    def _graphql_batch(
+        self,
+        field: str,
+        var_types: dict[str, str],
+        items: Sequence[dict],
+        *,
+        mutation: bool = True,
+        batch: int = MUTATION_BATCH,
+    ) -> _Steps[list[Any]]:
+        results: list[Any] = []
+        for start in range(0, len(items), batch):
+            chunk = items[start : start + batch]
+            decls, fields, variables = [], [], {}
+            for i, item in enumerate(chunk):
+                decls += [f"${name}_{i}: {kind}" for name, kind in var_types.items()]
+                fields.append(f"m{i}: " + _VAR_RE.sub(lambda m, i=i: f"${m.group(1)}_{i}", field))
+                variables.update({f"{name}_{i}": item[name] for name in var_types})
+            op = "mutation" if mutation else "query"
+            query = f"{op}({', '.join(decls)}) {{\n  " + "\n  ".join(fields) + "\n}"
+            try:
+                data, errors = yield from self._graphql_partial(query, variables)
+            except GitHubError as e:
+                results += [e] * len(chunk)
+                continue
+            failed: dict[str, list[dict]] = {}
+            for err in errors:
+                alias = str((err.get("path") or ["?"])[0])
+                failed.setdefault(alias, []).append(err)
+            for i in range(len(chunk)):
+                errs = failed.get(f"m{i}")
+                value = data.get(f"m{i}")
+                if errs or value is None:
+                    errs = errs or errors or [{"message": "no data returned"}]
+                    kind = GitHubNotFound if any(e.get("type") == "NOT_FOUND" for e in errs) else GitHubError
+                    results.append(kind(f"graphql errors: {errs}", status=200, body={"errors": errs}))
+                else:
+                    results.append(value)
+        return results
 
     # ---- discussions ----
 
@@ -311,17 +950,19 @@ class GitHubClient:
     }
     """
 
-    def find_repo_and_qa_category(self, repo: RepoRef) -> tuple[str, str, str]:
-        """Return (repository_id, category_id, category_name).
+    def _find_repo_and_qa_category(self, repo: RepoRef) -> _Steps[tuple[str, str, str]]:
+        def load() -> _Steps[list[str]]:
+            data = yield from self._graphql(self._Q_REPO_AND_CATS, {"owner": repo.owner, "name": repo.name})
+            return list(self._pick_qa_category(repo.full, data.get("repository")))
 
-        Prefers a category whose slug is 'q-a'. Falls back to any isAnswerable category.
-        Raises DiscussionCategoryError if Discussions are off or no answerable category exists.
-        """
-        data = self.graphql(self._Q_REPO_AND_CATS, {"owner": repo.owner, "name": repo.name})
-        repo_node = data.get("repository")
-        if not repo_node:
+        found = yield from self._cached("discussion", repo.full, load)
+        return found[0], found[1], found[2]
+
+    @staticmethod
+    def _pick_qa_category(full_name: str, repo_node: dict | None) -> tuple[str, str, str]:
+        if not repo_node or repo_node.get("hasDiscussionsEnabled") is False:
             raise DiscussionCategoryError(
-                f"discussions appear to be disabled on {repo.full}. Enable in repo Settings > Features."
+                f"discussions appear to be disabled on {full_name}. Enable in repo Settings > Features."
             )
         cats = (repo_node.get("discussionCategories") or {}).get("nodes") or []
         # exact 'q-a' slug first
@@ -332,19 +973,546 @@ class GitHubClient:
             if c.get("isAnswerable"):
                 return repo_node["id"], c["id"], c["name"]
         raise DiscussionCategoryError(
-            f"{repo.full} has no answerable discussion category. Enable Discussions and add a Q&A category."
+            f"{full_name} has no answerable discussion category. Enable Discussions and add a Q&A category."
         )
 
-    def create_discussion(self, repository_id: str, category_id: str, title: str, body: str) -> dict:
-        data = self.graphql(
+    def _create_discussion(self, repository_id: str, category_id: str, title: str, body: str) -> _Steps[dict]:
+        data = yield from self._graphql(
             self._M_CREATE_DISCUSSION,
             {"repositoryId": repository_id, "categoryId": category_id, "title": title, "body": body},
         )
         return data["createDiscussion"]["discussion"]
 
-    def add_discussion_comment(self, discussion_id: str, body: str) -> str:
-        data = self.graphql(self._M_ADD_COMMENT, {"discussionId": discussion_id, "body": body})
+    def _add_discussion_comment(self, discussion_id: str, body: str) -> _Steps[str]:
+        data = yield from self._graphql(self._M_ADD_COMMENT, {"discussionId": discussion_id, "body": body})
         return data["addDiscussionComment"]["comment"]["id"]
 
+    def _mark_comment_as_answer(self, comment_id: str) -> _Steps[None]:
+        yield from self._graphql(self._M_MARK_ANSWER, {"id": comment_id})
+
+    def _create_discussions(
+        self, repository_id: str, category_id: str, posts: Sequence[tuple[str, str]]
+    ) -> _Steps[list[dict | GitHubError]]:
+        out = yield from self._graphql_batch(
+            "createDiscussion(input: {repositoryId: $repositoryId, categoryId: $categoryId, "
+            "title: $title, body: $body}) { discussion { id number url } }",
+            {"repositoryId": "ID!", "categoryId": "ID!", "title": "String!", "body": "String!"},
+            [
+                {"repositoryId": repository_id, "categoryId": category_id, "title": t, "body": b}
+                for t, b in posts
+            ],
+        )
+        return [r if isinstance(r, GitHubError) else r["discussion"] for r in out]
+
+    def _add_discussion_comments(self, comments: Sequence[tuple[str, str]]) -> _Steps[list[str | GitHubError]]:
+        out = yield from self._graphql_batch(
+            "addDiscussionComment(input: {discussionId: $discussionId, body: $body}) { comment { id } }",
+            {"discussionId": "ID!", "body": "String!"},
+            [{"discussionId": d, "body": b} for d, b in comments],
+        )
+        return [r if isinstance(r, GitHubError) else r["comment"]["id"] for r in out]
+
+    def _mark_comments_as_answers(self, comment_ids: Sequence[str]) -> _Steps[list[GitHubError | None]]:
+        out = yield from self._graphql_batch(
+            "markDiscussionCommentAsAnswer(input: {id: $id}) { discussion { id } }",
+            {"id": "ID!"},
+            [{"id": c} for c in comment_ids],
+        )
+        return [r if isinstance(r, GitHubError) else None for r in out]
+
+
+class GitHubClient(_GitHubCore):
+    """Blocking client; safe to share between threads (each gets its own session)."""
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        base_url: str | None = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        governor: ratelimit.RateGovernor | None = None,
+        http_cache: httpcache.HTTPCache | bool = True,
+        metadata_cache: metacache.MetadataCache | bool = True,
+        concurrency: int | None = None,
+        http2: bool | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
+    ):
+        super().__init__(
+            token,
+            base_url=base_url,
+            timeout=timeout,
+            governor=governor,
+            http_cache=http_cache,
+            metadata_cache=metadata_cache,
+            concurrency=concurrency,
+            retry_policy=retry_policy,
+        )
+        self.adapter = _make_adapter(
+            self.concurrency, config.http2_enabled() if http2 is None else http2
+        )
+        self._local = threading.local()
+
+    # ---- low-level ----
+
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session; every thread's session shares the client's connection pool."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self._headers)
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            self._local.session = session
+        return session
+
+    def _run(self, steps: _Steps[T]) -> T:
+        """Carry out a call's steps on this thread and return its result."""
+        reply: Any = None
+        error: BaseException | None = None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as done:
+                return done.value
+            reply = error = None
+            if isinstance(step, _Send):
+                try:
+                    reply = self.session.request(step.method, step.url, **step.kwargs)
+                except requests.RequestException as e:
+                    error = e
+            elif isinstance(step, _Sleep):
+                time.sleep(step.seconds)
+            else:
+                step.event.wait()
+
+    def warm_up(self, connections: int | None = None) -> bool:
+        """Open pooled connections before the real work and seed the rate governor.
+
+        Sends up to `connections` (default: the client's concurrency) parallel
+        GET /rate_limit requests; they don't count against the primary limit, and the
+        reply fills in every rate-limit bucket at once. Best effort: returns False
+        instead of raising when GitHub can't be reached.
+        """
+        n = max(1, min(connections or self.concurrency, self.concurrency))
+        with ThreadPoolExecutor(n, thread_name_prefix="gca-warm") as pool:
+            replies = list(pool.map(lambda _: self._run(self._ping()), range(n)))
+        return self._seed(replies)
+
+    def close(self) -> None:
+        self.adapter.close()
+
+    # ---- identity / scopes ----
+
+    def whoami(self) -> str:
+        return self._run(self._whoami())
+
+    def scopes(self) -> set[str]:
+        return self._run(self._scopes())
+
+    def primary_verified_email(self) -> str | None:
+        return self._run(self._primary_verified_email())
+
+    # ---- repos ----
+
+    def get_repo(self, owner: str, repo: str) -> RepoRef:
+        return self._run(self._get_repo(owner, repo))
+
+    def create_repo(self, name: str, *, private: bool = True, description: str = "") -> RepoRef:
+        return self._run(self._create_repo(name, private=private, description=description))
+
+    def delete_repo(self, owner: str, repo: str) -> None:
+        self._run(self._delete_repo(owner, repo))
+
+    # ---- preflight ----
+
+    def preflight(
+        self,
+        repos: Sequence[RepoSpec | RepoRef],
+        *,
+        need_push: bool = False,
+        discussions: bool = False,
+        batch: int = PREFLIGHT_BATCH,
+    ) -> dict[str, RepoCheck]:
+        """Check many repos with a few aliased GraphQL queries, keyed by `full` as given.
+
+        Resolves the node ID, default branch, size, merge methods, default-branch
+        protection hints, archived/disabled flags and push permission (plus the Q&A
+        category with `discussions=True`), and sets `problem` on repos a flow can't use.
+        Usable repos are answered from the metadata cache while it is fresh; only the
+        rest are queried, and their results are cached.
+        """
+        return self._run(
+            self._preflight(repos, need_push=need_push, discussions=discussions, batch=batch)
+        )
+
+    # ---- pull requests ----
+
+    def create_pull_request(
+        self, repo: RepoRef, *, head: str, title: str, body: str = "", base: str | None = None
+    ) -> int:
+        return self._run(self._create_pull_request(repo, head=head, title=title, body=body, base=base))
+
+    def merge_pull_request(
+        self, repo: RepoRef, number: int, *, method: str = "squash"
+    ) -> bool:
+        return self._run(self._merge_pull_request(repo, number, method=method))
+
+    def create_pull_requests(
+        self,
+        repository_id: str,
+        base: str,
+        pulls: Sequence[tuple[str, str, str]],
+    ) -> list[tuple[int, str] | GitHubError]:
+        """Open a PR per (head, title, body) against `base` with aliased GraphQL mutations.
+
+        Returns (number, node_id) per PR, or the error: `PRExistsError` when one is
+        already open for that head.
+        """
+        return self._run(self._create_pull_requests(repository_id, base, pulls))
+
+    def merge_pull_requests(
+        self, pull_request_ids: Sequence[str], *, method: str = "squash"
+    ) -> list[GitHubError | None]:
+        """Merge PRs (by node ID) in order with aliased mutations; None per merged PR.
+
+        A PR GitHub refuses to merge (not mergeable, method not allowed, protected
+        branch) gets a `MergeBlockedError`, like a 405/409 from the REST endpoint.
+        """
+        return self._run(self._merge_pull_requests(pull_request_ids, method=method))
+
+    def pull_requests_merged(self, repo: RepoRef, numbers: Sequence[int]) -> dict[int, bool]:
+        """Merged state of many PRs in one aliased query (per PREFLIGHT_BATCH numbers)."""
+        return self._run(self._pull_requests_merged(repo, numbers))
+
+    def list_pull_requests(
+        self, repo: RepoRef, *, state: str = "all", head_prefix: str = ""
+    ) -> list[PullRef]:
+        """PRs whose head branch (in the repo itself) starts with `head_prefix`, all pages."""
+        return self._run(self._list_pull_requests(repo, state=state, head_prefix=head_prefix))
+
+    def pull_requests_mergeable(self, repo: RepoRef, numbers: Sequence[int]) -> dict[int, str]:
+        """Mergeability of many PRs in one aliased query: MERGEABLE, CONFLICTING or UNKNOWN.
+
+        UNKNOWN means GitHub is still computing it (as it does right after a PR is opened),
+        and is also what a PR the query couldn't read reports.
+        """
+        return self._run(self._pull_requests_mergeable(repo, numbers))
+
+    def close_pull_request(self, repo: RepoRef, number: int) -> None:
+        self._run(self._close_pull_request(repo, number))
+
+    # ---- issues (for Quickdraw) ----
+
+    def create_issue(self, repo: RepoRef, *, title: str, body: str = "") -> int:
+        return self._run(self._create_issue(repo, title=title, body=body))
+
+    def close_issue(self, repo: RepoRef, number: int) -> None:
+        self._run(self._close_issue(repo, number))
+
+    # ---- GraphQL ----
+
+    def graphql(self, query: str, variables: dict | None = None) -> dict:
+        return self._run(self._graphql(query, variables))
+
+    def graphql_partial(self, query: str, variables: dict | None = None) -> tuple[dict, list[dict]]:
+        """Run a query that may partly fail; return (data, errors) instead of raising on errors.
+
+        Aliased batch queries use this: one missing repo shouldn't sink the other 49.
+        Each error's `path[0]` names the alias it belongs to.
+        """
+        return self._run(self._graphql_partial(query, variables))
+
+    def graphql_batch(
+        self,
+        field: str,
+        var_types: dict[str, str],
+        items: Sequence[dict],
+        *,
+        mutation: bool = True,
+        batch: int = MUTATION_BATCH,
+    ) -> list[Any]:
+        """Run `field` once per item, as aliased fields of as few documents as possible.
+
+        `field` is a single selection using `$name` variables (declared in `var_types`),
+        e.g. `addDiscussionComment(input: {discussionId: $id, body: $body}) { comment { id } }`;
+        each item supplies the variables. Returns, in item order, each field's data or
+        the `GitHubError` it failed with. Fields run in order within a document.
+        """
+        return self._run(self._graphql_batch(field, var_types, items, mutation=mutation, batch=batch))
+
+    # ---- discussions ----
+
+    def find_repo_and_qa_category(self, repo: RepoRef) -> tuple[str, str, str]:
+        """Return (repository_id, category_id, category_name).
+
+        Prefers a category whose slug is 'q-a'. Falls back to any isAnswerable category.
+        Raises DiscussionCategoryError if Discussions are off or no answerable category exists.
+        """
+        return self._run(self._find_repo_and_qa_category(repo))
+
+    def create_discussion(self, repository_id: str, category_id: str, title: str, body: str) -> dict:
+        return self._run(self._create_discussion(repository_id, category_id, title, body))
+
+    def add_discussion_comment(self, discussion_id: str, body: str) -> str:
+        return self._run(self._add_discussion_comment(discussion_id, body))
+
     def mark_comment_as_answer(self, comment_id: str) -> None:
-        self.graphql(self._M_MARK_ANSWER, {"id": comment_id})
+        self._run(self._mark_comment_as_answer(comment_id))
+
+    # batched forms: one result per item, either the value or the GitHubError it hit
+
+    def create_discussions(
+        self, repository_id: str, category_id: str, posts: Sequence[tuple[str, str]]
+    ) -> list[dict | GitHubError]:
+        """Create a discussion per (title, body), many per request."""
+        return self._run(self._create_discussions(repository_id, category_id, posts))
+
+    def add_discussion_comments(self, comments: Sequence[tuple[str, str]]) -> list[str | GitHubError]:
+        """Add a comment per (discussion_id, body); returns the comment IDs."""
+        return self._run(self._add_discussion_comments(comments))
+
+    def mark_comments_as_answers(self, comment_ids: Sequence[str]) -> list[GitHubError | None]:
+        return self._run(self._mark_comments_as_answers(comment_ids))
+
+
+class AsyncGitHubClient(_GitHubCore):
+    """asyncio client: `GitHubClient`'s calls as coroutines, over one `httpx.AsyncClient`.
+
+    Needs the `async` extra. Runs the same call code as `GitHubClient`, so retries,
+    rate-limit pacing, both caches and the typed errors behave the same. At most
+    `max_in_flight` requests (default: the concurrency) are on the wire at once.
+    `aclose()` turns new calls away and waits for the ones in flight. Use a client
+    from one event loop.
+
+        async with AsyncGitHubClient(token) as gh:
+            numbers = await asyncio.gather(*(gh.create_issue(repo, title=t) for t in titles))
+    """
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        base_url: str | None = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        governor: ratelimit.RateGovernor | None = None,
+        http_cache: httpcache.HTTPCache | bool = True,
+        metadata_cache: metacache.MetadataCache | bool = True,
+        concurrency: int | None = None,
+        http2: bool | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
+        max_in_flight: int | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if httpx is None:
+            raise ImportError("AsyncGitHubClient needs the `async` extra: pip install 'gca[async]'")
+        super().__init__(
+            token,
+            base_url=base_url,
+            timeout=timeout,
+            governor=governor,
+            http_cache=http_cache,
+            metadata_cache=metadata_cache,
+            concurrency=concurrency,
+            retry_policy=retry_policy,
+        )
+        self.max_in_flight = max_in_flight or self.concurrency
+        limits = httpx.Limits(
+            max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight
+        )
+        opts = {"headers": self._headers, "limits": limits, "follow_redirects": True, "transport": transport}
+        http2 = config.http2_enabled() if http2 is None else http2
+        try:
+            self._http = httpx.AsyncClient(http2=http2, **opts)
+        except ImportError as e:  # httpx without the h2 package
+            log.warning("HTTP/2 unavailable (%s); using HTTP/1.1", e)
+            self._http = httpx.AsyncClient(**opts)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+
+    # ---- low-level ----
+
+    async def _send(self, step: _Send) -> requests.Response:
+        async with self._slots:
+            try:
+                r = await self._http.request(step.method, step.url, **step.kwargs)
+            except httpx.TransportError as e:
+                raise _requests_error(e) from e
+        return _from_httpx(r)
+
+    async def _run(self, steps: _Steps[T]) -> T:
+        """Carry out a call's steps on the event loop and return its result."""
+        if self._closed:
+            steps.close()
+            raise RuntimeError("AsyncGitHubClient is closed")
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            reply: Any = None
+            error: BaseException | None = None
+            while True:
+                try:
+                    step = steps.throw(error) if error is not None else steps.send(reply)
+                except StopIteration as done:
+                    return done.value
+                reply = error = None
+                if isinstance(step, _Send):
+                    try:
+                        reply = await self._send(step)
+                    except requests.RequestException as e:
+                        error = e
+                elif isinstance(step, _Sleep):
+                    await asyncio.sleep(step.seconds)
+                else:
+                    await asyncio.to_thread(step.event.wait)
+        finally:
+            steps.close()
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    async def warm_up(self, connections: int | None = None) -> bool:
+        n = max(1, min(connections or self.concurrency, self.concurrency))
+        return self._seed(await asyncio.gather(*(self._run(self._ping()) for _ in range(n))))
+
+    async def aclose(self) -> None:
+        """Refuse new calls, wait for those in flight, then close the connections."""
+        self._closed = True
+        await self._idle.wait()
+        await self._http.aclose()
+
+    async def __aenter__(self) -> AsyncGitHubClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    # ---- identity / scopes ----
+
+    async def whoami(self) -> str:
+        return await self._run(self._whoami())
+
+    async def scopes(self) -> set[str]:
+        return await self._run(self._scopes())
+
+    async def primary_verified_email(self) -> str | None:
+        return await self._run(self._primary_verified_email())
+
+    # ---- repos ----
+
+    async def get_repo(self, owner: str, repo: str) -> RepoRef:
+        return await self._run(self._get_repo(owner, repo))
+
+    async def create_repo(self, name: str, *, private: bool = True, description: str = "") -> RepoRef:
+        return await self._run(self._create_repo(name, private=private, description=description))
+
+    async def delete_repo(self, owner: str, repo: str) -> None:
+        await self._run(self._delete_repo(owner, repo))
+
+    # ---- preflight ----
+
+    async def preflight(
+        self,
+        repos: Sequence[RepoSpec | RepoRef],
+        *,
+        need_push: bool = False,
+        discussions: bool = False,
+        batch: int = PREFLIGHT_BATCH,
+    ) -> dict[str, RepoCheck]:
+        return await self._run(
+            self._preflight(repos, need_push=need_push, discussions=discussions, batch=batch)
+        )
+
+    # ---- pull requests ----
+
+    async def create_pull_request(
+        self, repo: RepoRef, *, head: str, title: str, body: str = "", base: str | None = None
+    ) -> int:
+        return await self._run(self._create_pull_request(repo, head=head, title=title, body=body, base=base))
+
+    async def merge_pull_request(
+        self, repo: RepoRef, number: int, *, method: str = "squash"
+    ) -> bool:
+        return await self._run(self._merge_pull_request(repo, number, method=method))
+
+    async def create_pull_requests(
+        self,
+        repository_id: str,
+        base: str,
+        pulls: Sequence[tuple[str, str, str]],
+    ) -> list[tuple[int, str] | GitHubError]:
+        return await self._run(self._create_pull_requests(repository_id, base, pulls))
+
+    async def merge_pull_requests(
+        self, pull_request_ids: Sequence[str], *, method: str = "squash"
+    ) -> list[GitHubError | None]:
+        return await self._run(self._merge_pull_requests(pull_request_ids, method=method))
+
+    async def pull_requests_merged(self, repo: RepoRef, numbers: Sequence[int]) -> dict[int, bool]:
+        return await self._run(self._pull_requests_merged(repo, numbers))
+
+    async def list_pull_requests(
+        self, repo: RepoRef, *, state: str = "all", head_prefix: str = ""
+    ) -> list[PullRef]:
+        return await self._run(self._list_pull_requests(repo, state=state, head_prefix=head_prefix))
+
+    async def pull_requests_mergeable(self, repo: RepoRef, numbers: Sequence[int]) -> dict[int, str]:
+        return await self._run(self._pull_requests_mergeable(repo, numbers))
+
+    async def close_pull_request(self, repo: RepoRef, number: int) -> None:
+        await self._run(self._close_pull_request(repo, number))
+
+    # ---- issues (for Quickdraw) ----
+
+    async def create_issue(self, repo: RepoRef, *, title: str, body: str = "") -> int:
+        return await self._run(self._create_issue(repo, title=title, body=body))
+
+    async def close_issue(self, repo: RepoRef, number: int) -> None:
+        await self._run(self._close_issue(repo, number))
+
+    # ---- GraphQL ----
+
+    async def graphql(self, query: str, variables: dict | None = None) -> dict:
+        return await self._run(self._graphql(query, variables))
+
+    async def graphql_partial(self, query: str, variables: dict | None = None) -> tuple[dict, list[dict]]:
+        return await self._run(self._graphql_partial(query, variables))
+
+    async def graphql_batch(
+        self,
+        field: str,
+        var_types: dict[str, str],
+        items: Sequence[dict],
+        *,
+        mutation: bool = True,
+        batch: int = MUTATION_BATCH,
+    ) -> list[Any]:
+        return await self._run(self._graphql_batch(field, var_types, items, mutation=mutation, batch=batch))
+
+    # ---- discussions ----
+
+    async def find_repo_and_qa_category(self, repo: RepoRef) -> tuple[str, str, str]:
+        return await self._run(self._find_repo_and_qa_category(repo))
+
+    async def create_discussion(self, repository_id: str, category_id: str, title: str, body: str) -> dict:
+        return await self._run(self._create_discussion(repository_id, category_id, title, body))
+
+    async def add_discussion_comment(self, discussion_id: str, body: str) -> str:
+        return await self._run(self._add_discussion_comment(discussion_id, body))
+
+    async def mark_comment_as_answer(self, comment_id: str) -> None:
+        await self._run(self._mark_comment_as_answer(comment_id))
+
+    async def create_discussions(
+        self, repository_id: str, category_id: str, posts: Sequence[tuple[str, str]]
+    ) -> list[dict | GitHubError]:
+        return await self._run(self._create_discussions(repository_id, category_id, posts))
+
+    async def add_discussion_comments(self, comments: Sequence[tuple[str, str]]) -> list[str | GitHubError]:
+        return await self._run(self._add_discussion_comments(comments))
+
+    async def mark_comments_as_answers(self, comment_ids: Sequence[str]) -> list[GitHubError | None]:
+        return await self._run(self._mark_comments_as_answers(comment_ids))
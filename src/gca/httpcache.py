@@ -0,0 +1,173 @@
+"""On-disk HTTP cache for conditional GitHub GETs.
+
+Responses that carry an `ETag` or `Last-Modified` are kept in a small sqlite database
+under `<cache_dir>/http.sqlite`. The next GET for the same URL sends `If-None-Match` /
+`If-Modified-Since`; GitHub answers an unchanged resource with a 304, which does not
+count against the primary rate limit, and the cached body is served instead.
+
+Entries are keyed by a hash of the token id and URL, so different accounts never see
+each other's responses and the token is never stored. The database is size-bounded
+(GCA_HTTP_CACHE_MAX_SIZE, default 50M) and trimmed least-recently-used first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from gca import config
+
+log = logging.getLogger("gca.httpcache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+# hop-by-hop / per-response headers that must not be replayed from the cache
+_VOLATILE_HEADERS = frozenset(
+    {"date", "connection", "transfer-encoding", "content-encoding", "content-length"}
+)
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def validators(self) -> dict[str, str]:
+        """Conditional-request headers for revalidating this entry."""
+        out = {}
+        if self.etag:
+            out["If-None-Match"] = self.etag
+        if self.last_modified:
+            out["If-Modified-Since"] = self.last_modified
+        return out
+
+
+def cache_key(scope: str, url: str) -> str:
+    return hashlib.sha256(f"{scope}\0{url}".encode()).hexdigest()
+
+
+class HTTPCache:
+    def __init__(self, path: str | os.PathLike, *, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fresh = not self.path.exists()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            if fresh:
+                os.chmod(self.path, 0o600)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            try:
+                row = self._conn().execute(
+                    "SELECT etag, last_modified, status, headers, body FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error as e:
+                log.debug("http cache unavailable: %s", e)
+                return None
+        if row is None:
+            return None
+        etag, last_modified, status, headers, body = row
+        return CachedResponse(etag, last_modified, status, json.loads(headers), bytes(body))
+
+    def put(
+        self,
+        key: str,
+        *,
+        etag: str | None,
+        last_modified: str | None,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        if len(body) > self.max_bytes:
+            return
+        kept = {k: v for k, v in headers.items() if k.lower() not in _VOLATILE_HEADERS}
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, etag, last_modified, status, json.dumps(kept), body, len(body), time.time()),
+                )
+                self._trim(db)
+                db.commit()
+            except sqlite3.Error as e:
+                log.debug("http cache write failed: %s", e)
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+            except sqlite3.Error as e:
+                log.debug("http cache write failed: %s", e)
+
+    def _trim(self, db: sqlite3.Connection) -> None:
+        (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def record(self, hit: bool, url: str) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            hits, misses = self.hits, self.misses
+        log.debug("http cache %s: %s (%d hits, %d misses)", "hit" if hit else "miss", url, hits, misses)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def default_cache() -> HTTPCache | None:
+    """The shared on-disk cache, or None when disabled with GCA_HTTP_CACHE=0."""
+    if not config.http_cache_enabled():
+        return None
+    return HTTPCache(config.cache_dir() / "http.sqlite", max_bytes=config.http_cache_max_bytes())
@@ -0,0 +1,156 @@
+"""Run journals: let an interrupted `gca commits` or `gca prs` run resume where it stopped.
+
+A journal lives at `<cache_dir>/journal/<key>.json`, keyed by the repo plus the options
+that shape the schedule. It stores the planned schedule itself (the messages and times
+are random, so they can't be re-derived), the remote tip the run started from, and how
+many commits have been pushed so far. Because commit objects are content-addressed, a
+rerun that rebuilds the schedule on the same parent reproduces the same SHAs, and only
+the commits past the last recorded chunk need to go over the wire.
+
+A `PRRunJournal` (`<key>.prs.json`) only records the id a `gca prs` run put in its
+branch names. While it exists, a rerun of the same command reuses that id and picks up
+the run's branches and PRs; it is discarded once the repo finishes cleanly, so the
+next run starts fresh.
+
+Nothing secret is written: the key is a hash and the payload holds no URLs or tokens.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+from contextlib import suppress
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from gca import config
+from gca.git_ops import CommitSpec
+
+log = logging.getLogger("gca.journal")
+
+VERSION = 1
+
+
+def journal_key(*parts: object) -> str:
+    blob = json.dumps([str(p) for p in parts], separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def _spec_to_dict(spec: CommitSpec) -> dict:
+    d = asdict(spec)
+    d["when"] = spec.when.isoformat()
+    d["coauthors"] = [list(c) for c in spec.coauthors]
+    return d
+
+
+def _spec_from_dict(d: dict) -> CommitSpec:
+    return CommitSpec(
+        file_name=d["file_name"],
+        file_content=d["file_content"],
+        message=d["message"],
+        when=dt.datetime.fromisoformat(d["when"]),
+        coauthors=tuple(tuple(c) for c in d.get("coauthors", ())),
+        body=d.get("body", ""),
+    )
+
+
+@dataclass
+class PushJournal:
+    key: str
+    repo: str
+    branch: str
+    base: str  # remote tip the schedule was first built on
+    schedule: list[CommitSpec] = field(default_factory=list)
+    pushed: int = 0  # commits of `schedule` known to be on the remote
+    tip: str | None = None  # sha of schedule[pushed - 1] once anything is pushed
+
+    @staticmethod
+    def path_for(key: str) -> Path:
+        return config.cache_dir() / "journal" / f"{key}.json"
+
+    @classmethod
+    def load(cls, key: str) -> PushJournal | None:
+        path = cls.path_for(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning("ignoring unreadable push journal %s: %s", path, e)
+            return None
+        if data.get("version") != VERSION:
+            return None
+        return cls(
+            key=key,
+            repo=data["repo"],
+            branch=data["branch"],
+            base=data["base"],
+            schedule=[_spec_from_dict(d) for d in data["schedule"]],
+            pushed=int(data.get("pushed", 0)),
+            tip=data.get("tip"),
+        )
+
+    def save(self) -> None:
+        path = self.path_for(self.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": VERSION,
+            "repo": self.repo,
+            "branch": self.branch,
+            "base": self.base,
+            "schedule": [_spec_to_dict(s) for s in self.schedule],
+            "pushed": self.pushed,
+            "tip": self.tip,
+        }
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def record(self, pushed: int, tip: str) -> None:
+        self.pushed = pushed
+        self.tip = tip
+        self.save()
+
+    def discard(self) -> None:
+        with suppress(FileNotFoundError):
+            self.path_for(self.key).unlink()
+
+
+@dataclass
+class PRRunJournal:
+    key: str
+    repo: str
+    run_id: str  # embedded in this run's branch names
+
+    @staticmethod
+    def path_for(key: str) -> Path:
+        return config.cache_dir() / "journal" / f"{key}.prs.json"
+
+    @classmethod
+    def load(cls, key: str) -> PRRunJournal | None:
+        path = cls.path_for(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning("ignoring unreadable PR run journal %s: %s", path, e)
+            return None
+        if data.get("version") != VERSION:
+            return None
+        return cls(key=key, repo=data["repo"], run_id=data["run_id"])
+
+    def save(self) -> None:
+        path = self.path_for(self.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": VERSION, "repo": self.repo, "run_id": self.run_id}
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def discard(self) -> None:
+        with suppress(FileNotFoundError):
+            self.path_for(self.key).unlink()
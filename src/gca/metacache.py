@@ -0,0 +1,166 @@
+"""Persistent cache of slow-changing repository metadata.
+
+`GitHubClient.get_repo` (owner, name, default branch, size),
+`find_repo_and_qa_category` (discussion repository ID and answerable category) and
+`preflight` (node ID, flags, permission, category) give the same answers run after
+run. They are kept in `<cache_dir>/metadata.sqlite` for
+GCA_METADATA_TTL seconds (default one day; 0 disables the cache). Entries are scoped
+by the token's hash, since visibility differs between accounts, and are dropped when
+GitHub answers 404/410 for the repo.
+
+Within a process, concurrent lookups of the same missing entry are single-flighted:
+one caller loads it (`claim` makes it the leader, `settle` stores the result), the
+rest wait for that result.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from gca import config
+
+log = logging.getLogger("gca.metacache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    scope TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored REAL NOT NULL,
+    PRIMARY KEY (scope, repo, kind)
+)
+"""
+
+
+class Flight:
+    """One in-flight load of a missing entry; waiters block on `done`."""
+
+    def __init__(self, key: tuple[str, str, str, str]) -> None:
+        self.key = key
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+    def result(self) -> Any:
+        """Wait for the leader, then return its value or raise its error."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+# in-flight loads, shared by every MetadataCache in the process
+_FLIGHTS: dict[tuple[str, str, str, str], Flight] = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+class MetadataCache:
+    def __init__(self, path: str | os.PathLike, *, ttl: float, scope: str = ""):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fresh = not self.path.exists()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            if fresh:
+                os.chmod(self.path, 0o600)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def get(self, kind: str, repo: str) -> Any | None:
+        with self._lock:
+            try:
+                row = self._conn().execute(
+                    "SELECT value, stored FROM metadata WHERE scope = ? AND repo = ? AND kind = ?",
+                    (self.scope, repo.lower(), kind),
+                ).fetchone()
+            except sqlite3.Error as e:
+                log.debug("metadata cache unavailable: %s", e)
+                return None
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        log.debug("metadata cache hit: %s %s", kind, repo)
+        return json.loads(row[0])
+
+    def put(self, kind: str, repo: str, value: Any) -> None:
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                    (self.scope, repo.lower(), kind, json.dumps(value), time.time()),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                log.debug("metadata cache write failed: %s", e)
+
+    def invalidate(self, repo: str) -> None:
+        """Forget everything cached about `repo` (all kinds)."""
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute(
+                    "DELETE FROM metadata WHERE scope = ? AND repo = ?", (self.scope, repo.lower())
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                log.debug("metadata cache write failed: %s", e)
+
+    def claim(self, kind: str, repo: str) -> tuple[Any, Flight | None, bool]:
+        """Start a lookup: `(value, None, False)` on a hit, else `(None, flight, leader)`.
+
+        The leader loads the entry and must `settle` the flight; everyone else waits on
+        `flight.result()`.
+        """
+        value = self.get(kind, repo)
+        if value is not None:
+            return value, None, False
+        key = (str(self.path), self.scope, kind, repo.lower())
+        with _FLIGHTS_LOCK:
+            flight = _FLIGHTS.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = _FLIGHTS[key] = Flight(key)
+        return None, flight, leader
+
+    def settle(
+        self, kind: str, repo: str, flight: Flight, *, value: Any = None, error: BaseException | None = None
+    ) -> None:
+        """Finish a claimed load: store `value` (unless it failed) and wake the waiters."""
+        try:
+            if error is None:
+                self.put(kind, repo, value)
+            flight.value, flight.error = value, error
+        finally:
+            with _FLIGHTS_LOCK:
+                _FLIGHTS.pop(flight.key, None)
+            flight.done.set()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def default_cache(scope: str) -> MetadataCache | None:
+    """The on-disk store for `scope`, or None when GCA_METADATA_TTL is 0."""
+    ttl = config.metadata_ttl()
+    if ttl <= 0:
+        return None
+    return MetadataCache(config.cache_dir() / "metadata.sqlite", ttl=ttl, scope=scope)
@@ -0,0 +1,143 @@
+"""Persistent bare-mirror cache shared by every subcommand.
+
+Mirrors live under `<cache_dir>/mirrors/<owner>/<name>.git` and are brought up to date
+with an incremental fetch before each run. Per-run clones in `git_ops.temp_workdir`
+borrow their objects through `git clone --reference` (alternates), so only objects the
+mirror lacks come over the network.
+
+Locking: each mirror has a sibling `.lock` file. Fetching takes it exclusively, then
+downgrades to shared for as long as a run borrows the mirror; eviction only removes
+mirrors it can lock exclusively without waiting.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+from gca import config, git_ops
+from gca.repo_spec import RepoSpec
+from gca.utils import FileLock
+
+log = logging.getLogger("gca.mirrors")
+
+STAMP_FILE = "gca-last-used"
+
+
+@dataclass
+class MirrorInfo:
+    repo: str
+    path: str
+    size_bytes: int
+    last_used: float
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for f in files:
+            with suppress(OSError):
+                total += os.lstat(os.path.join(root, f)).st_size
+    return total
+
+
+class MirrorStore:
+    def __init__(self, root: str | os.PathLike | None = None, *, max_bytes: int | None = None):
+        self.root = Path(root) if root is not None else config.cache_dir() / "mirrors"
+        self.max_bytes = config.mirror_max_bytes() if max_bytes is None else max_bytes
+
+    def path_for(self, spec: RepoSpec) -> Path:
+        return self.root / spec.owner / f"{spec.name}.git"
+
+    @staticmethod
+    def _lock_for(path: Path) -> FileLock:
+        return FileLock(path.with_name(path.name + ".lock"))
+
+    @contextmanager
+    def borrow(self, spec: RepoSpec, url: str) -> Iterator[Path]:
+        """Fetch `spec` into its mirror and hold a shared lock while the caller uses it."""
+        path = self.path_for(spec)
+        lock = self._lock_for(path)
+        lock.acquire()
+        try:
+            fresh = not (path / "HEAD").exists()
+            if fresh:
+                log.info("creating mirror for %s", spec.full)
+                git_ops.init_mirror(path, spec.https_url)
+            else:
+                log.debug("updating mirror for %s", spec.full)
+            try:
+                git_ops.update_mirror(path, url)
+            except git_ops.GitError:
+                if fresh:
+                    shutil.rmtree(path, ignore_errors=True)
+                raise
+            (path / STAMP_FILE).touch()
+            lock.acquire(shared=True)
+            self.evict(keep=path)
+            yield path
+        finally:
+            lock.release()
+
+    def list(self) -> list[MirrorInfo]:
+        out: list[MirrorInfo] = []
+        if not self.root.exists():
+            return out
+        for owner_dir in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            for path in sorted(owner_dir.glob("*.git")):
+                stamp = path / STAMP_FILE
+                last_used = stamp.stat().st_mtime if stamp.exists() else path.stat().st_mtime
+                out.append(
+                    MirrorInfo(
+                        repo=f"{owner_dir.name}/{path.name[:-4]}",
+                        path=str(path),
+                        size_bytes=_dir_size(path),
+                        last_used=last_used,
+                    )
+                )
+        return out
+
+    def remove(self, info: MirrorInfo) -> bool:
+        """Delete one mirror unless a run is currently using it."""
+        path = Path(info.path)
+        lock = self._lock_for(path)
+        if not lock.acquire(blocking=False):
+            log.info("mirror %s is in use, not removing", info.repo)
+            return False
+        try:
+            shutil.rmtree(path, ignore_errors=True)
+        finally:
+            lock.release()
+        return True
+
+    def evict(self, *, max_bytes: int | None = None, keep: Path | None = None) -> list[MirrorInfo]:
+        """Drop least-recently-used mirrors until the store fits in `max_bytes`."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        mirrors = self.list()
+        total = sum(m.size_bytes for m in mirrors)
+        removed: list[MirrorInfo] = []
+        for m in sorted(mirrors, key=lambda m: m.last_used):
+            if total <= limit:
+                break
+            if keep is not None and Path(m.path) == keep:
+                continue
+            if self.remove(m):
+                total -= m.size_bytes
+                removed.append(m)
+                log.info("evicted mirror %s (%d bytes)", m.repo, m.size_bytes)
+        return removed
+
+
+@contextmanager
+def borrow(spec: RepoSpec, url: str, *, enabled: bool = True) -> Iterator[Path | None]:
+    """Yield a fresh mirror path for `git_ops.clone(reference=...)`, or None when disabled."""
+    if not enabled:
+        yield None
+        return
+    with MirrorStore().borrow(spec, url) as path:
+        yield path
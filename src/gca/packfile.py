@@ -0,0 +1,423 @@
+"""Pure-Python git object hashing and packfile writing.
+
+Backs the `pack` commit engine in `git_ops`. Blobs, trees and commits are serialized,
+SHA-1 hashed and zlib-compressed in-process, then written as one version-2 packfile
+plus its version-2 index straight into `objects/pack`. Nothing here spawns git;
+`git_ops` reads the base tree and moves the ref.
+
+Each new tree version is stored as an OFS_DELTA against the previous version of the
+same directory (bounded by MAX_DELTA_DEPTH), so appending one file per commit to a
+directory with thousands of entries does not produce a quadratic pack.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import struct
+import zlib
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_OFS_DELTA = 6
+
+TREE_MODE = b"40000"
+FILE_MODE = b"100644"
+MAX_DELTA_DEPTH = 50
+ZLIB_LEVEL = 1
+
+
+def object_id(kind: bytes, payload: bytes) -> bytes:
+    """Raw 20-byte SHA-1 of a loose object ('<kind> <len>\\0<payload>')."""
+    h = hashlib.sha1(b"%s %d\0" % (kind, len(payload)))
+    h.update(payload)
+    return h.digest()
+
+
+def tree_entry(mode: bytes, name: bytes, sha: bytes) -> bytes:
+    return b"%s %s\0%s" % (mode, name, sha)
+
+
+def _sort_key(mode: bytes, name: bytes) -> bytes:
+    # git orders tree entries as if directory names had a trailing '/'
+    return name + b"/" if mode == TREE_MODE else name
+
+
+def tree_payload(entries: Iterable[tuple[bytes, bytes, bytes]]) -> bytes:
+    """Serialize (mode, name, raw sha) entries in git's canonical order."""
+    ordered = sorted(entries, key=lambda e: _sort_key(e[0], e[1]))
+    return b"".join(tree_entry(*e) for e in ordered)
+
+
+def commit_payload(
+    tree: bytes, parents: Sequence[bytes], author: bytes, committer: bytes, message: bytes
+) -> bytes:
+    """Serialize a commit. `tree`/`parents` are raw shas; idents include the date."""
+    lines = [b"tree " + tree.hex().encode("ascii")]
+    lines.extend(b"parent " + p.hex().encode("ascii") for p in parents)
+    lines.append(b"author " + author)
+    lines.append(b"committer " + committer)
+    return b"\n".join(lines) + b"\n\n" + message
+
+
+# ---- delta encoding ----
+
+
+def _size_varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _copy_ops(offset: int, size: int) -> bytes:
+    out = bytearray()
+    while size:
+        chunk = min(size, 0xFFFFFF)
+        op = 0x80
+        args = bytearray()
+        for i in range(4):
+            byte = (offset >> (8 * i)) & 0xFF
+            if byte:
+                op |= 1 << i
+                args.append(byte)
+        for i in range(3):
+            byte = (chunk >> (8 * i)) & 0xFF
+            if byte:
+                op |= 1 << (4 + i)
+                args.append(byte)
+        out.append(op)
+        out += args
+        offset += chunk
+        size -= chunk
+    return bytes(out)
+
+
+def _insert_ops(data: bytes) -> bytes:
+    out = bytearray()
+    for i in range(0, len(data), 0x7F):
+        chunk = data[i : i + 0x7F]
+        out.append(len(chunk))
+        out += chunk
+    return bytes(out)
+
+
+def make_delta(base: bytes, target: bytes) -> bytes:
+    """Delta that rebuilds `target` from `base` as copy-prefix / insert / copy-suffix.
+
+    That shape covers every tree edit the generators make: one entry inserted, or one
+    subtree sha swapped in place.
+    """
+    prefix = _common_prefix(base, target)
+    suffix = _common_suffix(base, target, min(len(base), len(target)) - prefix)
+    out = bytearray(_size_varint(len(base)) + _size_varint(len(target)))
+    out += _copy_ops(0, prefix)
+    out += _insert_ops(target[prefix : len(target) - suffix])
+    out += _copy_ops(len(base) - suffix, suffix)
+    return bytes(out)
+
+
+# ---- pack assembly ----
+
+
+def _obj_header(kind: int, size: int) -> bytes:
+    out = bytearray()
+    byte = (kind << 4) | (size & 0x0F)
+    size >>= 4
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7F
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+
+def _ofs_encoding(distance: int) -> bytes:
+    out = bytearray([distance & 0x7F])
+    distance >>= 7
+    while distance:
+        distance -= 1
+        out.append(0x80 | (distance & 0x7F))
+        distance >>= 7
+    return bytes(reversed(out))
+
+
+def _hash_and_compress(kind: bytes, payload: bytes) -> tuple[bytes, bytes]:
+    return object_id(kind, payload), zlib.compress(payload, ZLIB_LEVEL)
+
+
+@dataclass
+class _Record:
+    sha: bytes
+    kind: int  # stored type: OBJ_* (OBJ_OFS_DELTA for deltas)
+    size: int  # size of the stored, uncompressed payload
+    data: Future[bytes] | bytes  # zlib-compressed stored payload
+    base: int | None = None  # record index of the delta base
+    depth: int = 0
+
+
+class PackBuilder:
+    """Accumulates objects and writes them as one pack + index.
+
+    Hashing is synchronous where a later object needs the id; compression of trees,
+    deltas and commits is handed to a thread pool (zlib and hashlib release the GIL).
+    """
+
+    def __init__(self, executor: Executor | None = None):
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+        self._records: list[_Record] = []
+        self._index: dict[bytes, int] = {}
+
+    def __enter__(self) -> PackBuilder:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _append(self, record: _Record) -> int:
+        idx = self._index.get(record.sha)
+        if idx is not None:
+            return idx
+        self._records.append(record)
+        self._index[record.sha] = len(self._records) - 1
+        return len(self._records) - 1
+
+    def add_blobs(self, payloads: Sequence[bytes]) -> list[bytes]:
+        """Hash + compress independent blobs concurrently. Returns raw shas in order."""
+        shas: list[bytes] = []
+        results = self._executor.map(_hash_and_compress, [b"blob"] * len(payloads), payloads)
+        for payload, (sha, data) in zip(payloads, results, strict=True):
+            self._append(_Record(sha=sha, kind=OBJ_BLOB, size=len(payload), data=data))
+            shas.append(sha)
+        return shas
+
+    def add_tree(self, payload: bytes, *, base: tuple[int, bytes] | None = None) -> tuple[bytes, int]:
+        """Add a tree, optionally as a delta on (record index, base payload).
+
+        Returns (raw sha, record index).
+        """
+        sha = object_id(b"tree", payload)
+        if sha in self._index:
+            return sha, self._index[sha]
+        if base is not None:
+            base_idx, base_payload = base
+            depth = self._records[base_idx].depth + 1
+            if depth <= MAX_DELTA_DEPTH:
+                delta = make_delta(base_payload, payload)
+                if len(delta) < len(payload) // 2:
+                    fut = self._executor.submit(zlib.compress, delta, ZLIB_LEVEL)
+                    rec = _Record(sha, OBJ_OFS_DELTA, len(delta), fut, base=base_idx, depth=depth)
+                    return sha, self._append(rec)
+        fut = self._executor.submit(zlib.compress, payload, ZLIB_LEVEL)
+        return sha, self._append(_Record(sha=sha, kind=OBJ_TREE, size=len(payload), data=fut))
+
+    def add_commit(self, payload: bytes) -> bytes:
+        sha = object_id(b"commit", payload)
+        fut = self._executor.submit(zlib.compress, payload, ZLIB_LEVEL)
+        self._append(_Record(sha=sha, kind=OBJ_COMMIT, size=len(payload), data=fut))
+        return sha
+
+    def write(self, pack_dir: str | os.PathLike) -> Path:
+        """Write pack-<sha>.pack and its .idx into pack_dir. Returns the .pack path."""
+        pack_dir_p = Path(pack_dir)
+        pack_dir_p.mkdir(parents=True, exist_ok=True)
+        tmp_pack = pack_dir_p / f"tmp_pack_gca_{os.getpid()}_{id(self)}"
+        offsets: list[int] = []
+        crcs: list[int] = []
+        h = hashlib.sha1()
+        pos = 0
+        with open(tmp_pack, "wb") as f:
+
+            def emit(chunk: bytes) -> None:
+                nonlocal pos
+                f.write(chunk)
+                h.update(chunk)
+                pos += len(chunk)
+
+            emit(b"PACK" + struct.pack(">II", 2, len(self._records)))
+            for rec in self._records:
+                offsets.append(pos)
+                head = _obj_header(rec.kind, rec.size)
+                if rec.base is not None:
+                    head += _ofs_encoding(pos - offsets[rec.base])
+                data = rec.data.result() if isinstance(rec.data, Future) else rec.data
+                crcs.append(zlib.crc32(data, zlib.crc32(head)))
+                emit(head)
+                emit(data)
+            checksum = h.digest()
+            f.write(checksum)
+
+        name = f"pack-{checksum.hex()}"
+        pack_path = pack_dir_p / f"{name}.pack"
+        idx_tmp = pack_dir_p / f"{tmp_pack.name}.idx"
+        idx_tmp.write_bytes(
+            _index_v2([r.sha for r in self._records], crcs, offsets, checksum)
+        )
+        os.chmod(tmp_pack, 0o444)
+        os.chmod(idx_tmp, 0o444)
+        os.replace(tmp_pack, pack_path)
+        os.replace(idx_tmp, pack_dir_p / f"{name}.idx")
+        return pack_path
+
+
+def _index_v2(shas: list[bytes], crcs: list[int], offsets: list[int], pack_checksum: bytes) -> bytes:
+    order = sorted(range(len(shas)), key=shas.__getitem__)
+    fanout = [0] * 256
+    for sha in shas:
+        fanout[sha[0]] += 1
+    running = 0
+    for i in range(256):
+        running += fanout[i]
+        fanout[i] = running
+    small = bytearray()
+    large = bytearray()
+    for i in order:
+        off = offsets[i]
+        if off < 0x80000000:
+            small += struct.pack(">I", off)
+        else:
+            small += struct.pack(">I", 0x80000000 | (len(large) // 8))
+            large += struct.pack(">Q", off)
+    body = b"".join(
+        [
+            b"\xfftOc",
+            struct.pack(">I", 2),
+            struct.pack(">256I", *fanout),
+            b"".join(shas[i] for i in order),
+            b"".join(struct.pack(">I", crcs[i]) for i in order),
+            bytes(small),
+            bytes(large),
+            pack_checksum,
+        ]
+    )
+    return body + hashlib.sha1(body).digest()
+
+
+# ---- incremental tree state ----
+
+
+def parse_ls_tree(raw: bytes) -> list[tuple[bytes, bytes, bytes, bytes]]:
+    """Parse `git ls-tree -z` output into (mode, type, raw sha, path) tuples."""
+    out = []
+    for rec in raw.split(b"\0"):
+        if not rec:
+            continue
+        meta, _, path = rec.partition(b"\t")
+        mode, kind, sha = meta.split(b" ")
+        # ls-tree prints '040000'; tree objects store '40000'
+        mode = mode.lstrip(b"0")
+        out.append((mode, kind, bytes.fromhex(sha.decode("ascii")), path))
+    return out
+
+
+class _Dir:
+    __slots__ = ("children", "dirty", "entries", "keys", "payload", "record")
+
+    def __init__(self) -> None:
+        self.entries: dict[bytes, bytes] = {}  # sort key -> serialized entry
+        self.keys: list[bytes] = []  # sort keys in git order
+        self.children: dict[bytes, _Dir] = {}  # loaded subdirectories by name
+        self.dirty = False
+        self.payload: bytes | None = None  # last serialized version in this pack
+        self.record: int | None = None
+
+    def set(self, mode: bytes, name: bytes, sha: bytes) -> None:
+        key = _sort_key(mode, name)
+        if key not in self.entries:
+            bisect.insort(self.keys, key)
+        self.entries[key] = tree_entry(mode, name, sha)
+
+    def serialize(self) -> bytes:
+        return b"".join(map(self.entries.__getitem__, self.keys))
+
+
+class TreeBuilder:
+    """Mutable view of a commit's tree that only re-serializes the directories a new
+    file touches. Seeded from the parent commit's root listing plus recursive listings
+    of the top-level directories that will receive files.
+    """
+
+    def __init__(self, pack: PackBuilder, root: Iterable[tuple], nested: Iterable[tuple] = ()):
+        self._pack = pack
+        self._root = _Dir()
+        dirs: dict[bytes, _Dir] = {b"": self._root}
+        for mode, _kind, sha, name in root:
+            self._root.set(mode, name, sha)
+        for mode, kind, sha, path in nested:
+            parent_path, _, name = path.rpartition(b"/")
+            parent = dirs[parent_path]
+            parent.set(mode, name, sha)
+            if kind == b"tree":
+                child = _Dir()
+                parent.children[name] = child
+                dirs[path] = child
+
+    def add_file(self, path: str, blob: bytes, mode: bytes = FILE_MODE) -> None:
+        *parts, name = path.encode("utf-8").split(b"/")
+        node = self._root
+        node.dirty = True
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Dir()
+                if _sort_key(TREE_MODE, part) not in node.entries:
+                    node.set(TREE_MODE, part, b"\0" * 20)
+            node = child
+            node.dirty = True
+        node.set(mode, name, blob)
+
+    def flush(self) -> bytes:
+        """Write every dirty directory bottom-up. Returns the raw root tree sha."""
+        return self._flush(self._root)
+
+    def _flush(self, node: _Dir) -> bytes:
+        for name, child in node.children.items():
+            if child.dirty:
+                node.set(TREE_MODE, name, self._flush(child))
+        payload = node.serialize()
+        base = (node.record, node.payload) if node.record is not None else None
+        sha, node.record = self._pack.add_tree(payload, base=base)  # type: ignore[arg-type]
+        node.payload = payload
+        node.dirty = False
+        return sha
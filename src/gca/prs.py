@@ -1,20 +1,89 @@
-"""Pull-request generation. Pull Shark + YOLO mechanics."""
+"""Pull-request generation. Pull Shark + YOLO mechanics.
+
+With the default `fast-import` engine (or `pack`) every PR branch is written straight
+into the object store, parented on the default-branch tip; the clone is never checked
+out and the index is never touched. `porcelain` keeps the old checkout + commit loop.
+
+`push_mode="atomic"` (the default) builds every branch first and sends them all in a
+single `git push --atomic`; PRs are opened only after that push lands. `per-pr` pushes
+each branch as soon as it is built.
+
+`lifecycle="rest"` (the default) opens and merges each PR with its own REST calls.
+`graphql` opens every pushed branch's PR with aliased `createPullRequest` mutations,
+then merges them all with aliased `mergePullRequest` mutations: a few requests in all.
+
+`merge_strategy="fast-forward"` skips the merge calls altogether: each PR branch is
+stacked on the previous one, and after the PRs are opened a single push fast-forwards
+the default branch to the last head whose PR (and every one before it) opened. GitHub
+marks a PR merged once its head commit reaches the base branch; one aliased query
+confirms it for all of them.
+
+Merges wait for GitHub to finish computing each new PR's mergeability (merging too early
+fails with 405/409). Every pending PR is polled in one aliased query per round; a PR that
+is still unknown backs off exponentially, up to a per-PR cap, and PRs that conflict or
+never settle are reported and left open. The time spent waiting is in the summary.
+
+Every run puts a short run id in its branch names (`gca/pr-<date>-<run>-<slug>`) and
+keeps it in a `PRRunJournal` until the repo finishes without errors. When a rerun of
+the same command finds that journal (and `resume` is on), the repo is reconciled with
+what the interrupted run left there: one `ls-remote` lists the `gca/pr-*` branches and
+a paginated call lists the PRs from them, and only that run's are considered. Slots
+(by date) that already have a merged PR are skipped and listed in the summary; open
+PRs and branches that were pushed but never got a PR are picked up instead of new
+ones. When nothing is left to build, the repo isn't cloned at all. A run that finished
+leaves no journal, so running the command again makes a fresh set of PRs.
+
+With `prune_merged`, each repo ends by deleting the `gca/pr-*` branches whose PRs are
+merged (see `prune`), in one push.
+
+The merge method is picked once per repo from what preflight learned about it: the
+requested one if the repo allows it, otherwise the first allowed of merge, squash,
+rebase (a linear-history rule rules out merge commits). Only when GitHub didn't say
+is a blocked squash/rebase retried as a merge commit, and the first method that works
+is used for the rest of the repo's PRs.
+"""
 
 from __future__ import annotations
 
 import datetime as dt
 import logging
 import random
+import re
+import time
 import uuid
-from dataclasses import dataclass
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 
-from gca import git_ops
-from gca.github_api import GitHubClient, MergeBlockedError, PRExistsError
+from gca import git_ops, mirrors, prune, telemetry
+from gca.github_api import (
+    GitHubClient,
+    GitHubError,
+    MergeBlockedError,
+    PRExistsError,
+    PullRef,
+    RepoCheck,
+    RepoRef,
+)
+from gca.journal import PRRunJournal, journal_key
+from gca.prune import BRANCH_PREFIX
 from gca.repo_spec import RepoSpec
 from gca.utils import load_commit_messages
 
 log = logging.getLogger("gca.prs")
 
+PUSH_MODES = ("atomic", "per-pr")
+LIFECYCLES = ("rest", "graphql")
+MERGE_STRATEGIES = ("api", "fast-forward")
+MERGE_METHODS = ("merge", "squash", "rebase")
+_BRANCH_RE = re.compile(rf"^{re.escape(BRANCH_PREFIX)}(\d{{4}}-\d{{2}}-\d{{2}})-([0-9a-f]{{6}})-")
+CONFIRM_ATTEMPTS = 3
+CONFIRM_DELAY = 2.0
+MERGEABLE_FIRST_DELAY = 1.0
+MERGEABLE_MAX_DELAY = 8.0
+MERGEABLE_TIMEOUT = 60.0  # per PR, from when its polling starts
+
 
 @dataclass
 class PROptions:
@@ -24,6 +93,14 @@ class PROptions:
     end: dt.date
     merge_method: str = "squash"
     coauthors: list[str] | None = None
+    engine: str = "fast-import"  # fast-import | pack | porcelain
+    clone_mode: str = "auto"  # see git_ops.CLONE_MODES
+    use_cache: bool = False  # borrow objects from the persistent mirror cache
+    push_mode: str = "atomic"  # atomic (one push for every branch) | per-pr
+    lifecycle: str = "rest"  # rest (per-PR calls) | graphql (batched mutations)
+    merge_strategy: str = "api"  # api (merge each PR) | fast-forward (one push to base)
+    prune_merged: bool = False  # afterwards, delete gca branches whose PRs are merged
+    resume: bool = True  # finish an interrupted run of the same command (see PRRunJournal)
     dry_run: bool = False
 
 
@@ -33,6 +110,19 @@ class PRSummary:
     created: int
     merged: int
     errors: list[str]
+    skipped: list[str] = field(default_factory=list)  # dates the interrupted run already merged
+    adopted: int = 0  # open PRs / pushed branches from an earlier run, reused
+    mergeable_wait_s: float = 0.0  # time spent waiting for GitHub to compute mergeability
+    pruned: int = 0  # merged gca branches deleted (with prune_merged)
+
+
+@dataclass
+class _PlannedPR:
+    slot: int
+    when_date: dt.date
+    title_msg: str
+    branch: str
+    head: str = ""  # tip commit once built (chained runs fast-forward to it)
 
 
 def _pr_dates(start: dt.date, end: dt.date, count: int) -> list[dt.date]:
@@ -47,12 +137,392 @@ def _pr_dates(start: dt.date, end: dt.date, count: int) -> list[dt.date]:
     return [start + dt.timedelta(days=round(i * total / (count - 1))) for i in range(count)]
 
 
+def _branch_specs(
+    when_date: dt.date, slug: str, slot: int, pr_msg: str, coauthors: Iterable[str]
+) -> list[git_ops.CommitSpec]:
+    """Plan the 1-3 backdated commits that make up one PR branch."""
+    specs: list[git_ops.CommitSpec] = []
+    for k in range(random.randint(1, 3)):
+        when = dt.datetime.combine(
+            when_date,
+            dt.time(hour=10 + k, minute=random.randint(0, 59)),
+            tzinfo=dt.timezone.utc,
+        )
+        specs.append(
+            git_ops.CommitSpec(
+                file_name=f".gca/prs/{when_date.isoformat()}-{slug}-{k+1}.md",
+                file_content=f"# {pr_msg}\n\nPR slot {slot}, commit {k+1}\n",
+                message=f"{pr_msg} (part {k+1})",
+                when=when,
+                coauthors=tuple(coauthors),
+            )
+        )
+    return specs
+
+
+@dataclass
+class _Existing:
+    """What earlier runs left in a repo, by slot date."""
+
+    merged: Counter[dt.date] = field(default_factory=Counter)
+    open: defaultdict[dt.date, list[PullRef]] = field(default_factory=lambda: defaultdict(list))
+    orphans: defaultdict[dt.date, list[str]] = field(default_factory=lambda: defaultdict(list))
+
+
+def _run_key(opts: PROptions, spec: RepoSpec) -> str:
+    return journal_key("prs", spec.full, opts.start, opts.end, opts.count, sorted(opts.coauthors or ()))
+
+
+def _slot_date(branch: str, run_id: str) -> dt.date | None:
+    """The slot date of one of run `run_id`'s branches; None for anything else."""
+    m = _BRANCH_RE.match(branch)
+    if m is None or m.group(2) != run_id:
+        return None
+    try:
+        return dt.date.fromisoformat(m.group(1))
+    except ValueError:
+        return None
+
+
+def _reconcile(client: GitHubClient, repo: RepoRef, url: str, cwd, run_id: str) -> _Existing:
+    """List run `run_id`'s branches (one ls-remote) and PRs (paginated) by slot date.
+
+    Merged PRs fill their slot. Open PRs and pushed branches that never got a PR (an
+    interrupted run) can be picked up instead of building new ones; closed, unmerged
+    PRs are left alone.
+    """
+    refs = git_ops.ls_remote(url, [f"refs/heads/{BRANCH_PREFIX}*"], cwd=cwd)
+    pulls = client.list_pull_requests(repo, head_prefix=BRANCH_PREFIX)
+    existing = _Existing()
+    for pull in pulls:
+        when = _slot_date(pull.head, run_id)
+        if when is None:
+            continue
+        if pull.merged:
+            existing.merged[when] += 1
+        elif pull.state == "open":
+            existing.open[when].append(pull)
+    with_pr = {pull.head for pull in pulls}
+    for ref in sorted(refs):
+        branch = ref.removeprefix("refs/heads/")
+        when = _slot_date(branch, run_id)
+        if when is not None and branch not in with_pr:
+            existing.orphans[when].append(branch)
+    log.info(
+        "%s: run %s left %d merged, %d open PRs, %d branches without a PR",
+        repo.full,
+        run_id,
+        sum(existing.merged.values()),
+        sum(map(len, existing.open.values())),
+        sum(map(len, existing.orphans.values())),
+    )
+    return existing
+
+
+def _plan_slots(
+    dates: list[dt.date], existing: _Existing, messages: list[str], chained: bool, summary: PRSummary
+) -> tuple[list[tuple[int, dt.date]], list[PullRef], list[_PlannedPR]]:
+    """Split the slots into (to build, open PRs to adopt, orphan branches to adopt).
+
+    A slot whose date already has a merged PR is skipped. Chained (fast-forward) runs
+    only skip: earlier branches aren't stacked on the new ones, so they can't be adopted.
+    """
+    todo: list[tuple[int, dt.date]] = []
+    adopted: list[PullRef] = []
+    orphans: list[_PlannedPR] = []
+    for i, when_date in enumerate(dates, start=1):
+        if existing.merged[when_date]:
+            existing.merged[when_date] -= 1
+            summary.skipped.append(when_date.isoformat())
+        elif not chained and existing.open[when_date]:
+            adopted.append(existing.open[when_date].pop(0))
+            summary.adopted += 1
+        elif not chained and existing.orphans[when_date]:
+            branch = existing.orphans[when_date].pop(0)
+            orphans.append(_PlannedPR(i, when_date, random.choice(messages), branch))
+            summary.adopted += 1
+        else:
+            todo.append((i, when_date))
+    return todo, adopted, orphans
+
+
+def _pr_title(pr: _PlannedPR) -> str:
+    return f"{pr.title_msg} ({pr.when_date.isoformat()})"
+
+
+def _pr_body(pr: _PlannedPR) -> str:
+    return f"Automated PR backdated to {pr.when_date.isoformat()}."
+
+
+def _merge_methods(repo: RepoRef, preferred: str) -> tuple[str, ...]:
+    """Methods to try, in order, for this repo's PRs; empty when the repo allows none."""
+    for method in dict.fromkeys((preferred, *MERGE_METHODS)):
+        if repo.allows(method):
+            return (method,)
+    # GitHub didn't say: try the preferred method, falling back to a merge commit
+    return tuple(m for m in dict.fromkeys((preferred, "merge")) if repo.allows(m) is not False)
+
+
+def _open_pr(client: GitHubClient, repo, pr: _PlannedPR, summary: PRSummary) -> int | None:
+    try:
+        number = client.create_pull_request(
+            repo,
+            head=pr.branch,
+            title=_pr_title(pr),
+            body=_pr_body(pr),
+        )
+    except PRExistsError as e:
+        summary.errors.append(f"PR {pr.slot}: already exists ({e})")
+        return None
+    summary.created += 1
+    return number
+
+
+def _merge(
+    client: GitHubClient, repo, number: int, methods: tuple[str, ...], summary: PRSummary
+) -> str | None:
+    """Merge one PR with the first of `methods` that works; returns that method."""
+    blocked: MergeBlockedError | None = None
+    for method in methods:
+        try:
+            client.merge_pull_request(repo, number, method=method)
+        except MergeBlockedError as e:
+            blocked = e
+            continue
+        summary.merged += 1
+        return method
+    summary.errors.append(f"PR #{number}: merge blocked: {blocked}")
+    return None
+
+
+def _await_mergeable(
+    client: GitHubClient, repo, numbers: list[int], summary: PRSummary
+) -> list[int]:
+    """Poll until GitHub has computed each PR's mergeability; returns the mergeable ones.
+
+    Each round checks every due PR in one query. A PR that is still UNKNOWN is next
+    checked after a delay that doubles each time (up to MERGEABLE_MAX_DELAY), until
+    MERGEABLE_TIMEOUT. Conflicting and timed-out PRs are recorded as errors.
+    """
+    start = now = time.monotonic()
+    due = dict.fromkeys(numbers, start)  # number -> when to check it next
+    delay = dict.fromkeys(numbers, MERGEABLE_FIRST_DELAY)
+    ready: set[int] = set()
+    while due:
+        wake = min(due.values())
+        if wake > now:
+            time.sleep(wake - now)
+            now = max(time.monotonic(), wake)
+        batch = [n for n, at in due.items() if at <= now]
+        states = client.pull_requests_mergeable(repo, batch)
+        now = max(time.monotonic(), now)  # the query itself takes time
+        for number in batch:
+            state = states.get(number, "UNKNOWN")
+            if state == "MERGEABLE":
+                ready.add(number)
+            elif state == "CONFLICTING":
+                summary.errors.append(f"PR #{number}: not mergeable (conflicts with base)")
+            elif now - start >= MERGEABLE_TIMEOUT:
+                summary.errors.append(
+                    f"PR #{number}: mergeability still unknown after {now - start:.0f}s; left open"
+                )
+            else:
+                due[number] = now + delay[number]
+                delay[number] = min(delay[number] * 2, MERGEABLE_MAX_DELAY)
+                continue
+            del due[number]
+    summary.mergeable_wait_s = round(summary.mergeable_wait_s + now - start, 1)
+    return [n for n in numbers if n in ready]
+
+
+def _open_and_merge(
+    client: GitHubClient,
+    repo,
+    prs: list[_PlannedPR],
+    methods: tuple[str, ...],
+    summary: PRSummary,
+    adopted: Sequence[PullRef] = (),
+) -> None:
+    """The `rest` lifecycle: open each PR, wait until they are mergeable, merge each.
+
+    `adopted` PRs were opened by an earlier run and only need merging.
+    """
+    numbers = [pull.number for pull in adopted]
+    for pr in prs:
+        try:
+            number = _open_pr(client, repo, pr, summary)
+        except Exception as e:
+            summary.errors.append(f"PR {pr.slot}: {type(e).__name__}: {e}")
+            log.exception("PR loop failed")
+            continue
+        if number is not None:
+            numbers.append(number)
+    if not numbers:
+        return
+    for number in _await_mergeable(client, repo, numbers, summary):
+        try:
+            worked = _merge(client, repo, number, methods, summary)
+        except Exception as e:
+            summary.errors.append(f"PR #{number}: {type(e).__name__}: {e}")
+            log.exception("PR loop failed")
+            continue
+        if worked:
+            methods = (worked,)  # learned: later PRs skip the blocked ones
+
+
+def _open_batched(
+    client: GitHubClient, check: RepoCheck, prs: list[_PlannedPR], summary: PRSummary
+) -> list[tuple[int, str] | None]:
+    """Open every PR with aliased mutations; returns (number, node_id), or None, per PR."""
+    results = client.create_pull_requests(
+        check.node_id,
+        check.repo.default_branch,
+        [(pr.branch, _pr_title(pr), _pr_body(pr)) for pr in prs],
+    )
+    opened: list[tuple[int, str] | None] = []
+    for pr, res in zip(prs, results, strict=True):
+        if isinstance(res, PRExistsError):
+            summary.errors.append(f"PR {pr.slot}: already exists ({res})")
+        elif isinstance(res, GitHubError):
+            summary.errors.append(f"PR {pr.slot}: {type(res).__name__}: {res}")
+        else:
+            summary.created += 1
+            opened.append(res)
+            continue
+        opened.append(None)
+    return opened
+
+
+def _open_and_merge_batched(
+    client: GitHubClient,
+    check: RepoCheck,
+    prs: list[_PlannedPR],
+    methods: tuple[str, ...],
+    summary: PRSummary,
+    adopted: Sequence[PullRef] = (),
+) -> None:
+    """The `graphql` lifecycle: open every PR, then merge them, each phase batched.
+
+    `adopted` PRs were opened by an earlier run and only need merging.
+    """
+    pending = [(pull.number, pull.node_id) for pull in adopted]
+    if prs:
+        pending += [res for res in _open_batched(client, check, prs, summary) if res]
+    if pending:
+        ready = set(_await_mergeable(client, check.repo, [n for n, _ in pending], summary))
+        pending = [(n, node) for n, node in pending if n in ready]
+
+    # same fallback as the REST path: what one method can't merge is retried with the next
+    blocked: list[tuple[int, GitHubError]] = []
+    for method in methods:
+        if not pending:
+            break
+        outcomes = client.merge_pull_requests([node for _, node in pending], method=method)
+        retry, blocked = [], []
+        for (number, node), err in zip(pending, outcomes, strict=True):
+            if err is None:
+                summary.merged += 1
+            elif isinstance(err, MergeBlockedError):
+                retry.append((number, node))
+                blocked.append((number, err))
+            else:
+                summary.errors.append(f"PR #{number}: {type(err).__name__}: {err}")
+        pending = retry
+    for number, err in blocked:
+        summary.errors.append(f"PR #{number}: merge blocked: {err}")
+
+
+def _fast_forward(
+    client: GitHubClient,
+    repo_dir,
+    check: RepoCheck,
+    prs: list[_PlannedPR],
+    opts: PROptions,
+    summary: PRSummary,
+) -> None:
+    """The `fast-forward` strategy: open the chained PRs, then push the last head to base.
+
+    Each PR head is an ancestor of the next, so one push moves the default branch through
+    all of them and GitHub marks each PR merged on its own; one query confirms it. The
+    push stops at the last PR opened before the first one that failed: every later head
+    carries that one's commits, which must not reach the base without a PR.
+    """
+    repo = check.repo
+    if opts.lifecycle == "graphql":
+        numbers = [res[0] if res else None for res in _open_batched(client, check, prs, summary)]
+    else:
+        numbers = []
+        for pr in prs:
+            try:
+                number = _open_pr(client, repo, pr, summary)
+            except GitHubError as e:
+                summary.errors.append(f"PR {pr.slot}: {type(e).__name__}: {e}")
+                number = None
+            numbers.append(number)
+            if number is None:
+                break  # the rest can't be fast-forwarded; don't open PRs for them
+    opened = next((i for i, n in enumerate(numbers) if n is None), len(numbers))
+    for pr in prs[opened + 1 :]:
+        summary.errors.append(f"PR {pr.slot}: not merged: an earlier PR in the chain failed to open")
+    if not opened:
+        return
+    confirm = [n for n in numbers[:opened] if n is not None]
+    try:
+        git_ops.push_commit(repo_dir, prs[opened - 1].head, repo.default_branch)
+    except git_ops.GitError as e:
+        # rejected (protected branch, or someone pushed meanwhile): the PRs stay open
+        summary.errors.append(f"fast-forward of {repo.default_branch} failed: {e}")
+        return
+    merged: dict[int, bool] = {}
+    for attempt in range(CONFIRM_ATTEMPTS):
+        if attempt:
+            time.sleep(CONFIRM_DELAY)  # GitHub settles merged state shortly after the push
+        merged = client.pull_requests_merged(repo, confirm)
+        if all(merged.values()):
+            break
+    summary.merged += sum(merged.values())
+    for number, ok in merged.items():
+        if not ok:
+            summary.errors.append(f"PR #{number}: not marked merged after fast-forward")
+
+
+def _prune(client: GitHubClient, repo: RepoRef, url: str, cwd, summary: PRSummary) -> None:
+    """The `prune_merged` step: delete this and earlier runs' merged branches."""
+    result = prune.PruneSummary(repo=repo.full)
+    try:
+        prune.prune_repo(client, repo, url, cwd, result)
+    except (GitHubError, git_ops.GitError) as e:
+        result.errors.append(str(e))
+    summary.pruned = result.deleted
+    summary.errors.extend(f"prune: {e}" for e in result.errors)
+
+
 def run(client: GitHubClient, opts: PROptions) -> list[PRSummary]:
     if opts.count < 1:
         raise ValueError("count must be >= 1")
+    if opts.engine not in git_ops.ENGINES:
+        raise ValueError(f"unknown commit engine: {opts.engine!r}")
+    if opts.clone_mode not in git_ops.CLONE_MODES:
+        raise ValueError(f"unknown clone mode: {opts.clone_mode!r}")
+    if opts.push_mode not in PUSH_MODES:
+        raise ValueError(f"unknown push mode: {opts.push_mode!r}")
+    if opts.lifecycle not in LIFECYCLES:
+        raise ValueError(f"unknown PR lifecycle: {opts.lifecycle!r}")
+    if opts.merge_strategy not in MERGE_STRATEGIES:
+        raise ValueError(f"unknown merge strategy: {opts.merge_strategy!r}")
+    if opts.merge_method not in MERGE_METHODS:
+        raise ValueError(f"unknown merge method: {opts.merge_method!r}")
     messages = load_commit_messages()
     summaries: list[PRSummary] = []
     username = client.whoami() if not opts.dry_run else "dry-run-user"
+    try:
+        checks = client.preflight(opts.repos, need_push=True) if not opts.dry_run else {}
+    except GitHubError as e:
+        log.error("preflight failed: %s", e)
+        return [
+            PRSummary(repo=s.full, created=0, merged=0, errors=[f"preflight: {e}"])
+            for s in opts.repos
+        ]
 
     for spec in opts.repos:
         summary = PRSummary(repo=spec.full, created=0, merged=0, errors=[])
@@ -62,61 +532,112 @@ def run(client: GitHubClient, opts: PROptions) -> list[PRSummary]:
                 summary.merged = opts.count
                 summaries.append(summary)
                 continue
-            repo = client.get_repo(spec.owner, spec.name)
-            with git_ops.temp_workdir(prefix=f"gca-prs-{spec.name}-") as base:
-                repo_dir = git_ops.clone(spec.auth_clone_url(client.token), base / spec.name)
-                default_branch = git_ops.detect_default_branch(repo_dir)
-
+            check = checks[spec.full]
+            if check.problem:
+                summary.errors.append(f"preflight: {check.problem}")
+                summaries.append(summary)
+                continue
+            repo = check.repo
+            chained = opts.merge_strategy == "fast-forward"
+            methods = _merge_methods(repo, opts.merge_method)
+            if not chained and not methods:
+                summary.errors.append(f"preflight: {spec.full} allows no merge method")
+                summaries.append(summary)
+                continue
+            if repo.required_reviews:
+                log.warning(
+                    "%s: %s requires %d approving review(s); merges may be blocked",
+                    spec.full,
+                    repo.default_branch,
+                    repo.required_reviews,
+                )
+            url = spec.auth_clone_url(client.token)
+            with (
+                telemetry.scope(flow="prs", repo=spec.full),
+                git_ops.temp_workdir(prefix=f"gca-prs-{spec.name}-") as base,
+                ExitStack() as stack,
+            ):
                 dates = _pr_dates(opts.start, opts.end, opts.count)
-                for i, when_date in enumerate(dates, start=1):
+                key = _run_key(opts, spec)
+                journal = PRRunJournal.load(key) if opts.resume else None
+                if journal is not None:
+                    log.info("%s: resuming interrupted run %s", spec.full, journal.run_id)
+                    existing = _reconcile(client, repo, url, base, journal.run_id)
+                else:
+                    journal = PRRunJournal(key, spec.full, uuid.uuid4().hex[:6])
+                    journal.save()
+                    existing = _Existing()
+                todo, adopted, orphans = _plan_slots(dates, existing, messages, chained, summary)
+                if summary.skipped:
+                    log.info("%s: already merged, skipping %s", spec.full, ", ".join(summary.skipped))
+
+                tip = ""  # what the next branch is parented on, when chained
+                built: list[_PlannedPR] = []
+                if todo:
+                    # the mirror is only fetched (and held) once there is a branch to build
+                    reference = stack.enter_context(
+                        mirrors.borrow(spec, url, enabled=opts.use_cache)
+                    )
+                    mode = git_ops.resolve_clone_mode(
+                        opts.clone_mode, size_kb=repo.size_kb, engine=opts.engine
+                    )
+                    repo_dir = git_ops.clone(
+                        url,
+                        base / spec.name,
+                        mode=mode,
+                        checkout=opts.engine == "porcelain",
+                        reference=reference,
+                    )
+                    default_branch = git_ops.detect_default_branch(repo_dir)
+                    base_sha = git_ops.rev_parse(repo_dir, f"refs/remotes/origin/{default_branch}")
+                    tip = base_sha
+
+                for i, when_date in todo:
                     pr_msg = random.choice(messages)
                     slug = uuid.uuid4().hex[:8]
-                    branch = f"gca/pr-{when_date.isoformat()}-{slug}"
+                    pr = _PlannedPR(i, when_date, pr_msg, f"{BRANCH_PREFIX}{when_date.isoformat()}-{journal.run_id}-{slug}")
                     try:
-                        git_ops.checkout(repo_dir, default_branch)
-                        git_ops.ensure_branch(repo_dir, branch, base=default_branch)
-                        for k in range(random.randint(1, 3)):
-                            when = dt.datetime.combine(
-                                when_date,
-                                dt.time(hour=10 + k, minute=random.randint(0, 59)),
-                                tzinfo=dt.timezone.utc,
-                            )
-                            git_ops.backdated_commit(
-                                repo_dir,
-                                file_name=f".gca/prs/{when_date.isoformat()}-{slug}-{k+1}.md",
-                                file_content=f"# {pr_msg}\n\nPR slot {i}, commit {k+1}\n",
-                                message=f"{pr_msg} (part {k+1})",
-                                when=when,
-                                coauthors=opts.coauthors or (),
-                            )
-                        git_ops.push(repo_dir, branch, set_upstream=True)
-                        try:
-                            number = client.create_pull_request(
-                                repo,
-                                head=branch,
-                                title=f"{pr_msg} ({when_date.isoformat()})",
-                                body=f"Automated PR backdated to {when_date.isoformat()}.",
-                            )
-                        except PRExistsError as e:
-                            summary.errors.append(f"PR {i}: already exists ({e})")
-                            continue
-                        summary.created += 1
-                        try:
-                            client.merge_pull_request(repo, number, method=opts.merge_method)
-                            summary.merged += 1
-                        except MergeBlockedError as e:
-                            # try fallback to merge commit if user picked squash and squash is blocked
-                            if opts.merge_method != "merge":
-                                try:
-                                    client.merge_pull_request(repo, number, method="merge")
-                                    summary.merged += 1
-                                except MergeBlockedError as e2:
-                                    summary.errors.append(f"PR #{number}: merge blocked: {e2}")
-                            else:
-                                summary.errors.append(f"PR #{number}: merge blocked: {e}")
+                        specs = _branch_specs(when_date, slug, i, pr_msg, opts.coauthors or ())
+                        shas = git_ops.write_commits(
+                            repo_dir,
+                            pr.branch,
+                            specs,
+                            base=tip if chained else base_sha,
+                            engine=opts.engine,
+                        )
+                        if opts.push_mode == "per-pr":
+                            git_ops.push(repo_dir, pr.branch, set_upstream=True)
+                        pr.head = tip = shas[-1]
+                        built.append(pr)
                     except Exception as e:
                         summary.errors.append(f"PR {i}: {type(e).__name__}: {e}")
                         log.exception("PR loop failed")
+
+                if opts.push_mode == "atomic" and built:
+                    try:
+                        git_ops.push_refs(repo_dir, [pr.branch for pr in built], atomic=True)
+                    except Exception as e:
+                        # all-or-nothing: none of the branches reached the remote
+                        for pr in built:
+                            summary.errors.append(f"PR {pr.slot}: push failed: {e}")
+                        log.error("atomic push failed for %s: %s", spec.full, e)
+                        built = []
+                built.extend(orphans)  # already on the remote: they only need their PR
+
+                if chained:
+                    if built:
+                        _fast_forward(client, repo_dir, check, built, opts, summary)
+                elif opts.lifecycle == "graphql":
+                    if built or adopted:
+                        _open_and_merge_batched(client, check, built, methods, summary, adopted)
+                else:
+                    if built or adopted:
+                        _open_and_merge(client, repo, built, methods, summary, adopted)
+
+                if opts.prune_merged:
+                    _prune(client, repo, url, base, summary)
+                if not summary.errors:
+                    journal.discard()  # finished: the next run starts fresh
         except Exception as e:
             summary.errors.append(f"setup: {type(e).__name__}: {e}")
             log.exception("PR run failed for %s", spec.full)
@@ -0,0 +1,123 @@
+"""Delete `gca/pr-*` branches whose PRs are merged.
+
+Nothing else removes them, and every stale ref is advertised on each later clone,
+fetch and push. Per repo this takes one `ls-remote` (the branches and their tips), one
+paginated PR listing (their merged state), and one push of `:refs/heads/...` deletion
+refspecs per DELETE_BATCH branches, sent from an empty scratch repo so nothing is
+cloned.
+
+A branch is only deleted when a merged PR has it as head at exactly the tip the
+remote still has, and no open PR uses it: branches that moved on since, or that
+never got a PR, are kept.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+from gca import git_ops, telemetry
+from gca.github_api import GitHubClient, GitHubError, PullRef, RepoRef
+from gca.repo_spec import RepoSpec
+
+log = logging.getLogger("gca.prune")
+
+BRANCH_PREFIX = "gca/pr-"  # every branch `prs` creates starts with this
+DELETE_BATCH = 200  # refspecs per push; keeps the command line short on every platform
+
+
+@dataclass
+class PruneOptions:
+    repos: list[RepoSpec]
+    dry_run: bool = False  # list what would be deleted, delete nothing
+
+
+@dataclass
+class PruneSummary:
+    repo: str
+    branches: int = 0  # gca branches on the remote
+    merged: int = 0  # of those, safe to delete
+    deleted: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def merged_branches(refs: Mapping[str, str], pulls: Sequence[PullRef]) -> list[str]:
+    """Branches (from `refs`, {ref: sha}) whose merged PR's head is still their tip."""
+    by_head: defaultdict[str, list[PullRef]] = defaultdict(list)
+    for pull in pulls:
+        by_head[pull.head].append(pull)
+    stale: list[str] = []
+    for ref, sha in sorted(refs.items()):
+        branch = ref.removeprefix("refs/heads/")
+        heads = by_head.get(branch, [])
+        if any(p.state == "open" for p in heads):
+            continue
+        if any(p.merged and p.head_sha == sha for p in heads):
+            stale.append(branch)
+    return stale
+
+
+def prune_repo(
+    client: GitHubClient,
+    repo: RepoRef,
+    url: str,
+    cwd,
+    summary: PruneSummary,
+    *,
+    dry_run: bool = False,
+) -> None:
+    """Find and delete `repo`'s merged gca branches, counting into `summary`."""
+    refs = git_ops.ls_remote(url, [f"refs/heads/{BRANCH_PREFIX}*"], cwd=cwd)
+    summary.branches = len(refs)
+    if not refs:
+        return
+    stale = merged_branches(refs, client.list_pull_requests(repo, head_prefix=BRANCH_PREFIX))
+    summary.merged = len(stale)
+    if dry_run:
+        return
+    for start in range(0, len(stale), DELETE_BATCH):
+        chunk = stale[start : start + DELETE_BATCH]
+        try:
+            git_ops.delete_remote_branches(url, chunk, cwd=cwd)
+        except git_ops.GitError as e:
+            summary.errors.append(f"deleting {len(chunk)} branches failed: {e}")
+            continue
+        summary.deleted += len(chunk)
+    log.info("%s: deleted %d of %d gca branches", repo.full, summary.deleted, summary.branches)
+
+
+def run(client: GitHubClient, opts: PruneOptions) -> list[PruneSummary]:
+    try:
+        checks = client.preflight(opts.repos, need_push=not opts.dry_run)
+    except GitHubError as e:
+        log.error("preflight failed: %s", e)
+        return [PruneSummary(repo=s.full, errors=[f"preflight: {e}"]) for s in opts.repos]
+
+    summaries: list[PruneSummary] = []
+    for spec in opts.repos:
+        summary = PruneSummary(repo=spec.full)
+        try:
+            check = checks[spec.full]
+            if check.problem:
+                summary.errors.append(f"preflight: {check.problem}")
+                summaries.append(summary)
+                continue
+            with (
+                telemetry.scope(flow="prune", repo=spec.full),
+                git_ops.temp_workdir(prefix=f"gca-prune-{spec.name}-") as base,
+            ):
+                prune_repo(
+                    client,
+                    check.repo,
+                    spec.auth_clone_url(client.token),
+                    base,
+                    summary,
+                    dry_run=opts.dry_run,
+                )
+        except Exception as e:
+            summary.errors.append(f"setup: {type(e).__name__}: {e}")
+            log.exception("prune failed for %s", spec.full)
+        summaries.append(summary)
+    return summaries
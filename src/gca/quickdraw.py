@@ -6,7 +6,7 @@ import logging
 import time
 from dataclasses import dataclass, field
 
-from gca.github_api import GitHubClient
+from gca.github_api import GitHubClient, GitHubError
 from gca.repo_spec import RepoSpec
 
 log = logging.getLogger("gca.quickdraw")
@@ -42,6 +42,12 @@ def run(client: GitHubClient, opts: QuickdrawOptions) -> list[QuickdrawSummary]:
     if opts.pause_seconds < 0 or opts.pause_seconds > 280:
         raise ValueError("pause_seconds must be in [0, 280]; Quickdraw requires <5 min total")
 
+    try:
+        checks = client.preflight(opts.repos) if not opts.dry_run else {}
+    except GitHubError as e:
+        log.error("preflight failed: %s", e)
+        return [QuickdrawSummary(repo=s.full, errors=[f"preflight: {e}"]) for s in opts.repos]
+
     summaries: list[QuickdrawSummary] = []
     for spec in opts.repos:
         summary = QuickdrawSummary(repo=spec.full)
@@ -51,7 +57,12 @@ def run(client: GitHubClient, opts: QuickdrawOptions) -> list[QuickdrawSummary]:
                 summary.closed = opts.count
                 summaries.append(summary)
                 continue
-            repo = client.get_repo(spec.owner, spec.name)
+            check = checks[spec.full]
+            if check.problem:
+                summary.errors.append(f"preflight: {check.problem}")
+                summaries.append(summary)
+                continue
+            repo = check.repo
             for i in range(opts.count):
                 title = f"{ISSUE_TITLES[i % len(ISSUE_TITLES)]} (#{i+1})"
                 try:
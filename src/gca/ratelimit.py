@@ -0,0 +1,382 @@
+"""Proactive GitHub rate-limit governor.
+
+Every response's `x-ratelimit-*` headers are fed back into a `RateGovernor`, which
+keeps one bucket per GitHub resource (`core`, `graphql` points, `search`, ...). Before
+each request it decides how long to wait:
+
+- a resource with nothing left waits for its reset;
+- a resource running low is paced so the remainder spreads evenly until the reset;
+- content-creating requests (REST writes, GraphQL mutations) also draw from two token
+  buckets sized to GitHub's secondary limits (80/minute, 500/hour);
+- a `Retry-After` from any response holds every request until it has passed.
+
+Requests are counted against a bucket optimistically before they are sent, so
+threads sharing a governor can't all spend the last unit at once. One governor is
+shared per token (`shared_governor`), so concurrent flows draw from one budget.
+
+Separate gca processes using the same token coordinate through a `RateLedger`: a
+file-locked JSON file under `<cache_dir>/ratelimit/`, named by a hash of the token.
+Each governor merges the ledger in before planning a request and writes its view back
+afterwards, so parallel cron jobs see each other's spending instead of stampeding.
+The token itself is never written anywhere.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any
+
+from gca import config
+from gca.utils import FileLock
+
+log = logging.getLogger("gca.ratelimit")
+
+RATE_SLEEP_CAP = 300  # never sleep more than 5 min for a single request
+PACE_BELOW = 0.1  # start spreading requests out once <10% of a bucket is left
+CONTENT_PER_MINUTE = 80
+CONTENT_PER_HOUR = 500
+CONTENT_BURST = 20
+WRITE_METHODS = frozenset({"POST", "PATCH", "PUT", "DELETE"})
+_ALIASED_FIELD_RE = re.compile(r"^\s*\w+\s*:\s*\w+\s*\(", re.MULTILINE)
+
+
+@dataclass
+class RateBucket:
+    """Last known server-side state of one resource."""
+
+    resource: str
+    limit: int | None = None
+    remaining: int | None = None
+    used: int | None = None
+    reset: float | None = None  # epoch seconds
+    last_sent: float = 0.0
+
+
+@dataclass
+class GovernorState:
+    buckets: dict[str, RateBucket]
+    content_tokens_minute: float
+    content_tokens_hour: float
+    blocked_until: float
+    waited_s: float
+
+
+class _TokenBucket:
+    def __init__(self, per_second: float, capacity: float):
+        self.rate = per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp: float | None = None
+
+    def refill(self, now: float) -> None:
+        if self.stamp is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, now: float, n: int = 1) -> float:
+        """Reserve `n` tokens; return seconds until they are actually available."""
+        self.refill(now)
+        self.tokens -= n
+        return max(0.0, -self.tokens / self.rate)
+
+    def merge(self, tokens: float, stamp: float, now: float) -> None:
+        """Adopt another holder's view of the same budget if it has spent more."""
+        self.refill(now)
+        theirs = min(self.capacity, tokens + max(0.0, now - stamp) * self.rate)
+        self.tokens = min(self.tokens, theirs)
+
+
+def _int(headers: Mapping[str, str], name: str) -> int | None:
+    v = headers.get(name)
+    return int(v) if v is not None and v.strip().lstrip("-").isdigit() else None
+
+
+def resource_for(url: str) -> str:
+    """Best guess at the rate-limit resource a URL is billed to (before the response says)."""
+    path = url.split("?", 1)[0]
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in path:
+        return "search"
+    return "core"
+
+
+def is_content_request(method: str, url: str, payload: Any = None) -> bool:
+    """Writes that count toward GitHub's secondary content-creation limits."""
+    if resource_for(url) == "graphql":
+        query = payload.get("query", "") if isinstance(payload, dict) else ""
+        return query.lstrip().startswith("mutation")
+    return method.upper() in WRITE_METHODS
+
+
+def content_units(method: str, url: str, payload: Any = None) -> int:
+    """How many content-creating operations a request performs.
+
+    A GraphQL document with several aliased mutation fields (`m0: createDiscussion(...)`)
+    counts each one, since GitHub's secondary limits do.
+    """
+    if not is_content_request(method, url, payload):
+        return 0
+    if resource_for(url) == "graphql":
+        return max(1, len(_ALIASED_FIELD_RE.findall(payload.get("query", ""))))
+    return 1
+
+
+def _merge_bucket(b: RateBucket, d: Mapping[str, Any]) -> None:
+    """Fold another process's record for the same resource into `b`.
+
+    A later reset means a newer window and wins outright. Within a window, a higher
+    server-reported `used` is the more recent observation and wins; on a tie the lower
+    `remaining` wins, since it includes more requests reserved but not yet answered.
+    """
+    reset, remaining, used = d.get("reset"), d.get("remaining"), d.get("used")
+    if reset is not None and remaining is not None:
+        newer_window = b.reset is None or b.remaining is None or reset > b.reset
+        same_window = not newer_window and reset == b.reset
+        if newer_window or (same_window and used is not None and used > (b.used or 0)):
+            b.reset, b.remaining = float(reset), int(remaining)
+            b.limit, b.used = d.get("limit") or b.limit, used
+        elif same_window and (used is None or used == b.used):
+            b.remaining = min(b.remaining, int(remaining))
+    b.last_sent = max(b.last_sent, float(d.get("last_sent") or 0.0))
+
+
+class RateLedger:
+    """Last known rate-limit state for one token, shared by every gca process on the host."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+
+    @classmethod
+    def for_token(cls, token: str) -> RateLedger:
+        return cls(config.cache_dir() / "ratelimit" / f"{token_key(token)}.json")
+
+    def read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.debug("ignoring unreadable rate ledger %s: %s", self.path, e)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict) -> None:
+        tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.debug("could not update rate ledger %s: %s", self.path, e)
+            with suppress(OSError):
+                tmp.unlink()
+
+    @contextmanager
+    def transaction(self) -> Iterator[dict | None]:
+        """Yield the ledger contents under an exclusive lock and write them back after.
+
+        Yields None (and the caller carries on with local state only) if the ledger
+        can't be locked, e.g. on a read-only cache dir.
+        """
+        lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        try:
+            lock.acquire()
+        except OSError as e:
+            log.debug("rate ledger %s unavailable: %s", self.path, e)
+            yield None
+            return
+        try:
+            data = self.read()
+            yield data
+            self._write(data)
+        finally:
+            lock.release()
+
+
+def token_key(token: str) -> str:
+    """Stable, non-reversible id for a token (safe to log or use as a file name)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+class RateGovernor:
+    def __init__(
+        self,
+        *,
+        content_per_minute: int = CONTENT_PER_MINUTE,
+        content_per_hour: int = CONTENT_PER_HOUR,
+        content_burst: int = CONTENT_BURST,
+        ledger: RateLedger | None = None,
+    ):
+        self.ledger = ledger
+        self._lock = threading.Lock()
+        self._buckets: dict[str, RateBucket] = {}
+        self._minute = _TokenBucket(content_per_minute / 60, min(content_burst, content_per_minute))
+        self._hour = _TokenBucket(content_per_hour / 3600, content_per_hour)
+        self._blocked_until = 0.0
+        self._waited = 0.0
+
+    def _bucket(self, resource: str) -> RateBucket:
+        b = self._buckets.get(resource)
+        if b is None:
+            b = self._buckets[resource] = RateBucket(resource)
+        return b
+
+    def _plan(self, method: str, url: str, payload: Any) -> float:
+        """Reserve a slot for the request and return how long to wait first. Lock held."""
+        now = time.time()
+        waits = [self._blocked_until - now]
+        b = self._bucket(resource_for(url))
+        if b.remaining is not None and b.reset is not None and b.reset > now:
+            if b.remaining <= 0:
+                waits.append(b.reset - now + 1)
+            elif b.limit and b.remaining < b.limit * PACE_BELOW:
+                spacing = (b.reset - now) / b.remaining
+                waits.append(b.last_sent + spacing - now)
+            b.remaining -= 1
+        units = content_units(method, url, payload)
+        if units:
+            waits.append(self._minute.take(now, units))
+            waits.append(self._hour.take(now, units))
+        wait = min(max(0.0, *waits), RATE_SLEEP_CAP)
+        b.last_sent = now + wait
+        return wait
+
+    @contextmanager
+    def _synced(self) -> Iterator[None]:
+        """Merge the ledger in, let the caller change state, then publish it. Lock held."""
+        if self.ledger is None:
+            yield
+            return
+        with self.ledger.transaction() as data:
+            if data is None:
+                yield
+                return
+            now = time.time()
+            for resource, d in (data.get("buckets") or {}).items():
+                _merge_bucket(self._bucket(resource), d)
+            content = data.get("content") or {}
+            for name, bucket in (("minute", self._minute), ("hour", self._hour)):
+                if name in content:
+                    bucket.merge(*content[name], now)
+            self._blocked_until = max(self._blocked_until, float(data.get("blocked_until") or 0))
+            yield
+            data["buckets"] = {
+                k: {
+                    "limit": b.limit,
+                    "remaining": b.remaining,
+                    "used": b.used,
+                    "reset": b.reset,
+                    "last_sent": b.last_sent,
+                }
+                for k, b in self._buckets.items()
+            }
+            data["content"] = {
+                name: [bucket.tokens, bucket.stamp or now]
+                for name, bucket in (("minute", self._minute), ("hour", self._hour))
+            }
+            data["blocked_until"] = self._blocked_until
+
+    def reserve(self, method: str, url: str, payload: Any = None) -> float:
+        """Count the request in and return how long to wait before sending it.
+
+        For callers that wait in their own way (the async client); `before` also waits.
+        """
+        with self._lock, self._synced():
+            wait = self._plan(method, url, payload)
+            self._waited += wait
+        if wait > 0:
+            log.debug("rate governor: waiting %.1fs before %s %s", wait, method, url)
+        return wait
+
+    def before(self, method: str, url: str, payload: Any = None) -> float:
+        """Block until the request may be sent. Returns the seconds slept."""
+        wait = self.reserve(method, url, payload)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def after(self, status: int, headers: Mapping[str, str], url: str) -> None:
+        """Fold a response's rate-limit headers (and any Retry-After) into the state."""
+        now = time.time()
+        with self._lock, self._synced():
+            resource = headers.get("x-ratelimit-resource") or resource_for(url)
+            b = self._bucket(resource)
+            remaining = _int(headers, "x-ratelimit-remaining")
+            reset = _int(headers, "x-ratelimit-reset")
+            if remaining is not None and reset is not None:
+                # same rule as merging the ledger: other holders may have spent more since
+                _merge_bucket(
+                    b,
+                    {
+                        "remaining": remaining,
+                        "reset": reset,
+                        "limit": _int(headers, "x-ratelimit-limit"),
+                        "used": _int(headers, "x-ratelimit-used"),
+                    },
+                )
+            elif remaining is not None:
+                b.remaining = remaining
+                if remaining == 0 and status in (403, 429):
+                    b.reset = now + 2
+            retry_after = headers.get("retry-after")
+            if retry_after and status in (403, 429):
+                with suppress(ValueError):
+                    self._blocked_until = max(self._blocked_until, now + float(retry_after))
+            elif status == 429 and remaining != 0:
+                # secondary limit without a hint: back off briefly, like the old client did
+                self._blocked_until = max(self._blocked_until, now + 2)
+
+    def seed(self, resources: Mapping[str, Mapping[str, Any]]) -> None:
+        """Fold in the `resources` map from GET /rate_limit (every bucket at once)."""
+        with self._lock, self._synced():
+            for resource, d in resources.items():
+                if isinstance(d, Mapping):
+                    _merge_bucket(self._bucket(resource), d)
+
+    def state(self) -> GovernorState:
+        with self._lock:
+            now = time.time()
+            self._minute.refill(now)
+            self._hour.refill(now)
+            return GovernorState(
+                buckets={k: replace(v) for k, v in self._buckets.items()},
+                content_tokens_minute=self._minute.tokens,
+                content_tokens_hour=self._hour.tokens,
+                blocked_until=self._blocked_until,
+                waited_s=self._waited,
+            )
+
+
+_SHARED: dict[str, RateGovernor] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_governor(token: str) -> RateGovernor:
+    """The process-wide governor for `token`; every client using the token shares it.
+
+    Unless GCA_RATE_LEDGER=0, it also coordinates with other processes via the ledger.
+    """
+    key = token_key(token)
+    with _SHARED_LOCK:
+        gov = _SHARED.get(key)
+        if gov is None:
+            ledger = RateLedger.for_token(token) if config.rate_ledger_enabled() else None
+            gov = _SHARED[key] = RateGovernor(ledger=ledger)
+        return gov
+
+
+def reset_shared() -> None:
+    with _SHARED_LOCK:
+        _SHARED.clear()
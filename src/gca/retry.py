@@ -0,0 +1,180 @@
+"""Retry policy for GitHub requests.
+
+`GitHubClient._request` asks a `RetryPolicy` what to do after each failed attempt:
+
+- 5xx responses and transport errors (connection refused/reset, timeouts) are
+  retried with decorrelated jitter: each pause is drawn from [base, 3 x previous],
+  capped, so clients that failed together don't retry in lockstep.
+- A 5xx, read timeout or dropped connection is only retried for idempotent requests
+  (GET/HEAD/PUT/DELETE and GraphQL queries); a POST or GraphQL mutation that may have
+  landed isn't re-sent. Failing to connect at all is always safe to retry.
+- A `Retry-After` on a retried 5xx replaces the computed pause.
+- Every retry spends from a per-run budget; once it is gone, failures surface
+  immediately instead of every request burning its own attempts.
+- A per-host circuit breaker opens after consecutive failures and fails requests
+  fast until a cooldown passes, then lets a single probe through.
+
+Rate-limit waits (403/429) are the governor's business (see `ratelimit`) and are only
+counted here. Nothing in this module sends requests.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import requests
+
+from gca.ratelimit import RATE_SLEEP_CAP, resource_for
+
+log = logging.getLogger("gca.retry")
+
+MAX_ATTEMPTS = 4
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+RETRY_BUDGET = 50
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass
+class RetryStats:
+    requests: int = 0
+    retries: int = 0
+    server_errors: int = 0
+    transport_errors: int = 0
+    rate_limited: int = 0
+    slept_s: float = 0.0
+    budget_exhausted: int = 0
+    circuit_rejections: int = 0
+
+
+class _Breaker:
+    def __init__(self) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+
+def is_idempotent(method: str, url: str, payload: Any = None) -> bool:
+    """Safe to send twice: idempotent HTTP methods and GraphQL queries (not mutations)."""
+    if resource_for(url) == "graphql":
+        query = payload.get("query", "") if isinstance(payload, dict) else ""
+        return not query.lstrip().startswith("mutation")
+    return method.upper() in IDEMPOTENT_METHODS
+
+
+def retry_after(headers: Mapping[str, str]) -> float | None:
+    """Seconds to wait from a `Retry-After` header (delta-seconds or HTTP date)."""
+    raw = headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        *,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_delay: float = BASE_DELAY,
+        max_delay: float = MAX_DELAY,
+        jitter: bool = True,
+        budget: int = RETRY_BUDGET,
+        breaker_threshold: int = BREAKER_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.stats = RetryStats()
+        self._lock = threading.Lock()
+        self._breakers: dict[str, _Breaker] = {}
+
+    # ---- circuit breaker ----
+
+    def blocked_for(self, host: str) -> float:
+        """Seconds until requests to `host` may go out again (0: send now)."""
+        with self._lock:
+            b = self._breakers.get(host)
+            if b is None or b.failures < self.breaker_threshold:
+                return 0.0
+            now = time.time()
+            if now >= b.open_until and not b.probing:
+                b.probing = True  # half-open: one probe decides
+                return 0.0
+            self.stats.circuit_rejections += 1
+            return max(b.open_until - now, 0.0) or self.breaker_cooldown
+
+    def record(self, host: str, *, ok: bool) -> None:
+        with self._lock:
+            b = self._breakers.setdefault(host, _Breaker())
+            b.probing = False
+            if ok:
+                b.failures = 0
+                return
+            b.failures += 1
+            if b.failures >= self.breaker_threshold:
+                if b.failures == self.breaker_threshold:
+                    log.warning("%s keeps failing; pausing requests for %.0fs", host, self.breaker_cooldown)
+                b.open_until = time.time() + self.breaker_cooldown
+
+    # ---- retries ----
+
+    def retriable_error(self, exc: requests.RequestException, method: str, url: str, payload: Any) -> bool:
+        """Whether a transport error may be retried (if attempts and budget allow)."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True  # never reached the server
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return is_idempotent(method, url, payload)
+        return False
+
+    def spend(self, attempt: int) -> bool:
+        """Take one retry from the budget; False when out of attempts or budget."""
+        if attempt + 1 >= self.max_attempts:
+            return False
+        with self._lock:
+            if self.budget <= 0:
+                self.stats.budget_exhausted += 1
+                return False
+            self.budget -= 1
+            self.stats.retries += 1
+            return True
+
+    def delay(self, attempt: int, previous: float, hint: float | None = None) -> float:
+        """Pause before the next attempt; a server `Retry-After` hint wins."""
+        if hint is not None:
+            return min(hint, RATE_SLEEP_CAP)
+        if not self.jitter:
+            return min(self.base_delay * 2**attempt, self.max_delay)
+        return min(random.uniform(self.base_delay, max(previous, self.base_delay) * 3), self.max_delay)
+
+    def slept(self, seconds: float) -> None:
+        """Count a backoff pause the caller takes itself."""
+        with self._lock:
+            self.stats.slept_s += seconds
+
+    def count(self, *, server_error: bool = False, transport_error: bool = False, rate_limited: bool = False) -> None:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.server_errors += server_error
+            self.stats.transport_errors += transport_error
+            self.stats.rate_limited += rate_limited
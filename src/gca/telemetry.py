@@ -0,0 +1,142 @@
+"""Per-invocation telemetry for git subprocesses.
+
+`git_ops` reports every git process it runs: subcommand, wall time, child CPU time
+(the RUSAGE_CHILDREN delta around the call), exit status, and stdout/stderr byte
+counts. Records are tagged with the flow and repo from the enclosing `scope()` and can
+be rolled up with `breakdown()` to see whether clone, commit or push dominates a run.
+
+Child CPU is process-wide, so calls that overlap in other threads can bleed into each
+other's numbers; wall time and byte counts are exact.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore
+
+
+@dataclass(frozen=True)
+class GitCall:
+    subcommand: str
+    wall_s: float
+    cpu_s: float
+    status: int
+    stdout_bytes: int
+    stderr_bytes: int
+    flow: str | None = None
+    repo: str | None = None
+
+
+@dataclass
+class GitStat:
+    flow: str | None
+    repo: str | None
+    subcommand: str
+    calls: int = 0
+    failures: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+
+
+_scope: contextvars.ContextVar[tuple[str | None, str | None]] = contextvars.ContextVar(
+    "gca_telemetry_scope", default=(None, None)
+)
+_calls: list[GitCall] = []
+_lock = threading.Lock()
+
+
+def child_cpu() -> float:
+    """User + system CPU seconds of all reaped child processes so far."""
+    if resource is None:
+        return 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def subcommand_of(args: list[str]) -> str:
+    """First non-option argument, skipping the values of `-c`/`-C`."""
+    it = iter(args)
+    for arg in it:
+        if arg in ("-c", "-C"):
+            next(it, None)
+        elif not arg.startswith("-"):
+            return arg
+    return "git"
+
+
+def current() -> tuple[str | None, str | None]:
+    """The (flow, repo) calls are tagged with right now."""
+    return _scope.get()
+
+
+@contextmanager
+def scope(*, flow: str | None = None, repo: str | None = None) -> Iterator[None]:
+    """Tag git calls made inside the block (including worker threads started with a
+    copied context) with `flow` and `repo`. Unset values inherit the outer scope."""
+    outer_flow, outer_repo = _scope.get()
+    token = _scope.set((flow or outer_flow, repo or outer_repo))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def record(
+    args: list[str],
+    *,
+    wall_s: float,
+    cpu_s: float,
+    status: int,
+    stdout_bytes: int = 0,
+    stderr_bytes: int = 0,
+) -> None:
+    flow, repo = _scope.get()
+    call = GitCall(
+        subcommand_of(args),
+        wall_s,
+        max(cpu_s, 0.0),
+        status,
+        stdout_bytes,
+        stderr_bytes,
+        flow,
+        repo,
+    )
+    with _lock:
+        _calls.append(call)
+
+
+def calls(*, flow: str | None = None) -> list[GitCall]:
+    with _lock:
+        return [c for c in _calls if flow is None or c.flow == flow]
+
+
+def reset() -> None:
+    with _lock:
+        _calls.clear()
+
+
+def breakdown(records: list[GitCall] | None = None) -> list[GitStat]:
+    """Aggregate per (flow, repo, subcommand), slowest first within each repo."""
+    stats: dict[tuple[str | None, str | None, str], GitStat] = {}
+    for c in calls() if records is None else records:
+        key = (c.flow, c.repo, c.subcommand)
+        st = stats.get(key)
+        if st is None:
+            st = stats[key] = GitStat(c.flow, c.repo, c.subcommand)
+        st.calls += 1
+        st.failures += c.status != 0
+        st.wall_s += c.wall_s
+        st.cpu_s += c.cpu_s
+        st.stdout_bytes += c.stdout_bytes
+        st.stderr_bytes += c.stderr_bytes
+    return sorted(stats.values(), key=lambda s: (s.flow or "", s.repo or "", -s.wall_s))
@@ -1,12 +1,19 @@
-"""Shared helpers: date parsing, data-file loaders, repo-name validation."""
+"""Shared helpers: date parsing, data-file loaders, repo-name validation, file locks."""
 
 from __future__ import annotations
 
 import datetime as dt
+import os
 import re
 from importlib import resources
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
 REPO_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.\-]{0,99}$")
 EMAIL_RE = re.compile(r"^[^\s<>@]+@[^\s<>@]+\.[^\s<>@]+$")
 COAUTHOR_RE = re.compile(r"^(?P<name>[^<]+?)\s*<(?P<email>[^<>@\s]+@[^<>@\s]+)>$")
@@ -28,6 +35,7 @@ def git_date_string(when: dt.datetime) -> str:
 
 
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+SIZE_RE = re.compile(r"^(?P<num>\d+(?:\.\d+)?)\s*(?P<unit>[KMGT]?)i?B?$", re.IGNORECASE)
 
 
 def parse_date(value: str) -> dt.date:
@@ -37,6 +45,24 @@ def parse_date(value: str) -> dt.date:
     return dt.datetime.strptime(value, "%Y-%m-%d").date()
 
 
+def parse_size(value: str) -> int:
+    """Parse '500M', '10G', '2.5GiB' or a plain byte count into bytes (binary units)."""
+    m = SIZE_RE.match(value.strip())
+    if not m:
+        raise ValueError(f"size must look like 500M or 10G, got {value!r}")
+    power = " KMGT".index(m.group("unit").upper() or " ")
+    return int(float(m.group("num")) * 1024**power)
+
+
+def format_size(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
 def safe_repo_name(name: str) -> str:
     """Reject path-traversal / shell-active / multi-segment names.
 
@@ -78,3 +104,57 @@ def load_commit_messages() -> list[str]:
 def load_default_repo_names() -> list[str]:
     path = _data_path("repo_names.txt")
     return [ln.strip() for ln in path.read_text(encoding="utf-8").splitlines() if ln.strip()]
+
+
+class FileLock:
+    """Advisory inter-process lock on a file (flock on POSIX, msvcrt on Windows).
+
+    Shared locks let several runs read the same cache entry while an exclusive lock
+    is held for writes. On Windows every lock is exclusive.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    def acquire(self, *, shared: bool = False, blocking: bool = True) -> bool:
+        """Take (or convert to) a shared/exclusive lock. Returns False if non-blocking and busy."""
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                if not blocking:
+                    flags |= fcntl.LOCK_NB
+                fcntl.flock(self._fd, flags)
+            else:  # pragma: no cover - Windows
+                mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+                msvcrt.locking(self._fd, mode, 1)
+        except OSError:
+            if not blocking:
+                self.release()
+                return False
+            raise
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -6,9 +6,13 @@ import os
 import shutil
 import subprocess
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
+from gca import ratelimit
+from gca.github_api import RepoCheck, RepoRef
+
 
 @pytest.fixture
 def git_repo(tmp_path: Path) -> Path:
@@ -29,6 +33,45 @@ def bare_remote(tmp_path_factory: pytest.TempPathFactory) -> Path:
     return p
 
 
+@pytest.fixture
+def seeded_remote(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A bare `main` remote holding one seed commit, usable as a clone source."""
+    base = tmp_path_factory.mktemp("seeded")
+    remote = base / "remote.git"
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", str(remote)], check=True)
+    seed = base / "seed"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(seed)], check=True)
+    subprocess.run(["git", "-C", str(seed), "config", "user.email", "x@x"], check=True)
+    subprocess.run(["git", "-C", str(seed), "config", "user.name", "x"], check=True)
+    (seed / "README.md").write_text("hello")
+    subprocess.run(["git", "-C", str(seed), "add", "README.md"], check=True)
+    subprocess.run(["git", "-C", str(seed), "commit", "-q", "-m", "init"], check=True)
+    subprocess.run(["git", "-C", str(seed), "push", "-q", str(remote), "main"], check=True)
+    return remote
+
+
+@pytest.fixture
+def flow_client():
+    """Factory for mock GitHub clients whose preflight passes every repo on branch `main`."""
+
+    def make(token: str = "ghp_fake", **repo_fields) -> MagicMock:
+        client = MagicMock()
+        client.token = token
+        client.whoami.return_value = "octocat"
+        client.list_pull_requests.return_value = []
+        client.pull_requests_mergeable.side_effect = lambda repo, numbers: dict.fromkeys(numbers, "MERGEABLE")
+        client.preflight.side_effect = lambda repos, **kw: {
+            r.full: RepoCheck(
+                repo=RepoRef(r.owner, r.name, "main", **repo_fields),
+                can_push=True,
+            )
+            for r in repos
+        }
+        return client
+
+    return make
+
+
 @pytest.fixture(autouse=True)
 def _no_real_keyring(monkeypatch):
     """Don't let tests touch the user's actual macOS Keychain."""
@@ -36,11 +79,20 @@ def _no_real_keyring(monkeypatch):
     yield
 
 
+@pytest.fixture(autouse=True)
+def _fresh_rate_governors():
+    """Rate-limit state learned in one test must not pace the next."""
+    ratelimit.reset_shared()
+    yield
+    ratelimit.reset_shared()
+
+
 @pytest.fixture(autouse=True)
 def _isolate_env(monkeypatch, tmp_path):
-    """Tests must never read the user's real GCA_GITHUB_TOKEN or .env."""
+    """Tests must never read the user's real GCA_GITHUB_TOKEN, .env or cache dir."""
     monkeypatch.delenv("GCA_GITHUB_TOKEN", raising=False)
     monkeypatch.delenv("GCA_GITHUB_API", raising=False)
+    monkeypatch.setenv("GCA_CACHE_DIR", str(tmp_path / ".gca-cache"))
     monkeypatch.chdir(tmp_path)
     yield
 
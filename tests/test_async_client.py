@@ -0,0 +1,139 @@
+"""AsyncGitHubClient: same surface and semantics as the sync client, bounded concurrency."""
+
+import asyncio
+import inspect
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from gca.github_api import (  # noqa: E402
+    AsyncGitHubClient,
+    GitHubClient,
+    PRExistsError,
+    RepoRef,
+)
+from gca.metacache import MetadataCache  # noqa: E402
+from gca.retry import RetryPolicy  # noqa: E402
+
+REPO = RepoRef(owner="octo", name="hello", default_branch="main")
+REPO_JSON = {"owner": {"login": "octo"}, "name": "hello", "default_branch": "trunk"}
+
+
+def _client(handler, **kw) -> AsyncGitHubClient:
+    kw.setdefault("metadata_cache", False)
+    return AsyncGitHubClient(
+        "ghp_fake",
+        http_cache=False,
+        retry_policy=RetryPolicy(base_delay=0, jitter=False),
+        transport=httpx.MockTransport(handler),
+        **kw,
+    )
+
+
+def test_mirrors_every_public_method():
+    public = {
+        name
+        for name, fn in inspect.getmembers(GitHubClient, inspect.isfunction)
+        if not name.startswith("_") and name != "close"
+    }
+    for name in public - {"forget_repo"}:
+        assert inspect.iscoroutinefunction(getattr(AsyncGitHubClient, name)), name
+        sync_params = list(inspect.signature(getattr(GitHubClient, name)).parameters)
+        async_params = list(inspect.signature(getattr(AsyncGitHubClient, name)).parameters)
+        assert sync_params == async_params, name
+
+
+def test_requests_run_concurrently_up_to_the_limit():
+    active, peak, seen = [0], [0], []
+
+    async def slow(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        seen.append(json.loads(request.content)["title"])
+        return httpx.Response(201, json={"number": len(seen)})
+
+    async def main():
+        async with _client(slow, max_in_flight=3) as gh:
+            return await asyncio.gather(*(gh.create_issue(REPO, title=f"t{i}") for i in range(9)))
+
+    numbers = asyncio.run(main())
+    assert sorted(numbers) == list(range(1, 10))
+    assert sorted(seen) == [f"t{i}" for i in range(9)]
+    assert peak[0] == 3
+
+
+def test_aclose_waits_for_calls_in_flight():
+    async def main():
+        gate, begun = asyncio.Event(), asyncio.Event()
+
+        async def slow(request):
+            begun.set()
+            await gate.wait()
+            return httpx.Response(201, json={"number": 7})
+
+        gh = _client(slow)
+        call = asyncio.create_task(gh.create_issue(REPO, title="t"))
+        await begun.wait()
+        closing = asyncio.create_task(gh.aclose())
+        await asyncio.sleep(0.05)
+        assert not closing.done()  # still waiting on the call
+        with pytest.raises(RuntimeError, match="closed"):
+            await gh.create_issue(REPO, title="late")
+        gate.set()
+        await closing
+        assert gh._http.is_closed
+        return await call
+
+    assert asyncio.run(main()) == 7
+
+
+def test_shares_retry_and_typed_errors_with_the_sync_client():
+    calls: list[str] = []
+
+    def handler(request):
+        calls.append(f"{request.method} {request.url.path}")
+        if request.url.path == "/user":
+            if len(calls) == 1:
+                return httpx.Response(502)
+            return httpx.Response(200, json={"login": "octocat"}, headers={"x-oauth-scopes": "repo"})
+        if request.url.path == "/graphql":
+            return httpx.Response(502)
+        return httpx.Response(
+            422,
+            json={"message": "Validation Failed", "errors": [{"message": "A pull request already exists"}]},
+        )
+
+    async def main():
+        async with _client(handler) as gh:
+            assert await gh.whoami() == "octocat"
+            assert await gh.scopes() == {"repo"}
+            with pytest.raises(PRExistsError):
+                await gh.create_pull_request(REPO, head="feat", title="t")
+            out = await gh.add_discussion_comments([("D_1", "hi")])
+            assert out[0].status == 502
+
+    asyncio.run(main())
+    # the GET is retried; the PR POST fails for good; the mutation batch is sent once
+    assert calls == ["GET /user", "GET /user", "POST /repos/octo/hello/pulls", "POST /graphql"]
+
+
+def test_concurrent_lookups_share_one_request(tmp_path):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=REPO_JSON)
+
+    async def main():
+        cache = MetadataCache(tmp_path / "meta.sqlite", ttl=3600, scope="t")
+        async with _client(handler, metadata_cache=cache) as gh:
+            return await asyncio.gather(*(gh.get_repo("octo", "hello") for _ in range(5)))
+
+    repos = asyncio.run(main())
+    assert calls == ["/repos/octo/hello"]
+    assert {r.default_branch for r in repos} == {"trunk"}
@@ -0,0 +1,31 @@
+"""`--json` output of the flow commands."""
+
+import json
+from dataclasses import dataclass
+
+from gca import cli
+from gca.github_api import GitHubClient
+
+
+@dataclass
+class _Summary:
+    repo: str
+    created: int
+
+
+def _emit(capsys, **kw) -> object:
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    cli._emit_run([_Summary("o/r", 2)], True, client, **kw)
+    return json.loads(capsys.readouterr().out)
+
+
+def test_json_is_the_bare_results_list(capsys):
+    assert _emit(capsys) == [{"repo": "o/r", "created": 2}]
+    assert _emit(capsys, flow="prs") == [{"repo": "o/r", "created": 2}]
+
+
+def test_json_stats_wraps_the_results(capsys):
+    out = _emit(capsys, flow="prs", stats=True)
+    assert set(out) == {"results", "http_retries", "git_telemetry"}
+    assert out["results"] == [{"repo": "o/r", "created": 2}]
+    assert set(_emit(capsys, stats=True)) == {"results", "http_retries"}  # no git in this flow
@@ -8,6 +8,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from gca import commits
+from gca.github_api import RepoCheck, RepoRef
 from gca.repo_spec import RepoSpec
 
 
@@ -28,7 +29,8 @@ def _make_remote_with_seed(tmp_path: Path) -> Path:
     return remote
 
 
-def test_commits_run_against_local_remote(tmp_path: Path, monkeypatch):
+@pytest.mark.parametrize("engine", ["fast-import", "pack", "porcelain"])
+def test_commits_run_against_local_remote(tmp_path: Path, monkeypatch, engine, flow_client):
     remote = _make_remote_with_seed(tmp_path)
 
     # build a fake RepoSpec whose auth_clone_url returns the local path
@@ -37,9 +39,7 @@ def test_commits_run_against_local_remote(tmp_path: Path, monkeypatch):
             return str(remote)
 
     spec = LocalSpec("local", "remote")
-    client = MagicMock()
-    client.token = "ghp_fake"
-    client.whoami.return_value = "octocat"
+    client = flow_client(size_kb=1)
 
     opts = commits.CommitOptions(
         repos=[spec],
@@ -48,6 +48,7 @@ def test_commits_run_against_local_remote(tmp_path: Path, monkeypatch):
         strategy="every-day",
         per_day_min=2,
         per_day_max=2,
+        engine=engine,
     )
     summaries = commits.run(client, opts)
     s = summaries[0]
@@ -69,6 +70,180 @@ def test_commits_run_against_local_remote(tmp_path: Path, monkeypatch):
         assert d in dates
 
 
+@pytest.mark.parametrize("mode", ["partial", "shallow", "no-checkout", "sparse"])
+@pytest.mark.parametrize("engine", ["fast-import", "porcelain"])
+def test_commits_push_from_minimal_clones(seeded_remote: Path, tmp_path: Path, mode, engine, flow_client):
+    subprocess.run(["git", "-C", str(seeded_remote), "config", "uploadpack.allowFilter", "true"], check=True)
+    url = seeded_remote.as_uri()  # file:// so the filter/depth negotiation really happens
+
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return url
+
+    client = flow_client()
+    opts = commits.CommitOptions(
+        repos=[LocalSpec("local", "remote")],
+        start=dt.date(2024, 3, 1),
+        end=dt.date(2024, 3, 2),
+        engine=engine,
+        clone_mode=mode,
+    )
+    s = commits.run(client, opts)[0]
+    if engine == "porcelain" and mode == "no-checkout":
+        assert s.error and "working tree" in s.error
+        return
+    assert s.error is None, s.error
+    assert s.pushed and s.commits_made == 2
+    client.get_repo.assert_not_called()
+    files = subprocess.check_output(
+        ["git", "-C", str(seeded_remote), "ls-tree", "-r", "--name-only", "main"], text=True
+    ).split()
+    assert "README.md" in files
+    assert sum(f.startswith(".gca/log/") for f in files) == 2
+
+
+def test_commits_with_mirror_cache(seeded_remote: Path, tmp_path: Path, flow_client):
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return str(seeded_remote)
+
+    client = flow_client()
+    opts = commits.CommitOptions(
+        repos=[LocalSpec("local", "remote")],
+        start=dt.date(2024, 3, 1),
+        end=dt.date(2024, 3, 1),
+        clone_mode="full",
+        use_cache=True,
+    )
+    for _ in range(2):
+        s = commits.run(client, opts)[0]
+        assert s.error is None, s.error
+        assert s.pushed
+    # the second run fetched the first run's commit into the mirror
+    mirror = tmp_path / ".gca-cache" / "mirrors" / "local" / "remote.git"
+    assert subprocess.check_output(["git", "-C", str(mirror), "rev-list", "--count", "main"], text=True).strip() == "2"
+
+
+def _local_opts(remote: Path, **kw) -> commits.CommitOptions:
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return str(remote)
+
+    kw.setdefault("clone_mode", "full")
+    kw.setdefault("end", dt.date(2024, 5, 10))
+    return commits.CommitOptions(repos=[LocalSpec("local", "remote")], start=dt.date(2024, 5, 1), **kw)
+
+
+def _remote_log(remote: Path) -> list[str]:
+    return subprocess.check_output(
+        ["git", "-C", str(remote), "log", "--format=%H", "main"], text=True
+    ).split()
+
+
+def test_commits_push_in_chunks(seeded_remote: Path, tmp_path: Path, flow_client):
+    client = flow_client()
+    s = commits.run(client, _local_opts(seeded_remote, push_chunk_commits=3))[0]
+    assert s.error is None, s.error
+    assert (s.commits_made, s.push_chunks, s.resumed) == (10, 4, 0)
+    assert s.bytes_pushed > 0
+    assert len(_remote_log(seeded_remote)) == 11
+    # a completed run leaves no journal behind
+    assert not list((tmp_path / ".gca-cache" / "journal").glob("*.json"))
+
+
+def test_commits_chunk_size_limit(seeded_remote: Path, flow_client):
+    client = flow_client()
+    opts = _local_opts(seeded_remote, end=dt.date(2024, 5, 3), push_chunk_commits=0, push_chunk_bytes=1)
+    s = commits.run(client, opts)[0]
+    assert s.error is None, s.error
+    assert s.push_chunks == 3  # every commit exceeds 1 byte, so each goes out alone
+
+
+def test_commits_resume_after_failed_chunk(seeded_remote: Path, monkeypatch, flow_client):
+    client = flow_client()
+    opts = _local_opts(seeded_remote, push_chunk_commits=4)
+    real_push = commits.git_ops.push_commit
+    calls = []
+
+    def flaky_push(repo_dir, sha, branch):
+        calls.append(sha)
+        if len(calls) > 1:
+            raise commits.git_ops.GitError("connection reset")
+        real_push(repo_dir, sha, branch)
+
+    monkeypatch.setattr(commits.git_ops, "push_commit", flaky_push)
+    monkeypatch.setattr(commits.time, "sleep", lambda s: None)
+    first = commits.run(client, opts)[0]
+    assert first.error and "connection reset" in first.error
+    assert len(calls) == 1 + commits.PUSH_ATTEMPTS
+    assert first.push_chunks == 1
+    after_first = _remote_log(seeded_remote)
+    assert len(after_first) == 5
+
+    monkeypatch.setattr(commits.git_ops, "push_commit", real_push)
+    second = commits.run(client, opts)[0]
+    assert second.error is None, second.error
+    assert (second.resumed, second.commits_made, second.push_chunks) == (4, 6, 2)
+    final = _remote_log(seeded_remote)
+    assert len(final) == 11
+    assert final[-5:] == after_first  # earlier chunks were kept, not rewritten
+    # the resumed run replayed the journaled schedule, so every day is written exactly once
+    files = subprocess.check_output(
+        ["git", "-C", str(seeded_remote), "ls-tree", "-r", "--name-only", "main", ".gca/log"],
+        text=True,
+    ).split()
+    assert len(files) == 10
+    assert sorted(f.split("/")[-1][:10] for f in files) == [f"2024-05-{d:02d}" for d in range(1, 11)]
+
+
+def test_commits_resume_from_a_shallow_clone(seeded_remote: Path, tmp_path: Path, monkeypatch, flow_client):
+    url = seeded_remote.as_uri()  # file:// so --depth is honoured
+
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return url
+
+    client = flow_client()
+    opts = commits.CommitOptions(
+        repos=[LocalSpec("local", "remote")],
+        start=dt.date(2024, 5, 1),
+        end=dt.date(2024, 5, 10),
+        clone_mode="shallow",
+        push_chunk_commits=4,
+    )
+    real_push = commits.git_ops.push_commit
+    pushes = []
+
+    def flaky_push(repo_dir, sha, branch):
+        pushes.append(sha)
+        if len(pushes) > 1:
+            raise commits.git_ops.GitError("connection reset")
+        real_push(repo_dir, sha, branch)
+
+    monkeypatch.setattr(commits.git_ops, "push_commit", flaky_push)
+    monkeypatch.setattr(commits.time, "sleep", lambda s: None)
+    assert commits.run(client, opts)[0].push_chunks == 1
+
+    # someone else pushes meanwhile: a depth-1 clone no longer contains the journaled tip
+    other = tmp_path / "other"
+    subprocess.run(["git", "clone", "-q", str(seeded_remote), str(other)], check=True)
+    subprocess.run(
+        ["git", "-C", str(other), "-c", "user.name=x", "-c", "user.email=x@x", "commit", "-q", "--allow-empty", "-m", "other"],
+        check=True,
+    )
+    subprocess.run(["git", "-C", str(other), "push", "-q", "origin", "main"], check=True)
+
+    monkeypatch.setattr(commits.git_ops, "push_commit", real_push)
+    second = commits.run(client, opts)[0]
+    assert second.error is None, second.error
+    assert (second.resumed, second.commits_made) == (4, 6)
+    files = subprocess.check_output(
+        ["git", "-C", str(seeded_remote), "ls-tree", "-r", "--name-only", "main", ".gca/log"], text=True
+    ).split()
+    assert len(files) == 10  # no day written twice
+    assert len(_remote_log(seeded_remote)) == 12
+
+
 def test_commits_dry_run_emits_no_network():
     spec = RepoSpec("octo", "x")
     client = MagicMock()
@@ -90,6 +265,18 @@ def test_commits_dry_run_emits_no_network():
     client.whoami.assert_not_called()
 
 
+def test_invalid_engine_raises():
+    opts = commits.CommitOptions(
+        repos=[RepoSpec("octo", "x")],
+        start=dt.date(2024, 1, 1),
+        end=dt.date(2024, 1, 1),
+        engine="telepathy",
+        dry_run=True,
+    )
+    with pytest.raises(ValueError):
+        commits.run(MagicMock(), opts)
+
+
 def test_invalid_strategy_raises():
     spec = RepoSpec("octo", "x")
     client = MagicMock()
@@ -102,3 +289,16 @@ def test_invalid_strategy_raises():
     )
     with pytest.raises(ValueError):
         commits.run(client, opts)
+
+
+def test_commits_skip_repos_that_fail_preflight(flow_client, monkeypatch):
+    client = flow_client()
+    client.preflight.side_effect = lambda repos, **kw: {
+        r.full: RepoCheck(repo=RepoRef(r.owner, r.name, "main"), problem=f"{r.full} is archived (read-only)")
+        for r in repos
+    }
+    monkeypatch.setattr(commits.git_ops, "clone", MagicMock(side_effect=AssertionError("cloned")))
+    opts = commits.CommitOptions(repos=[RepoSpec("octo", "old")], start=dt.date(2024, 1, 1), end=dt.date(2024, 1, 1))
+    (s,) = commits.run(client, opts)
+    assert s.error == "preflight: octo/old is archived (read-only)"
+    client.preflight.assert_called_once_with(opts.repos, need_push=True)
@@ -0,0 +1,75 @@
+"""Discussions flow: three batched GraphQL phases with per-item error mapping."""
+
+import json
+import time
+
+import responses
+
+from gca import discussions, ratelimit
+from gca.github_api import GitHubClient
+from gca.repo_spec import RepoSpec
+
+GRAPHQL = "https://api.github.com/graphql"
+REPO_NODE = {
+    "id": "R_1",
+    "name": "hello",
+    "owner": {"login": "octo"},
+    "diskUsage": 1,
+    "defaultBranchRef": {"name": "main"},
+    "isArchived": False,
+    "isDisabled": False,
+    "viewerPermission": "READ",
+    "mergeCommitAllowed": True,
+    "squashMergeAllowed": True,
+    "rebaseMergeAllowed": True,
+    "hasDiscussionsEnabled": True,
+    "discussionCategories": {"nodes": [{"id": "C_1", "name": "Q&A", "slug": "q-a", "isAnswerable": True}]},
+}
+
+
+def _fake_github(request):
+    body = json.loads(request.body)
+    query, variables = body["query"], body["variables"]
+    if query.startswith("query("):
+        return 200, {}, json.dumps({"data": {"r0": REPO_NODE}})
+    data, errors = {}, []
+    n = sum(1 for k in variables if k.startswith(("title_", "discussionId_", "id_")))
+    for i in range(n):
+        if "createDiscussion" in query:
+            if variables[f"title_{i}"].endswith("(#2)"):
+                data[f"m{i}"] = None
+                errors.append({"path": [f"m{i}"], "message": "title rejected"})
+            else:
+                data[f"m{i}"] = {"discussion": {"id": f"D_{variables[f'title_{i}'][-2]}", "number": i, "url": ""}}
+        elif "addDiscussionComment" in query:
+            data[f"m{i}"] = {"comment": {"id": f"DC_{variables[f'discussionId_{i}']}"}}
+        else:
+            if variables[f"id_{i}"] == "DC_D_3":
+                data[f"m{i}"] = None
+                errors.append({"path": [f"m{i}"], "type": "FORBIDDEN", "message": "nope"})
+            else:
+                data[f"m{i}"] = {"discussion": {"id": "x"}}
+    return 200, {}, json.dumps({"data": data, "errors": errors} if errors else {"data": data})
+
+
+@responses.activate
+def test_discussions_run_in_batched_phases(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda s: None)
+    responses.add_callback(responses.POST, GRAPHQL, callback=_fake_github)
+    client = GitHubClient(
+        "ghp_fake",
+        http_cache=False,
+        metadata_cache=False,
+        governor=ratelimit.RateGovernor(content_burst=100),
+    )
+    opts = discussions.DiscussionOptions(repos=[RepoSpec("octo", "hello")], count=4)
+    (s,) = discussions.run(client, opts)
+
+    # preflight + create + comment + accept, whatever the count
+    assert len(responses.calls) == 4
+    assert (s.created, s.answered) == (3, 2)
+    assert len(s.errors) == 2
+    assert s.errors[0].startswith("discussion 2: GitHubError") and "title rejected" in s.errors[0]
+    assert s.errors[1].startswith("discussion 3: GitHubError") and "nope" in s.errors[1]
+    # each aliased mutation counts against the content-creation budget
+    assert ratelimit.content_units("POST", GRAPHQL, json.loads(responses.calls[1].request.body)) == 4
@@ -70,6 +70,91 @@ def test_ensure_branch_creates_and_reuses(git_repo: Path):
     git_ops.ensure_branch(git_repo, "feature/foo", base="main")
 
 
+def _specs(n: int) -> list[git_ops.CommitSpec]:
+    return [
+        git_ops.CommitSpec(
+            file_name=f".gca/log/2023-05-0{i}-{i}.md",
+            file_content=f"entry {i}\n",
+            message=f"chore: entry {i}",
+            when=dt.datetime(2023, 5, i, 9, 30, tzinfo=dt.timezone.utc),
+            coauthors=("Ada Lovelace <ada@example.org>",) if i == n else (),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def test_fast_import_chains_on_branch_tip(git_repo: Path):
+    when = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+    seed = git_ops.backdated_commit(git_repo, file_name="a", file_content="a", message="init", when=when)
+
+    shas = git_ops.write_commits(git_repo, "main", _specs(3), engine="fast-import")
+    assert len(shas) == 3
+    assert _git(git_repo, "rev-parse", "main") == shas[-1]
+    assert _git(git_repo, "rev-parse", f"{shas[0]}^") == seed
+    dates = _git(git_repo, "log", "--format=%aI %cI", "main").splitlines()
+    assert dates[0] == "2023-05-03T09:30:00+00:00 2023-05-03T09:30:00+00:00"
+    # the seed file is kept, the new files accumulate
+    files = _git(git_repo, "ls-tree", "-r", "--name-only", "main").splitlines()
+    assert sorted(files) == [".gca/log/2023-05-01-1.md", ".gca/log/2023-05-02-2.md", ".gca/log/2023-05-03-3.md", "a"]
+    assert "Co-authored-by: Ada Lovelace <ada@example.org>" in _git(git_repo, "log", "-1", "--format=%B", "main")
+
+
+def test_fast_import_matches_porcelain_history(git_repo: Path, tmp_path: Path):
+    """Same schedule through both engines must produce identical trees and metadata."""
+    when = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+    git_ops.backdated_commit(git_repo, file_name="a", file_content="a", message="init", when=when)
+    other = tmp_path / "other"
+    subprocess.run(["git", "clone", "-q", str(git_repo), str(other)], check=True)
+    git_ops.configure_identity(other, "gca-test", "test@gca.local")
+
+    fi = git_ops.write_commits(git_repo, "main", _specs(2), engine="fast-import")
+    pc = git_ops.write_commits(other, "main", _specs(2), engine="porcelain")
+    assert _git(git_repo, "rev-parse", f"{fi[-1]}^{{tree}}") == _git(other, "rev-parse", f"{pc[-1]}^{{tree}}")
+    fmt = "--format=%an %ae %aI %cI %B"
+    assert _git(git_repo, "log", fmt, "main") == _git(other, "log", fmt, "main")
+
+
+def test_write_commits_rejects_unknown_engine(git_repo: Path):
+    with pytest.raises(ValueError):
+        git_ops.write_commits(git_repo, "main", _specs(1), engine="nope")
+
+
+def test_git_runner_resolves_and_updates_refs(git_repo: Path):
+    spec = _specs(1)[0]
+    head = git_ops.backdated_commit(
+        git_repo, file_name="a.md", file_content=spec.file_content, message=spec.message, when=spec.when
+    )
+    runner = git_ops.GitRunner(git_repo)
+    try:
+        assert runner.resolve("HEAD") == head
+        assert runner.resolve("HEAD^{tree}") == _git(git_repo, "rev-parse", "HEAD^{tree}")
+        assert runner.resolve("refs/heads/nope") is None
+
+        runner.update_refs([("refs/heads/a", head, None), ("refs/heads/b", head, None)])
+        assert runner.resolve("refs/heads/a") == runner.resolve("refs/heads/b") == head
+        # a stale expected-old value rejects the whole transaction...
+        with pytest.raises(git_ops.GitError):
+            runner.update_refs([("refs/heads/c", head, None), ("refs/heads/a", head, "0" * 40)])
+        assert runner.resolve("refs/heads/c") is None
+        # ...and the next call transparently gets a fresh coprocess
+        runner.update_refs([("refs/heads/c", head, None)])
+        assert runner.resolve("refs/heads/c") == head
+        assert runner.symbolic_ref("HEAD") == "refs/heads/" + _git(git_repo, "branch", "--show-current")
+    finally:
+        runner.close()
+
+
+def test_temp_workdir_closes_runners(seeded_remote: Path):
+    with git_ops.temp_workdir() as base:
+        subprocess.run(["git", "clone", "-q", str(seeded_remote), str(base / "r")], check=True)
+        runner = git_ops.runner_for(base / "r")
+        assert runner.resolve("HEAD")
+        proc = runner._batch.proc
+        assert proc.poll() is None
+    assert proc.poll() == 0
+    assert git_ops.runner_for(base / "r") is not runner
+
+
 def test_temp_workdir_cleans_up_on_exception():
     captured: list[Path] = []
     try:
@@ -102,6 +187,40 @@ def test_clone_wipes_existing_dest(tmp_path):
     assert not (dest / "junk").exists()
 
 
+@pytest.mark.parametrize(
+    ("size_kb", "engine", "expected"),
+    [
+        (None, "fast-import", "no-checkout"),
+        (10, "pack", "no-checkout"),
+        (git_ops.LARGE_REPO_KB, "fast-import", "shallow"),
+        (10, "porcelain", "full"),
+        (git_ops.LARGE_REPO_KB * 10, "porcelain", "sparse"),
+    ],
+)
+def test_resolve_clone_mode_auto(size_kb, engine, expected):
+    assert git_ops.resolve_clone_mode("auto", size_kb=size_kb, engine=engine) == expected
+    assert git_ops.resolve_clone_mode("partial", size_kb=size_kb, engine=engine) == "partial"
+    with pytest.raises(ValueError):
+        git_ops.resolve_clone_mode("everything", size_kb=size_kb, engine=engine)
+
+
+def test_sparse_clone_checks_out_only_gca(tmp_path):
+    src = tmp_path / "src"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(src)], check=True)
+    (src / "big").mkdir()
+    (src / "big" / "blob.bin").write_text("x" * 1000)
+    (src / ".gca").mkdir()
+    (src / ".gca" / "keep.md").write_text("k")
+    subprocess.run(["git", "-C", str(src), "add", "."], check=True)
+    subprocess.run(
+        ["git", "-C", str(src), "-c", "user.name=x", "-c", "user.email=x@x", "commit", "-q", "-m", "init"],
+        check=True,
+    )
+    dest = git_ops.clone(src.as_uri(), tmp_path / "dest", mode="sparse")
+    assert (dest / ".gca" / "keep.md").exists()
+    assert not (dest / "big").exists()
+
+
 def test_run_git_raises_on_bad_cmd(git_repo: Path):
     with pytest.raises(git_ops.GitError):
         git_ops.run_git(["this-is-not-a-real-subcommand"], cwd=git_repo, capture=True)
@@ -1,6 +1,12 @@
+import json
+import threading
+
 import pytest
+import requests
 import responses
+from requests.adapters import HTTPAdapter
 
+from gca import github_api, metacache
 from gca.github_api import (
     DiscussionCategoryError,
     GitHubClient,
@@ -182,3 +188,261 @@ def test_whoami_caches_scopes():
     assert "repo" in client.scopes()
     assert "write:discussion" in client.scopes()
     assert "delete_repo" in client.scopes()
+
+
+def test_sessions_are_per_thread_over_one_pool():
+    client = GitHubClient("ghp_fake", concurrency=3, http2=False)
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(client.session))
+    t.start()
+    t.join()
+    assert client.session is client.session
+    assert seen[0] is not client.session
+    assert seen[0].get_adapter("https://api.github.com") is client.adapter
+    assert client.session.get_adapter("https://api.github.com") is client.adapter
+    assert isinstance(client.adapter, HTTPAdapter)
+    assert client.adapter._pool_maxsize == 3
+    assert seen[0].headers["Authorization"] == "Bearer ghp_fake"
+
+
+def test_http2_without_extra_falls_back(monkeypatch, caplog):
+    monkeypatch.setattr(github_api, "httpx", None)
+    client = GitHubClient("ghp_fake", http2=True)
+    assert isinstance(client.adapter, HTTPAdapter)
+    assert "http2" in caplog.text
+
+
+@responses.activate
+def test_warm_up_seeds_the_governor():
+    responses.add(
+        responses.GET,
+        "https://api.github.com/rate_limit",
+        json={
+            "resources": {
+                "core": {"limit": 5000, "remaining": 4321, "used": 679, "reset": 4_000_000_000},
+                "graphql": {"limit": 5000, "remaining": 12, "used": 4988, "reset": 4_000_000_000},
+            }
+        },
+    )
+    client = GitHubClient("ghp_fake", concurrency=4, http_cache=False, metadata_cache=False)
+    assert client.warm_up(2)
+    assert len(responses.calls) == 2
+    buckets = client.governor.state().buckets
+    assert buckets["graphql"].remaining == 12
+    assert buckets["core"].limit == 5000
+
+
+@responses.activate
+def test_warm_up_failure_is_not_fatal(monkeypatch):
+    monkeypatch.setattr(github_api.retry.time, "sleep", lambda s: None)
+    responses.add(responses.GET, "https://api.github.com/rate_limit", body=requests.ConnectionError("down"))
+    client = GitHubClient("ghp_fake", concurrency=2, http_cache=False, metadata_cache=False)
+    assert client.warm_up() is False
+
+
+def _node(name: str, **over) -> dict:
+    node = {
+        "id": f"R_{name}",
+        "name": name,
+        "owner": {"login": "octo"},
+        "diskUsage": 7,
+        "defaultBranchRef": {"name": "main"},
+        "isArchived": False,
+        "isDisabled": False,
+        "viewerPermission": "WRITE",
+        "mergeCommitAllowed": False,
+        "squashMergeAllowed": True,
+        "rebaseMergeAllowed": True,
+        "hasDiscussionsEnabled": True,
+        "discussionCategories": {"nodes": [{"id": "C_1", "name": "Q&A", "slug": "q-a", "isAnswerable": True}]},
+    }
+    node.update(over)
+    return node
+
+
+@responses.activate
+def test_preflight_batches_aliased_queries_and_flags_unusable_repos():
+    replies = [
+        {
+            "data": {"r0": _node("a"), "r1": None},
+            "errors": [{"type": "NOT_FOUND", "path": ["r1"], "message": "Could not resolve to a Repository"}],
+        },
+        {"data": {"r0": _node("c", isArchived=True)}},
+    ]
+    responses.add_callback(
+        responses.POST, "https://api.github.com/graphql", callback=lambda req: (200, {}, json.dumps(replies.pop(0)))
+    )
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    specs = [RepoRef("octo", n, "") for n in ("a", "b", "c")]
+    checks = client.preflight(specs, need_push=True, discussions=True, batch=2)
+
+    assert len(responses.calls) == 2
+    sent = json.loads(responses.calls[0].request.body)
+    assert "r1: repository(owner: $o1, name: $n1)" in sent["query"]
+    assert sent["variables"] == {"o0": "octo", "n0": "a", "o1": "octo", "n1": "b"}
+
+    a = checks["octo/a"]
+    assert a.problem is None and a.can_push
+    assert (a.repo.full, a.repo.default_branch, a.repo.size_kb) == ("octo/a", "main", 7)
+    assert [a.repo.allows(m) for m in ("merge", "squash", "rebase")] == [False, True, True]
+    assert (a.repo.branch_protected, a.repo.required_reviews) == (False, 0)
+    assert a.discussion == ("R_a", "C_1", "Q&A")
+    assert "Could not resolve" in checks["octo/b"].problem
+    assert "archived" in checks["octo/c"].problem
+
+
+@responses.activate
+def test_preflight_reads_default_branch_protection():
+    rule = {"requiresLinearHistory": True, "requiredApprovingReviewCount": 2}
+    node = _node("a", mergeCommitAllowed=True, defaultBranchRef={"name": "main", "refUpdateRule": rule})
+    responses.add(responses.POST, "https://api.github.com/graphql", json={"data": {"r0": node}})
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    repo = client.preflight([RepoRef("octo", "a", "")])["octo/a"].repo
+    assert repo.branch_protected and repo.requires_linear_history and repo.required_reviews == 2
+    # the repo allows merge commits, but the branch rule doesn't
+    assert repo.allow_merge_commit and repo.allows("merge") is False
+
+
+@responses.activate
+def test_preflight_checks_permission_and_warms_metadata_cache(tmp_path):
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={"data": {"r0": _node("a", viewerPermission="READ")}},
+    )
+    cache = metacache.MetadataCache(tmp_path / "m.sqlite", ttl=60)
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=cache)
+    assert "can't push" in client.preflight([RepoRef("octo", "a", "")], need_push=True)["octo/a"].problem
+    # later single-repo lookups are answered from the cache
+    assert client.get_repo("octo", "a").size_kb == 7
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_preflight_answers_fresh_repos_from_the_metadata_cache(tmp_path):
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={"data": {"r0": _node("a"), "r1": _node("b", viewerPermission="READ")}},
+    )
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={"data": {"r0": _node("b", viewerPermission="READ")}},
+    )
+    cache = metacache.MetadataCache(tmp_path / "m.sqlite", ttl=60)
+    specs = [RepoRef("octo", "a", ""), RepoRef("octo", "b", "")]
+    first = GitHubClient("ghp_fake", http_cache=False, metadata_cache=cache).preflight(specs, discussions=True)
+
+    # the next run: "a" comes from the cache, with nothing lost; "b" is usable
+    # without push access, so it is cached too
+    second = GitHubClient("ghp_fake", http_cache=False, metadata_cache=cache).preflight(specs, discussions=True)
+    assert len(responses.calls) == 1
+    assert second == first
+
+    # needing push makes the cached READ entry for "b" fail, so only "b" is asked again
+    again = GitHubClient("ghp_fake", http_cache=False, metadata_cache=cache).preflight(specs, need_push=True)
+    assert len(responses.calls) == 2
+    assert "r1" not in json.loads(responses.calls[1].request.body)["query"]
+    assert again["octo/a"] == first["octo/a"] and "can't push" in again["octo/b"].problem
+
+
+@responses.activate
+def test_graphql_batch_chunks_and_maps_results_back(monkeypatch):
+    monkeypatch.setattr(github_api.retry.time, "sleep", lambda s: None)
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={"data": {"m0": {"comment": {"id": "DC_a"}}, "m1": {"comment": {"id": "DC_b"}}}},
+    )
+    responses.add(responses.POST, "https://api.github.com/graphql", status=422, body="bad document")
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    out = client.graphql_batch(
+        "addDiscussionComment(input: {discussionId: $id, body: $body}) { comment { id } }",
+        {"id": "ID!", "body": "String!"},
+        [{"id": f"D_{n}", "body": "hi"} for n in "abc"],
+        batch=2,
+    )
+    sent = json.loads(responses.calls[0].request.body)
+    assert sent["query"].startswith("mutation($id_0: ID!, $body_0: String!, $id_1: ID!, $body_1: String!)")
+    assert "m1: addDiscussionComment(input: {discussionId: $id_1, body: $body_1})" in sent["query"]
+    assert out[:2] == [{"comment": {"id": "DC_a"}}, {"comment": {"id": "DC_b"}}]
+    assert isinstance(out[2], github_api.GitHubError) and out[2].status == 422
+
+
+@responses.activate
+def test_batched_pr_lifecycle_maps_graphql_errors_to_typed_ones():
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={
+            "data": {"m0": {"pullRequest": {"id": "PR_a", "number": 7}}, "m1": None},
+            "errors": [{"path": ["m1"], "type": "UNPROCESSABLE", "message": "A pull request already exists for octo:b."}],
+        },
+    )
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={
+            "data": {"m0": {"pullRequest": {"merged": True}}, "m1": None},
+            "errors": [{"path": ["m1"], "type": "UNPROCESSABLE", "message": "Pull Request is not mergeable"}],
+        },
+    )
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    opened = client.create_pull_requests("R_1", "main", [("a", "t", "b"), ("b", "t", "b")])
+    assert opened[0] == (7, "PR_a")
+    assert isinstance(opened[1], PRExistsError)
+    merged = client.merge_pull_requests(["PR_a", "PR_b"], method="rebase")
+    assert merged[0] is None and isinstance(merged[1], MergeBlockedError)
+    assert json.loads(responses.calls[1].request.body)["variables"]["method_0"] == "REBASE"
+    with pytest.raises(ValueError):
+        client.merge_pull_requests(["PR_a"], method="octopus")
+
+
+@responses.activate
+def test_pull_requests_mergeable_treats_unreadable_prs_as_unknown():
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={
+            "data": {
+                "m0": {"pullRequest": {"mergeable": "MERGEABLE"}},
+                "m1": {"pullRequest": {"mergeable": "CONFLICTING"}},
+                "m2": None,
+            },
+            "errors": [{"path": ["m2"], "type": "NOT_FOUND", "message": "Could not resolve to a PullRequest"}],
+        },
+    )
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    states = client.pull_requests_mergeable(RepoRef("octo", "a", "main"), [1, 2, 3])
+    assert states == {1: "MERGEABLE", 2: "CONFLICTING", 3: "UNKNOWN"}
+    assert json.loads(responses.calls[0].request.body)["query"].startswith("query(")
+
+
+@responses.activate
+def test_list_pull_requests_follows_pages_and_keeps_own_branches():
+    def pull(number, ref, repo="octo/a", merged_at=None, state="closed"):
+        return {
+            "number": number,
+            "node_id": f"PR_{number}",
+            "state": state,
+            "merged_at": merged_at,
+            "head": {"ref": ref, "repo": {"full_name": repo}},
+        }
+
+    url = "https://api.github.com/repos/octo/a/pulls"
+    responses.add(
+        responses.GET,
+        url,
+        json=[pull(1, "gca/pr-x", merged_at="2024-01-01T00:00:00Z"), pull(2, "feature")],
+        headers={"Link": f'<{url}?state=all&per_page=100&page=2>; rel="next"'},
+    )
+    responses.add(
+        responses.GET,
+        url,
+        json=[pull(3, "gca/pr-y", state="open"), pull(4, "gca/pr-z", repo="fork/a"), pull(5, "gca/pr-w", repo=None)],
+    )
+    client = GitHubClient("ghp_fake", http_cache=False, metadata_cache=False)
+    pulls = client.list_pull_requests(RepoRef("octo", "a", "main"), head_prefix="gca/pr-")
+    assert [(p.number, p.state, p.merged) for p in pulls] == [(1, "closed", True), (3, "open", False)]
+    assert responses.calls[1].request.url.endswith("page=2")
@@ -0,0 +1,69 @@
+"""Conditional-request cache for GitHub GETs."""
+
+import time
+
+import responses
+
+from gca import httpcache
+from gca.github_api import GitHubClient
+
+REPO_URL = "https://api.github.com/repos/octo/hello"
+REPO_JSON = {"owner": {"login": "octo"}, "name": "hello", "default_branch": "main", "size": 12}
+
+
+@responses.activate
+def test_304_is_served_from_cache(tmp_path):
+    responses.add(responses.GET, REPO_URL, json=REPO_JSON, headers={"ETag": '"abc"'})
+    responses.add(responses.GET, REPO_URL, status=304, headers={"x-ratelimit-remaining": "4999"})
+    cache = httpcache.HTTPCache(tmp_path / "http.sqlite", max_bytes=1 << 20)
+
+    first = GitHubClient("ghp_fake", http_cache=cache, metadata_cache=False).get_repo("octo", "hello")
+    second = GitHubClient("ghp_fake", http_cache=cache, metadata_cache=False).get_repo("octo", "hello")
+    assert first == second
+    assert second.default_branch == "main" and second.size_kb == 12
+    assert "If-None-Match" not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers["If-None-Match"] == '"abc"'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@responses.activate
+def test_cache_is_per_token_and_skips_unvalidated_responses(tmp_path):
+    responses.add(responses.GET, REPO_URL, json=REPO_JSON, headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+    responses.add(responses.GET, "https://api.github.com/user", json={"login": "octocat"})
+    cache = httpcache.HTTPCache(tmp_path / "http.sqlite", max_bytes=1 << 20)
+
+    GitHubClient("ghp_one", http_cache=cache, metadata_cache=False).get_repo("octo", "hello")
+    GitHubClient("ghp_two", http_cache=cache, metadata_cache=False).get_repo("octo", "hello")
+    GitHubClient("ghp_one", http_cache=cache, metadata_cache=False).get_repo("octo", "hello")
+    sent = [c.request.headers.get("If-Modified-Since") for c in responses.calls]
+    assert sent == [None, None, "Mon, 01 Jan 2024 00:00:00 GMT"]
+
+    # no ETag / Last-Modified: nothing to revalidate with, so nothing is stored
+    client = GitHubClient("ghp_one", http_cache=cache, metadata_cache=False)
+    client.whoami()
+    client._username = None
+    client.whoami()
+    assert "If-None-Match" not in responses.calls[-1].request.headers
+
+
+def test_cache_trims_least_recently_used(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = httpcache.HTTPCache(tmp_path / "http.sqlite", max_bytes=100)
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        cache.put(key, etag='"x"', last_modified=None, status=200, headers={}, body=b"x" * 40)
+        if key == "b":
+            now[0] += 1
+            cache.touch("a")
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert (tmp_path / "http.sqlite").stat().st_mode & 0o077 == 0
+
+
+@responses.activate
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("GCA_HTTP_CACHE", "0")
+    assert GitHubClient("ghp_fake").http_cache is None
+    assert GitHubClient("ghp_fake", http_cache=False).http_cache is None
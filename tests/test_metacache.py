@@ -0,0 +1,96 @@
+"""Persistent repo-metadata cache: TTL, invalidation, single-flight."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import responses
+
+from gca import metacache
+from gca.github_api import GitHubClient, GitHubError, RepoRef
+
+REPO_URL = "https://api.github.com/repos/octo/hello"
+REPO_JSON = {"owner": {"login": "octo"}, "name": "hello", "default_branch": "trunk", "size": 3}
+
+
+def _client(token: str = "ghp_fake") -> GitHubClient:
+    return GitHubClient(token, http_cache=False)
+
+
+@responses.activate
+def test_get_repo_is_cached_across_clients_and_expires(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    responses.add(responses.GET, REPO_URL, json=REPO_JSON)
+
+    expected = RepoRef("octo", "hello", "trunk", size_kb=3)
+    assert _client().get_repo("octo", "hello") == expected
+    assert _client().get_repo("Octo", "Hello") == expected
+    assert len(responses.calls) == 1
+    # another account may not see the same repo: its own entry
+    _client("ghp_other").get_repo("octo", "hello")
+    assert len(responses.calls) == 2
+
+    now[0] += 86_400 + 1
+    _client().get_repo("octo", "hello")
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_404_for_a_repo_drops_its_entry():
+    responses.add(responses.GET, REPO_URL, json=REPO_JSON)
+    responses.add(responses.POST, f"{REPO_URL}/issues", status=404, json={"message": "Not Found"})
+    client = _client()
+    repo = client.get_repo("octo", "hello")
+    with pytest.raises(GitHubError):
+        client.create_issue(repo, title="t")
+    client.get_repo("octo", "hello")
+    assert [c.request.method for c in responses.calls] == ["GET", "POST", "GET"]
+
+
+@responses.activate
+def test_concurrent_lookups_share_one_request():
+    gate = threading.Event()
+
+    def slow(request):
+        gate.wait(5)
+        return 200, {}, json.dumps(REPO_JSON)
+
+    responses.add_callback(responses.GET, REPO_URL, callback=slow)
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(_client().get_repo, "octo", "hello") for _ in range(8)]
+        time.sleep(0.2)
+        gate.set()
+        results = [f.result() for f in futures]
+    assert len(responses.calls) == 1
+    assert all(r.default_branch == "trunk" for r in results)
+
+
+@responses.activate
+def test_discussion_ids_are_cached():
+    responses.add(
+        responses.POST,
+        "https://api.github.com/graphql",
+        json={
+            "data": {
+                "repository": {
+                    "id": "R_1",
+                    "discussionCategories": {
+                        "nodes": [{"id": "C_9", "name": "Q&A", "slug": "q-a", "isAnswerable": True}]
+                    },
+                }
+            }
+        },
+    )
+    repo = RepoRef("octo", "hello", "main")
+    assert _client().find_repo_and_qa_category(repo) == ("R_1", "C_9", "Q&A")
+    assert _client().find_repo_and_qa_category(repo) == ("R_1", "C_9", "Q&A")
+    assert len(responses.calls) == 1
+
+
+def test_ttl_zero_disables_cache(monkeypatch):
+    monkeypatch.setenv("GCA_METADATA_TTL", "0")
+    assert metacache.default_cache("x") is None
+    assert _client().metadata is None
@@ -0,0 +1,101 @@
+"""Equivalence tests: the in-process object/pack writer must agree with real git."""
+
+import datetime as dt
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from gca import git_ops, packfile
+
+
+def _git(cwd: Path, *args: str, input: bytes | None = None) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args], input=input, capture_output=True, check=True
+    ).stdout.decode().strip()
+
+
+def test_blob_id_matches_hash_object(git_repo: Path):
+    for payload in (b"", b"hello\n", "unicode é\n".encode(), bytes(range(256)) * 40):
+        expected = _git(git_repo, "hash-object", "--stdin", input=payload)
+        assert packfile.object_id(b"blob", payload).hex() == expected
+
+
+def test_tree_payload_matches_mktree(git_repo: Path):
+    blob = _git(git_repo, "hash-object", "-w", "--stdin", input=b"x")
+    sub = _git(git_repo, "mktree", input=f"100644 blob {blob}\tleaf\n".encode())
+    # 'a.b' vs 'a' dir ordering is the classic trailing-slash trap
+    listing = f"100644 blob {blob}\ta.b\n040000 tree {sub}\ta\n100644 blob {blob}\ta-\n"
+    expected = _git(git_repo, "mktree", input=listing.encode())
+    entries = [
+        (b"100644", b"a.b", bytes.fromhex(blob)),
+        (packfile.TREE_MODE, b"a", bytes.fromhex(sub)),
+        (b"100644", b"a-", bytes.fromhex(blob)),
+    ]
+    assert packfile.object_id(b"tree", packfile.tree_payload(entries)).hex() == expected
+
+
+def test_commit_payload_matches_commit_tree(git_repo: Path):
+    tree = _git(git_repo, "mktree", input=b"")
+    env_date = "1700000000 +0130"
+    out = subprocess.run(
+        ["git", "-C", str(git_repo), "commit-tree", tree, "-m", "subject"],
+        capture_output=True,
+        check=True,
+        env={
+            "PATH": "/usr/bin:/bin",
+            "GIT_AUTHOR_NAME": "A",
+            "GIT_AUTHOR_EMAIL": "a@x",
+            "GIT_COMMITTER_NAME": "C",
+            "GIT_COMMITTER_EMAIL": "c@x",
+            "GIT_AUTHOR_DATE": env_date,
+            "GIT_COMMITTER_DATE": env_date,
+        },
+    ).stdout.decode().strip()
+    payload = packfile.commit_payload(
+        bytes.fromhex(tree), [], b"A <a@x> " + env_date.encode(), b"C <c@x> " + env_date.encode(), b"subject\n"
+    )
+    assert packfile.object_id(b"commit", payload).hex() == out
+
+
+@pytest.mark.parametrize("size", [10, 300])
+def test_make_delta_round_trips_through_git(git_repo: Path, size: int):
+    """Write deltified trees into a pack and let git resolve them."""
+    blob = bytes.fromhex(_git(git_repo, "hash-object", "-w", "--stdin", input=b"x"))
+    with packfile.PackBuilder() as pack:
+        tree = packfile.TreeBuilder(pack, [])
+        roots = []
+        for i in range(size):
+            tree.add_file(f"d/e/f{i:04d}.md", blob)
+            roots.append(tree.flush().hex())
+        pack_path = pack.write(git_repo / ".git" / "objects" / "pack")
+    _git(git_repo, "verify-pack", str(pack_path.with_suffix(".idx")))
+    names = _git(git_repo, "ls-tree", "-r", "--name-only", roots[-1]).splitlines()
+    assert names == [f"d/e/f{i:04d}.md" for i in range(size)]
+    assert _git(git_repo, "cat-file", "-t", roots[size // 2]) == "tree"
+
+
+def test_pack_engine_matches_fast_import_shas(git_repo: Path, tmp_path: Path):
+    when = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+    git_ops.backdated_commit(git_repo, file_name="README.md", file_content="r", message="init", when=when)
+    (git_repo / ".gca" / "log").mkdir(parents=True)
+    git_ops.backdated_commit(git_repo, file_name=".gca/log/old.md", file_content="o", message="old", when=when)
+    other = tmp_path / "other"
+    subprocess.run(["git", "clone", "-q", str(git_repo), str(other)], check=True)
+    git_ops.configure_identity(other, "gca-test", "test@gca.local")
+
+    specs = [
+        git_ops.CommitSpec(
+            file_name=f".gca/log/2023-02-{d:02d}-{d}.md" if d % 5 else f".gca/prs/x-{d}.md",
+            file_content=f"# day {d}\n",
+            message=f"chore: day {d}",
+            when=dt.datetime(2023, 2, d, 10, d, tzinfo=dt.timezone.utc),
+            coauthors=("Ada <ada@example.org>",) if d == 7 else (),
+        )
+        for d in range(1, 29)
+    ]
+    fi = git_ops.write_commits(git_repo, "main", specs, engine="fast-import")
+    pk = git_ops.write_commits(other, "main", specs, engine="pack")
+    assert pk == fi
+    assert _git(other, "rev-parse", "main") == fi[-1]
+    _git(other, "fsck", "--strict", "--no-dangling")
@@ -0,0 +1,410 @@
+"""Integration test: prs.run against a local bare remote with a mocked GitHub client."""
+
+import datetime as dt
+import itertools
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from gca import prs
+from gca.github_api import GitHubError, MergeBlockedError, PRExistsError, PullRef, RepoRef
+from gca.journal import PRRunJournal
+from gca.repo_spec import RepoSpec
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(cwd), *args], text=True).strip()
+
+
+def _local_spec(remote: Path) -> RepoSpec:
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return str(remote)
+
+    return LocalSpec("local", "remote")
+
+
+@pytest.fixture
+def client(flow_client) -> MagicMock:
+    client = flow_client()
+    client.create_pull_request.side_effect = range(1, 100)
+    return client
+
+
+@pytest.mark.parametrize("push_mode", ["atomic", "per-pr"])
+@pytest.mark.parametrize("engine", ["fast-import", "pack", "porcelain"])
+def test_prs_branches_parented_on_default_tip(seeded_remote: Path, client, engine, push_mode):
+    tip = _git(seeded_remote, "rev-parse", "main")
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=3,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 3),
+        engine=engine,
+        push_mode=push_mode,
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.created, s.merged) == (3, 3)
+
+    branches = _git(seeded_remote, "for-each-ref", "--format=%(refname:short)", "refs/heads/gca/").splitlines()
+    assert len(branches) == 3
+    for b in branches:
+        # every PR branch forks straight off the seed commit and only adds its own files
+        assert _git(seeded_remote, "merge-base", "main", b) == tip
+        added = _git(seeded_remote, "diff", "--name-only", f"main...{b}").splitlines()
+        assert added and all(f.startswith(".gca/prs/") for f in added)
+    # the default branch itself is untouched (merging is the mocked client's job)
+    assert _git(seeded_remote, "rev-parse", "main") == tip
+    assert client.merge_pull_request.call_count == 3
+
+
+def test_prs_atomic_push_sends_every_branch_at_once(seeded_remote: Path, client, monkeypatch):
+    pushes = []
+    real_push_refs = prs.git_ops.push_refs
+
+    def recording_push_refs(repo_dir, refs, **kw):
+        pushes.append(list(refs))
+        real_push_refs(repo_dir, refs, **kw)
+
+    monkeypatch.setattr(prs.git_ops, "push", MagicMock(side_effect=AssertionError("per-branch push")))
+    monkeypatch.setattr(prs.git_ops, "push_refs", recording_push_refs)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=4, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 4)
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.created, s.merged) == (4, 4)
+    assert len(pushes) == 1 and len(pushes[0]) == 4
+    heads = [c.kwargs["head"] for c in client.create_pull_request.call_args_list]
+    assert heads == pushes[0]
+
+
+def test_prs_atomic_push_rejection_is_all_or_nothing(seeded_remote: Path, client):
+    # the remote refuses one of the branches; --atomic must keep the others out too
+    hook = seeded_remote / "hooks" / "update"
+    hook.write_text('#!/bin/sh\ncase "$1" in *2024-02-02*) echo "denied" >&2; exit 1;; esac\n')
+    hook.chmod(0o755)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=3, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 3)
+    )
+    s = prs.run(client, opts)[0]
+    assert (s.created, s.merged) == (0, 0)
+    assert [e.split(":")[0] for e in s.errors] == ["PR 1", "PR 2", "PR 3"]
+    assert all("push failed" in e for e in s.errors)
+    assert _git(seeded_remote, "for-each-ref", "refs/heads/gca/") == ""
+    client.create_pull_request.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("allowed", "preferred", "expected"),
+    [
+        ({}, "squash", ("squash", "merge")),  # unknown: try it, fall back to a merge commit
+        ({}, "merge", ("merge",)),
+        ({"allow_squash_merge": False}, "squash", ("merge",)),
+        (dict(allow_merge_commit=True, allow_squash_merge=True, allow_rebase_merge=False), "rebase", ("merge",)),
+        (dict(allow_merge_commit=True, allow_squash_merge=True, requires_linear_history=True), "merge", ("squash",)),
+        (dict(allow_merge_commit=False, allow_squash_merge=False, allow_rebase_merge=False), "squash", ()),
+    ],
+)
+def test_merge_methods_are_chosen_per_repo(allowed, preferred, expected):
+    assert prs._merge_methods(RepoRef("o", "r", "main", **allowed), preferred) == expected
+
+
+def test_prs_merge_with_an_allowed_method_without_trying_others(seeded_remote: Path, flow_client):
+    client = flow_client(allow_merge_commit=True, allow_squash_merge=False, allow_rebase_merge=False)
+    client.create_pull_request.side_effect = range(1, 100)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=3, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 3)
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == [] and s.merged == 3
+    assert [c.kwargs["method"] for c in client.merge_pull_request.call_args_list] == ["merge"] * 3
+
+
+def test_prs_fallback_is_learned_once_per_repo(seeded_remote: Path, client):
+    client.merge_pull_request.side_effect = [MergeBlockedError("Squash merges are not allowed"), None, None, None]
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=3, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 3)
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == [] and s.merged == 3
+    methods = [c.kwargs["method"] for c in client.merge_pull_request.call_args_list]
+    assert methods == ["squash", "merge", "merge", "merge"]
+
+
+class FakeClock:
+    """Monotonic time that only moves when prs sleeps, so polling is deterministic.
+
+    Only `prs` sees it: patching the `time` module itself would also catch the sleeps
+    subprocess makes while waiting for git to exit.
+    """
+
+    def __init__(self, monkeypatch):
+        self.now = 1_000.0
+        self.sleeps: list[float] = []
+        monkeypatch.setattr(prs, "time", SimpleNamespace(monotonic=lambda: self.now, sleep=self.sleep))
+
+    def sleep(self, s: float) -> None:
+        self.sleeps.append(s)
+        self.now += s
+
+
+def test_prs_merge_only_once_github_reports_mergeable(seeded_remote: Path, client, monkeypatch):
+    clock = FakeClock(monkeypatch)
+    rounds = [
+        {1: "UNKNOWN", 2: "MERGEABLE", 3: "UNKNOWN"},
+        {1: "MERGEABLE", 3: "CONFLICTING"},
+    ]
+    client.pull_requests_mergeable.side_effect = lambda repo, numbers: rounds.pop(0)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=3, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 3)
+    )
+    s = prs.run(client, opts)[0]
+    assert [c.args[1] for c in client.pull_requests_mergeable.call_args_list] == [[1, 2, 3], [1, 3]]
+    assert [c.args[1] for c in client.merge_pull_request.call_args_list] == [1, 2]
+    assert (s.created, s.merged) == (3, 2)
+    assert s.errors == ["PR #3: not mergeable (conflicts with base)"]
+    assert clock.sleeps == [prs.MERGEABLE_FIRST_DELAY]
+    assert s.mergeable_wait_s == prs.MERGEABLE_FIRST_DELAY
+
+
+def test_prs_mergeability_polling_backs_off_and_gives_up(seeded_remote: Path, client, monkeypatch):
+    clock = FakeClock(monkeypatch)
+    client.pull_requests_mergeable.side_effect = lambda repo, numbers: dict.fromkeys(numbers, "UNKNOWN")
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=2,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 2),
+        lifecycle="graphql",
+    )
+    client.create_pull_requests.side_effect = lambda repo_id, base, pulls: [
+        (i + 1, f"PR_{i}") for i in range(len(pulls))
+    ]
+    s = prs.run(client, opts)[0]
+    # 1+2+4+8 = 15s, then every 8s until the 60s cap: the check at 63s gives up
+    assert clock.sleeps == [1.0, 2.0, 4.0] + [8.0] * 7
+    assert s.mergeable_wait_s == 63.0
+    assert (s.created, s.merged) == (2, 0)
+    assert len(s.errors) == 2 and all("mergeability still unknown" in e for e in s.errors)
+    client.merge_pull_requests.assert_not_called()
+
+
+def _interrupted(opts: prs.PROptions, run_id: str = "abc123") -> None:
+    """Leave the journal an interrupted run of `opts` would have left."""
+    spec = opts.repos[0]
+    PRRunJournal(prs._run_key(opts, spec), spec.full, run_id).save()
+
+
+def test_prs_rerun_reuses_what_an_interrupted_run_left(seeded_remote: Path, client, monkeypatch):
+    tip = _git(seeded_remote, "rev-parse", "main")
+    left = [
+        "gca/pr-2024-02-01-abc123-0rphan00",
+        "gca/pr-2024-02-02-abc123-merged00",
+        "gca/pr-2024-02-03-abc123-0pen0000",
+        "gca/pr-2024-02-01-fff999-0ther000",  # another run's: not ours to adopt
+    ]
+    for branch in left:
+        subprocess.run(["git", "-C", str(seeded_remote), "branch", branch, tip], check=True)
+    client.list_pull_requests.return_value = [
+        PullRef(7, left[1], "PR_7", "closed", merged=True),
+        PullRef(8, left[2], "PR_8", "open", merged=False),
+    ]
+    client.create_pull_request.side_effect = [9]
+    monkeypatch.setattr(prs.git_ops, "clone", MagicMock(side_effect=AssertionError("nothing to build")))
+    monkeypatch.setattr(prs.mirrors, "borrow", MagicMock(side_effect=AssertionError("no mirror fetch")))
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=3,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 3),
+        use_cache=True,
+    )
+    _interrupted(opts)
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.skipped, s.adopted, s.created, s.merged) == (["2024-02-02"], 2, 1, 2)
+    assert client.list_pull_requests.call_args.kwargs["head_prefix"] == "gca/pr-"
+    # the orphan branch gets its PR; the open PR is only merged
+    assert client.create_pull_request.call_args.kwargs["head"] == left[0]
+    assert sorted(c.args[1] for c in client.merge_pull_request.call_args_list) == [8, 9]
+    # finished cleanly: the journal is gone, so the same command starts a fresh run
+    assert PRRunJournal.load(prs._run_key(opts, opts.repos[0])) is None
+
+
+def test_prs_rerun_builds_only_missing_slots(seeded_remote: Path, client):
+    branch = "gca/pr-2024-02-01-abc123-merged00"
+    client.list_pull_requests.return_value = [PullRef(7, branch, "PR_7", "closed", merged=True)]
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=2,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 2),
+        lifecycle="graphql",
+    )
+    _interrupted(opts)
+    client.create_pull_requests.side_effect = lambda repo_id, base, pulls: [
+        (i + 1, f"PR_{i}") for i in range(len(pulls))
+    ]
+    client.merge_pull_requests.side_effect = lambda ids, method: [None] * len(ids)
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.skipped, s.adopted, s.created, s.merged) == (["2024-02-01"], 0, 1, 1)
+    (_, _, pulls), _ = client.create_pull_requests.call_args
+    assert len(pulls) == 1 and pulls[0][0].startswith("gca/pr-2024-02-02-abc123-")
+
+
+@pytest.mark.parametrize("resume", [True, False])
+def test_prs_repeated_or_unresumed_runs_start_fresh(seeded_remote: Path, client, resume):
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=2,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 2),
+        resume=resume,
+    )
+    if not resume:
+        _interrupted(opts)  # --no-resume ignores it
+    first = prs.run(client, opts)[0]
+    # everything the first run made is merged, yet running the command again makes new PRs
+    client.list_pull_requests.return_value = [
+        PullRef(n, c.kwargs["head"], f"PR_{n}", "closed", merged=True)
+        for n, c in enumerate(client.create_pull_request.call_args_list, start=1)
+    ]
+    second = prs.run(client, opts)[0]
+    for s in (first, second):
+        assert s.errors == []
+        assert (s.skipped, s.adopted, s.created, s.merged) == ([], 0, 2, 2)
+    client.list_pull_requests.assert_not_called()
+    heads = [c.kwargs["head"] for c in client.create_pull_request.call_args_list]
+    assert len({h.split("-")[4] for h in heads}) == 2  # a new run id each time
+
+
+def test_prs_skip_repos_that_allow_no_merge_method(seeded_remote: Path, flow_client):
+    client = flow_client(allow_merge_commit=False, allow_squash_merge=False, allow_rebase_merge=False)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)], count=2, start=dt.date(2024, 2, 1), end=dt.date(2024, 2, 2)
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == ["preflight: local/remote allows no merge method"]
+    client.create_pull_request.assert_not_called()
+    assert _git(seeded_remote, "for-each-ref", "refs/heads/gca/") == ""
+
+
+def test_prs_graphql_lifecycle_batches_open_and_merge(seeded_remote: Path, client):
+    exists = PRExistsError("A pull request already exists for local:gca/pr-x")
+    client.create_pull_requests.side_effect = lambda repo_id, base, pulls: [
+        exists if i == 1 else (10 + i, f"PR_{i}") for i in range(len(pulls))
+    ]
+    blocked = MergeBlockedError("Squash merges are not allowed")
+    client.merge_pull_requests.side_effect = [
+        [None, blocked, GitHubError("boom")],  # squash
+        [None],  # fallback: merge commit
+    ]
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=4,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 4),
+        lifecycle="graphql",
+    )
+    s = prs.run(client, opts)[0]
+
+    (_, base, pulls), _ = client.create_pull_requests.call_args
+    assert base == "main" and len(pulls) == 4
+    methods = [c.kwargs["method"] for c in client.merge_pull_requests.call_args_list]
+    assert methods == ["squash", "merge"]
+    assert client.merge_pull_requests.call_args_list[1].args[0] == ["PR_2"]
+    assert (s.created, s.merged) == (3, 2)
+    assert s.errors[0].startswith("PR 2: already exists")
+    assert s.errors[1] == "PR #13: GitHubError: boom"
+    client.create_pull_request.assert_not_called()
+    client.merge_pull_request.assert_not_called()
+
+
+@pytest.mark.parametrize("lifecycle", ["rest", "graphql"])
+def test_prs_fast_forward_merges_with_one_push(seeded_remote: Path, client, lifecycle):
+    tip = _git(seeded_remote, "rev-parse", "main")
+    client.create_pull_requests.side_effect = lambda repo_id, base, pulls: [
+        (i + 1, f"PR_{i}") for i in range(len(pulls))
+    ]
+    client.pull_requests_merged.side_effect = lambda repo, numbers: dict.fromkeys(numbers, True)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=3,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 3),
+        merge_strategy="fast-forward",
+        lifecycle=lifecycle,
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.created, s.merged) == (3, 3)
+    client.merge_pull_request.assert_not_called()
+    client.merge_pull_requests.assert_not_called()
+    client.pull_requests_merged.assert_called_once()
+
+    # branches are stacked and main now sits on the last head
+    heads = sorted(_git(seeded_remote, "for-each-ref", "--format=%(refname)", "refs/heads/gca/").split())
+    assert _git(seeded_remote, "rev-parse", "main") == _git(seeded_remote, "rev-parse", heads[-1])
+    for older, newer in itertools.pairwise(heads):
+        subprocess.run(["git", "-C", str(seeded_remote), "merge-base", "--is-ancestor", older, newer], check=True)
+    assert _git(seeded_remote, "merge-base", "--is-ancestor", tip, heads[0]) == ""
+
+
+@pytest.mark.parametrize("lifecycle", ["rest", "graphql"])
+@pytest.mark.parametrize("failing", [1, 2])
+def test_prs_fast_forward_stops_before_a_pr_that_failed_to_open(
+    seeded_remote: Path, client, lifecycle, failing
+):
+    tip = _git(seeded_remote, "rev-parse", "main")
+    outcomes = [(1, "PR_1"), (2, "PR_2"), (3, "PR_3")]
+    outcomes[failing - 1] = GitHubError("boom")
+    client.create_pull_requests.return_value = outcomes
+    client.create_pull_request.side_effect = [n if isinstance(n, GitHubError) else n[0] for n in outcomes]
+    client.pull_requests_merged.side_effect = lambda repo, numbers: dict.fromkeys(numbers, True)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=3,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 3),
+        merge_strategy="fast-forward",
+        lifecycle=lifecycle,
+    )
+    s = prs.run(client, opts)[0]
+    heads = sorted(_git(seeded_remote, "for-each-ref", "--format=%(refname)", "refs/heads/gca/").split())
+    assert s.errors[0] == f"PR {failing}: GitHubError: boom"
+    assert [e.split(":")[0] for e in s.errors[1:]] == [f"PR {n}" for n in range(failing + 1, 4)]
+    if lifecycle == "rest":
+        assert client.create_pull_request.call_count == failing  # nothing opened past the gap
+    if failing == 1:
+        # nothing may land on main without a PR
+        assert _git(seeded_remote, "rev-parse", "main") == tip
+        client.pull_requests_merged.assert_not_called()
+        assert s.merged == 0
+    else:
+        assert _git(seeded_remote, "rev-parse", "main") == _git(seeded_remote, "rev-parse", heads[0])
+        client.pull_requests_merged.assert_called_once()
+        assert client.pull_requests_merged.call_args.args[1] == [1]
+        assert s.merged == 1
+
+
+def test_prs_fast_forward_rejected_leaves_prs_open(seeded_remote: Path, client):
+    hook = seeded_remote / "hooks" / "update"
+    hook.write_text('#!/bin/sh\n[ "$1" = refs/heads/main ] && { echo "protected" >&2; exit 1; }\nexit 0\n')
+    hook.chmod(0o755)
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=2,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 2),
+        merge_strategy="fast-forward",
+    )
+    s = prs.run(client, opts)[0]
+    assert (s.created, s.merged) == (2, 0)
+    assert len(s.errors) == 1 and s.errors[0].startswith("fast-forward of main failed")
+    client.pull_requests_merged.assert_not_called()
@@ -0,0 +1,95 @@
+"""Merged-branch pruning against a local bare remote with a mocked GitHub client."""
+
+import datetime as dt
+import subprocess
+from pathlib import Path
+
+from gca import git_ops, prs, prune
+from gca.github_api import PullRef
+from gca.repo_spec import RepoSpec
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(cwd), *args], text=True).strip()
+
+
+def _local_spec(remote: Path) -> RepoSpec:
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return str(remote)
+
+    return LocalSpec("local", "remote")
+
+
+def _gca_branches(remote: Path) -> list[str]:
+    return _git(remote, "for-each-ref", "--format=%(refname:short)", "refs/heads/gca/").split()
+
+
+def test_merged_branches_only_takes_merged_tips():
+    refs = {f"refs/heads/gca/pr-{n}": f"sha-{n}" for n in "abcde"}
+    pulls = [
+        PullRef(1, "gca/pr-a", "PR_1", "closed", merged=True, head_sha="sha-a"),
+        PullRef(2, "gca/pr-b", "PR_2", "closed", merged=True, head_sha="older"),  # pushed to since
+        PullRef(3, "gca/pr-c", "PR_3", "closed", merged=True, head_sha="sha-c"),
+        PullRef(4, "gca/pr-c", "PR_4", "open", merged=False, head_sha="sha-c"),  # still in use
+        PullRef(5, "gca/pr-d", "PR_5", "closed", merged=False, head_sha="sha-d"),  # closed unmerged
+    ]
+    assert prune.merged_branches(refs, pulls) == ["gca/pr-a"]
+
+
+def test_prune_deletes_merged_branches_in_batched_pushes(seeded_remote: Path, flow_client, monkeypatch):
+    tip = _git(seeded_remote, "rev-parse", "main")
+    names = [f"gca/pr-2024-03-0{i}-0000000{i}" for i in range(1, 6)]
+    for name in names:
+        subprocess.run(["git", "-C", str(seeded_remote), "branch", name, tip], check=True)
+    client = flow_client()
+    client.list_pull_requests.return_value = [
+        PullRef(i, name, f"PR_{i}", "closed", merged=True, head_sha=tip) for i, name in enumerate(names[:4])
+    ]
+    pushes = []
+    real_delete = git_ops.delete_remote_branches
+
+    def recording_delete(url, branches, **kw):
+        pushes.append(list(branches))
+        real_delete(url, branches, **kw)
+
+    monkeypatch.setattr(prune, "DELETE_BATCH", 3)
+    monkeypatch.setattr(prune.git_ops, "delete_remote_branches", recording_delete)
+
+    dry = prune.run(client, prune.PruneOptions(repos=[_local_spec(seeded_remote)], dry_run=True))[0]
+    assert (dry.branches, dry.merged, dry.deleted) == (5, 4, 0)
+    assert pushes == [] and len(_gca_branches(seeded_remote)) == 5
+
+    s = prune.run(client, prune.PruneOptions(repos=[_local_spec(seeded_remote)]))[0]
+    assert s.errors == []
+    assert (s.branches, s.merged, s.deleted) == (5, 4, 4)
+    assert [len(p) for p in pushes] == [3, 1]
+    assert _gca_branches(seeded_remote) == [names[4]]
+    assert _git(seeded_remote, "rev-parse", "main") == tip
+
+
+def test_prs_prune_merged_deletes_the_run_s_branches(seeded_remote: Path, flow_client):
+    client = flow_client()
+    client.create_pull_request.side_effect = range(1, 100)
+
+    def listed(repo, head_prefix):
+        if not client.merge_pull_request.called:
+            return []  # reconciliation, before anything exists
+        heads = [c.kwargs["head"] for c in client.create_pull_request.call_args_list]
+        return [
+            PullRef(i, h, f"PR_{i}", "closed", merged=True, head_sha=_git(seeded_remote, "rev-parse", h))
+            for i, h in enumerate(heads, start=1)
+        ]
+
+    client.list_pull_requests.side_effect = listed
+    opts = prs.PROptions(
+        repos=[_local_spec(seeded_remote)],
+        count=2,
+        start=dt.date(2024, 2, 1),
+        end=dt.date(2024, 2, 2),
+        prune_merged=True,
+    )
+    s = prs.run(client, opts)[0]
+    assert s.errors == []
+    assert (s.merged, s.pruned) == (2, 2)
+    assert _gca_branches(seeded_remote) == []
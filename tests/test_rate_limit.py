@@ -1,8 +1,12 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import pytest
 import responses
 
-from gca.github_api import GitHubAuthError, GitHubClient, GitHubError, GitHubNotFound
+from gca import ratelimit
+from gca.github_api import GitHubAuthError, GitHubClient, GitHubError, GitHubNotFound, RepoRef
+from gca.retry import RetryPolicy
 
 
 @responses.activate
@@ -49,7 +53,7 @@ def test_5xx_backoff_three_tries(monkeypatch):
         status=200,
         json={"login": "octocat"},
     )
-    client = GitHubClient("ghp_fake")
+    client = GitHubClient("ghp_fake", retry_policy=RetryPolicy(jitter=False))
     assert client.whoami() == "octocat"
     # exponential backoff: 1, 2, 4
     assert sleeps == [1, 2, 4]
@@ -105,3 +109,132 @@ def test_422_generic_raises_error():
         pass
     else:
         raise AssertionError("expected GitHubError")
+
+
+class FakeClock:
+    def __init__(self, monkeypatch, start: float = 1_000_000.0):
+        self.now = start
+        self.sleeps: list[float] = []
+        monkeypatch.setattr(time, "time", lambda: self.now)
+        monkeypatch.setattr(time, "sleep", self.sleep)
+
+    def sleep(self, s: float) -> None:
+        self.sleeps.append(s)
+        self.now += s
+
+
+def _headers(remaining: int, limit: int = 5000, reset: int = 1_000_060, resource: str = "core") -> dict:
+    return {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-used": str(limit - remaining),
+        "x-ratelimit-reset": str(reset),
+        "x-ratelimit-resource": resource,
+    }
+
+
+def test_governor_paces_a_nearly_spent_bucket(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    gov = ratelimit.RateGovernor()
+    gov.after(200, _headers(remaining=6), "https://api.github.com/user")
+    for _ in range(3):
+        gov.before("GET", "https://api.github.com/user")
+    # the first goes straight out; the 5 left over 60s are then spread 12s apart
+    assert clock.sleeps == [pytest.approx(12), pytest.approx(12)]
+    # a fresh window is never slowed down
+    gov.after(200, _headers(remaining=4999, reset=1_003_600), "https://api.github.com/user")
+    clock.sleeps.clear()
+    gov.before("GET", "https://api.github.com/user")
+    assert clock.sleeps == []
+
+
+def test_governor_waits_for_reset_when_empty_and_tracks_graphql_separately(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    gov = ratelimit.RateGovernor()
+    gov.after(200, _headers(remaining=0, reset=1_000_030), "https://api.github.com/user")
+    gov.after(200, _headers(remaining=4900, resource="graphql"), "https://api.github.com/graphql")
+    gov.before("POST", "https://api.github.com/graphql", {"query": "query { viewer { login } }"})
+    assert clock.sleeps == []
+    gov.before("GET", "https://api.github.com/user")
+    assert clock.sleeps == [31]
+    state = gov.state()
+    assert state.buckets["graphql"].remaining == 4899
+    assert state.buckets["core"].used == 5000
+    assert state.waited_s == 31
+
+
+def test_governor_spaces_content_creation(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    gov = ratelimit.RateGovernor(content_per_minute=60, content_burst=2)
+    for _ in range(4):
+        gov.before("POST", "https://api.github.com/repos/o/r/issues")
+    gov.before("GET", "https://api.github.com/repos/o/r")  # reads don't draw tokens
+    gov.before("POST", "https://api.github.com/graphql", {"query": "query { viewer { id } }"})
+    # burst of two, then one per second
+    assert clock.sleeps == [pytest.approx(1), pytest.approx(1)]
+    gov.before("POST", "https://api.github.com/graphql", {"query": "mutation { x }"})
+    assert len(clock.sleeps) == 3
+
+
+def test_governor_is_shared_and_thread_safe(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    monkeypatch.setattr(time, "sleep", lambda s: clock.sleeps.append(s))  # no time travel
+    gov = ratelimit.shared_governor("ghp_fake")
+    assert GitHubClient("ghp_fake").governor is gov
+    gov.after(200, _headers(remaining=3, limit=3), "https://api.github.com/user")
+    with ThreadPoolExecutor(8) as pool:
+        waits = list(pool.map(lambda _: gov.before("GET", "https://api.github.com/user"), range(8)))
+    # three requests fit before the reset; the other five all wait for it
+    assert sum(w >= 60 for w in waits) == 5
+
+
+@responses.activate
+def test_secondary_limit_403_with_retry_after_is_retried(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    url = "https://api.github.com/repos/o/r/issues"
+    responses.add(
+        responses.POST,
+        url,
+        status=403,
+        headers={"retry-after": "7"},
+        json={"message": "You have exceeded a secondary rate limit"},
+    )
+    responses.add(responses.POST, url, status=201, json={"number": 5})
+    client = GitHubClient("ghp_fake")
+    assert client.create_issue(RepoRef("o", "r", "main"), title="t") == 5
+    assert clock.sleeps == [7]
+
+
+def test_ledger_shares_state_between_processes(monkeypatch, tmp_path):
+    clock = FakeClock(monkeypatch)
+    monkeypatch.setattr(time, "sleep", lambda s: clock.sleeps.append(s))
+    path = tmp_path / "ledger.json"
+    # two governors with their own ledger handles stand in for two gca processes
+    a = ratelimit.RateGovernor(ledger=ratelimit.RateLedger(path))
+    b = ratelimit.RateGovernor(ledger=ratelimit.RateLedger(path))
+    a.after(200, _headers(remaining=3, limit=5000), "https://api.github.com/user")
+    a.before("GET", "https://api.github.com/user")
+    a.before("GET", "https://api.github.com/user")
+    b.before("GET", "https://api.github.com/user")  # the last unit
+    assert b.state().buckets["core"].remaining == 0
+    assert b.before("GET", "https://api.github.com/user") == 61  # b learned a's spending
+    assert a.before("GET", "https://api.github.com/user") == 61  # and a learned b's
+
+    # a secondary-limit hold seen by one process pauses the other too
+    b.after(403, {"retry-after": "30"}, "https://api.github.com/repos/o/r/issues")
+    assert a.before("POST", "https://api.github.com/graphql", {"query": "query { viewer { id } }"}) == 30
+
+
+def test_ledger_file_is_keyed_by_hash_and_never_holds_the_token(tmp_path):
+    token = "ghp_" + "x" * 36
+    gov = ratelimit.shared_governor(token)
+    gov.after(200, _headers(remaining=10), "https://api.github.com/user")
+    files = list((tmp_path / ".gca-cache" / "ratelimit").glob("*.json"))
+    assert [f.stem for f in files] == [ratelimit.token_key(token)]
+    assert token not in files[0].read_text()
+    assert files[0].stat().st_mode & 0o077 == 0
+
+
+def test_ledger_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("GCA_RATE_LEDGER", "0")
+    assert ratelimit.shared_governor("ghp_fake").ledger is None
@@ -0,0 +1,123 @@
+"""RetryPolicy: jitter, transport errors, Retry-After, budget, circuit breaker."""
+
+import time
+
+import pytest
+import requests
+import responses
+
+from gca.github_api import GitHubClient, GitHubError, GitHubUnavailable, RepoRef
+from gca.retry import RetryPolicy, is_idempotent
+
+USER = "https://api.github.com/user"
+ISSUES = "https://api.github.com/repos/o/r/issues"
+GRAPHQL = "https://api.github.com/graphql"
+REPO = RepoRef("o", "r", "main")
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    out: list[float] = []
+    monkeypatch.setattr(time, "sleep", lambda s: out.append(s))
+    return out
+
+
+def _client(**policy) -> GitHubClient:
+    return GitHubClient(
+        "ghp_fake", http_cache=False, metadata_cache=False, retry_policy=RetryPolicy(**policy)
+    )
+
+
+def test_decorrelated_jitter_stays_in_bounds():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    pause = 0.0
+    for attempt in range(20):
+        nxt = policy.delay(attempt, pause)
+        assert 1 <= nxt <= min(10, max(pause, 1) * 3)
+        pause = nxt
+    assert RetryPolicy(jitter=False).delay(2, 0) == 4
+
+
+def test_idempotency():
+    assert is_idempotent("PUT", ISSUES)
+    assert not is_idempotent("POST", ISSUES)
+    assert is_idempotent("POST", "https://api.github.com/graphql", {"query": "query { viewer { login } }"})
+    assert not is_idempotent("POST", "https://api.github.com/graphql", {"query": "mutation { x }"})
+
+
+@responses.activate
+def test_transport_errors_are_retried_only_when_safe(sleeps):
+    responses.add(responses.GET, USER, body=requests.ConnectionError("reset"))
+    responses.add(responses.GET, USER, json={"login": "octocat"})
+    client = _client()
+    assert client.whoami() == "octocat"
+    assert client.retry.stats.transport_errors == 1 and client.retry.stats.retries == 1
+
+    # the issue may have been created before the read timed out: don't post it twice
+    responses.add(responses.POST, ISSUES, body=requests.ReadTimeout("slow"))
+    with pytest.raises(requests.ReadTimeout):
+        client.create_issue(REPO, title="t")
+    # but a connection that never opened is safe to retry
+    responses.add(responses.POST, ISSUES, body=requests.ConnectTimeout("no route"))
+    responses.add(responses.POST, ISSUES, status=201, json={"number": 3})
+    assert client.create_issue(REPO, title="t") == 3
+
+
+@responses.activate
+def test_retry_after_is_honoured_on_any_error_status(sleeps):
+    responses.add(responses.GET, USER, status=503, headers={"Retry-After": "9"})
+    responses.add(responses.GET, USER, json={"login": "octocat"})
+    client = _client()
+    assert client.whoami() == "octocat"
+    assert sleeps == [9]
+    assert client.retry.stats.slept_s == 9
+
+
+@responses.activate
+def test_mutation_batch_hitting_a_5xx_is_sent_once(sleeps):
+    # GitHub may have created the whole batch before answering 502: re-sending it
+    # would open every PR a second time
+    responses.add(responses.POST, GRAPHQL, status=502, headers={"Retry-After": "1"})
+    client = _client()
+    out = client.create_pull_requests("R_1", "main", [("h1", "t1", ""), ("h2", "t2", "")])
+    assert len(responses.calls) == 1
+    assert all(isinstance(r, GitHubError) and r.status == 502 for r in out)
+    assert sleeps == [] and client.retry.stats.retries == 0
+
+    # a query is safe to repeat
+    responses.add(responses.POST, GRAPHQL, status=502)
+    responses.add(responses.POST, GRAPHQL, json={"data": {"viewer": {"login": "octocat"}}})
+    assert client.graphql("query { viewer { login } }") == {"viewer": {"login": "octocat"}}
+    assert len(responses.calls) == 3 and client.retry.stats.retries == 1
+
+
+@responses.activate
+def test_budget_is_shared_by_the_whole_run(sleeps):
+    for _ in range(3):
+        responses.add(responses.GET, USER, status=502)
+    client = _client(budget=1)
+    with pytest.raises(GitHubError):
+        client.whoami()
+    assert len(responses.calls) == 2
+    assert client.retry.stats.budget_exhausted == 1
+
+
+@responses.activate
+def test_circuit_breaker_fails_fast_then_probes(sleeps, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    responses.add(responses.GET, USER, status=500)
+    client = _client(max_attempts=1, breaker_threshold=2, breaker_cooldown=30)
+    for _ in range(2):
+        with pytest.raises(GitHubError):
+            client.whoami()
+    with pytest.raises(GitHubUnavailable):
+        client.whoami()
+    assert len(responses.calls) == 2
+    assert client.retry.stats.circuit_rejections == 1
+
+    now[0] += 31
+    responses.replace(responses.GET, USER, json={"login": "octocat"})
+    assert client.whoami() == "octocat"
+    client._username = None
+    assert client.whoami() == "octocat"  # closed again
@@ -0,0 +1,80 @@
+"""git subprocess telemetry: what gets recorded, how it is scoped and aggregated."""
+
+import datetime as dt
+from pathlib import Path
+
+import pytest
+
+from gca import commits, git_ops, telemetry
+from gca.repo_spec import RepoSpec
+
+
+@pytest.fixture(autouse=True)
+def _fresh_records():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        (["rev-parse", "HEAD"], "rev-parse"),
+        (["-c", "core.autocrlf=false", "clone", "x"], "clone"),
+        (["-C", "/tmp", "--no-pager", "log"], "log"),
+        (["--version"], "git"),
+    ],
+)
+def test_subcommand_of(args, expected):
+    assert telemetry.subcommand_of(args) == expected
+
+
+def test_run_git_records_calls_in_scope(git_repo: Path):
+    with telemetry.scope(flow="unit", repo="o/r"):
+        git_ops.run_git(["status", "--porcelain"], cwd=git_repo, capture=True)
+        with pytest.raises(git_ops.GitError):
+            git_ops.run_git(["rev-parse", "--verify", "nope"], cwd=git_repo, capture=True)
+    git_ops.run_git(["status"], cwd=git_repo)  # outside any scope
+
+    tagged = telemetry.calls(flow="unit")
+    assert [(c.subcommand, c.status != 0, c.repo) for c in tagged] == [
+        ("status", False, "o/r"),
+        ("rev-parse", True, "o/r"),
+    ]
+    assert tagged[1].stderr_bytes > 0
+    assert all(c.wall_s > 0 for c in tagged)
+    assert telemetry.calls()[-1].flow is None
+
+
+def test_coprocess_recorded_when_closed(git_repo: Path):
+    runner = git_ops.GitRunner(git_repo)
+    with telemetry.scope(flow="unit", repo="o/r"):
+        runner.resolve("HEAD")
+        runner.resolve("HEAD")
+    runner.close()
+    (call,) = telemetry.calls(flow="unit")
+    assert call.subcommand == "cat-file"
+    assert call.status == 0
+    assert call.stdout_bytes > 0
+
+
+def test_commits_flow_breakdown(seeded_remote: Path, flow_client):
+    class LocalSpec(RepoSpec):
+        def auth_clone_url(self, token: str) -> str:  # type: ignore[override]
+            return str(seeded_remote)
+
+    client = flow_client()
+    opts = commits.CommitOptions(
+        repos=[LocalSpec("local", "remote")],
+        start=dt.date(2024, 6, 1),
+        end=dt.date(2024, 6, 2),
+        clone_mode="full",
+    )
+    assert commits.run(client, opts)[0].error is None
+
+    stats = {s.subcommand: s for s in telemetry.breakdown(telemetry.calls(flow="commits"))}
+    assert {"clone", "fast-import", "push"} <= set(stats)
+    assert all(s.repo == "local/remote" for s in stats.values())
+    assert stats["clone"].calls == 1
+    # `git config --system --list` exits non-zero when there is no system file; nothing else may
+    assert all(s.failures == 0 for s in stats.values() if s.subcommand != "config")